@@ -0,0 +1,224 @@
+import json
+import random
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from core.http import DownstreamClient
+from events.authentication import HMACAuthentication
+
+SignedEvent = namedtuple("SignedEvent", ["payload", "body", "headers"])
+
+# Профили трафика: доли дубликатов, рефандов и диспутов, окно перестановки событий и всплески нагрузки
+PROFILES = {
+    "clean": {"duplicate_rate": 0.0, "reorder_window": 0, "burst_factor": 1.0},
+    "duplicates": {"duplicate_rate": 0.2, "reorder_window": 0, "burst_factor": 1.0},
+    "out-of-order": {"duplicate_rate": 0.0, "reorder_window": 20, "burst_factor": 1.0},
+    "burst": {"duplicate_rate": 0.0, "reorder_window": 0, "burst_factor": 10.0},
+    "production": {"duplicate_rate": 0.05, "reorder_window": 10, "burst_factor": 5.0},
+}
+
+
+class EventGenerator:
+    """
+    Синтетический поток событий провайдера в формате EventSerializer. На каждый заказ приходит charge,
+    часть заказов получает refund и dispute. Провайдер повторяет часть событий (duplicate_rate)
+    и доставляет их не по порядку в пределах окна reorder_window.
+    """
+
+    def __init__(
+        self,
+        order_ids=None,
+        refund_rate=0.1,
+        dispute_rate=0.01,
+        duplicate_rate=0.0,
+        reorder_window=0,
+        seed=None,
+        start=None,
+    ):
+        self.order_ids = order_ids
+        self.refund_rate = refund_rate
+        self.dispute_rate = dispute_rate
+        self.duplicate_rate = duplicate_rate
+        self.reorder_window = reorder_window
+        self.random = random.Random(seed)
+        self.start = start or datetime.utcnow()
+
+    @classmethod
+    def from_profile(cls, profile, **kwargs):
+        options = {key: value for key, value in PROFILES[profile].items() if key != "burst_factor"}
+        options.update(kwargs)
+        return cls(**options)
+
+    def stream(self, count):
+        """Ровно count событий, включая дубликаты."""
+        return self._limit(self._reorder(self._duplicate(self._provider_events())), count)
+
+    def _provider_events(self):
+        sequence = 0
+        while True:
+            order_id = self._next_order_id(sequence)
+            sequence += 1
+            yield self.build_event("charge.succeeded", order_id)
+            if self.random.random() < self.refund_rate:
+                yield self.build_event("refund.created", order_id)
+            if self.random.random() < self.dispute_rate:
+                yield self.build_event("dispute.opened", order_id)
+
+    def _next_order_id(self, sequence):
+        if self.order_ids:
+            return str(self.order_ids[sequence % len(self.order_ids)])
+        return str(sequence + 1)
+
+    def build_event(self, event_type, order_id):
+        self.start += timedelta(milliseconds=self.random.randint(1, 1000))
+        return {
+            "event_id": uuid.UUID(int=self.random.getrandbits(128)).hex,
+            "event_type": event_type,
+            "order_id": order_id,
+            "date": self.start.strftime("%Y-%m-%d %H:%M:%S"),
+            "data": {"amount": "100.00", "currency": "RUB"},
+        }
+
+    def _duplicate(self, events):
+        sent = []
+        for event in events:
+            yield event
+            sent.append(event)
+            if len(sent) > 1000:
+                sent = sent[-1000:]
+            if self.random.random() < self.duplicate_rate:
+                yield self.random.choice(sent)
+
+    def _reorder(self, events):
+        if self.reorder_window <= 1:
+            yield from events
+            return
+        window = []
+        for event in events:
+            window.append(event)
+            if len(window) >= self.reorder_window:
+                yield window.pop(self.random.randrange(len(window)))
+
+    @staticmethod
+    def _limit(events, count):
+        for index, event in enumerate(events):
+            if index >= count:
+                return
+            yield event
+
+
+def load_trace(path):
+    """
+    Читает записанный трафик: JSON Lines, в строке payload события, {"payload": ..., "offset": сек}
+    со смещением от начала записи или запись FileSink {"body": ..., "headers": ...}. Возвращает пары
+    (offset, payload), offset может быть None; запись FileSink возвращается готовым SignedEvent,
+    чтобы переиграть ровно те же запросы.
+    """
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if "body" in record and "headers" in record:
+                body = record["body"]
+                yield record.get("offset"), SignedEvent(json.loads(body), body.encode("utf-8"), record["headers"])
+            elif "payload" in record:
+                yield record.get("offset"), record["payload"]
+            else:
+                yield None, record
+
+
+def sign_events(payloads, key):
+    """Подписывает события так же, как их проверяет HMACAuthentication."""
+    for payload in payloads:
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        headers = {
+            HMACAuthentication.HMAC_HEADER: HMACAuthentication._calculate_hmac(body, key.secret).decode("utf-8"),
+            HMACAuthentication.PROVIDER_HEADER: key.provider,
+            HMACAuthentication.KEY_ID_HEADER: key.key_id,
+        }
+        yield SignedEvent(payload, body, headers)
+
+
+def sign_trace(records, key):
+    """Пары (offset, payload) из load_trace в (offset, SignedEvent); уже подписанные записи не меняются."""
+    for offset, payload in records:
+        if isinstance(payload, SignedEvent):
+            yield offset, payload
+        else:
+            yield offset, next(sign_events([payload], key))
+
+
+class Pacer:
+    """
+    Выдерживает целевую скорость отправки. burst_factor > 1 раз в burst_period секунд на burst_duration
+    секунд поднимает скорость в burst_factor раз. Для записанного трафика соблюдает исходные смещения.
+    """
+
+    def __init__(self, rate=None, burst_factor=1.0, burst_period=10.0, burst_duration=1.0, speed=1.0):
+        self.rate = rate
+        self.burst_factor = burst_factor
+        self.burst_period = burst_period
+        self.burst_duration = burst_duration
+        self.speed = speed
+        self._started = None
+        self._next = 0.0
+
+    def wait(self, offset=None, clock=time.monotonic, sleep=time.sleep):
+        if self._started is None:
+            self._started = clock()
+        if offset is not None:
+            target = offset / self.speed
+        elif self.rate:
+            target = self._next
+            in_burst = self._next % self.burst_period < self.burst_duration
+            self._next += 1 / (self.rate * (self.burst_factor if in_burst else 1))
+        else:
+            return
+        delay = self._started + target - clock()
+        if delay > 0:
+            sleep(delay)
+
+
+class FileSink:
+    """Пишет подписанные события в JSON Lines: тело запроса и заголовки."""
+
+    def __init__(self, file):
+        self.file = file
+
+    def send(self, event):
+        record = {"body": event.body.decode("utf-8"), "headers": event.headers}
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return None
+
+
+class HTTPSink:
+    """Отправляет события на вебхук по постоянным соединениям, возвращает статус ответа."""
+
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.client = DownstreamClient(timeout=timeout)
+
+    def send(self, event):
+        headers = dict(event.headers, **{"Content-Type": "application/json"})
+        try:
+            return self.client.request("POST", self.url, body=event.body, headers=headers).status
+        except OSError as exc:
+            return getattr(exc, "code", None) or "error"
+
+    def close(self):
+        self.client.close()
+
+
+def send_events(events, sink, pacer=None):
+    """Отправляет (offset, SignedEvent) в sink с нужной скоростью. Возвращает счетчик ответов по статусам."""
+    statuses = {}
+    for offset, event in events:
+        if pacer is not None:
+            pacer.wait(offset)
+        status = sink.send(event)
+        statuses[status] = statuses.get(status, 0) + 1
+    return statuses
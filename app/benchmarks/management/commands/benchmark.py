@@ -0,0 +1,67 @@
+import json
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from benchmarks.generator import PROFILES
+from benchmarks.results import compare_results, dump_results, load_results
+from benchmarks.runner import BenchmarkRunner
+
+
+class Command(BaseCommand):
+    help = "Замеряет прием и обработку вебхуков на тестовой БД и сравнивает с базовым прогоном"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--events", type=int, default=500, help="Событий на сценарий")
+        parser.add_argument("--scenario", action="append", dest="scenarios", choices=BenchmarkRunner.SCENARIOS)
+        parser.add_argument("--profile", choices=sorted(PROFILES), default="clean", help="Профиль трафика для ingest")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Сохранить результаты в JSON-файл")
+        parser.add_argument("--compare", help="JSON-файл базового прогона")
+        parser.add_argument("--threshold", type=float, default=0.1, help="Допустимое ухудшение, доля")
+        parser.add_argument("--keepdb", action="store_true", help="Не пересоздавать тестовую БД")
+        parser.add_argument("--with-logging", action="store_true", help="Не отключать логи во время замеров")
+
+    def handle(self, *args, **options):
+        baseline = load_results(options["compare"]) if options["compare"] else None
+
+        if not options["with_logging"]:
+            logging.disable(logging.CRITICAL)
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options["keepdb"])
+        try:
+            results = BenchmarkRunner(
+                events=options["events"],
+                scenarios=options["scenarios"],
+                profile=options["profile"],
+                seed=options["seed"],
+            ).run()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options["keepdb"])
+            teardown_test_environment()
+            logging.disable(logging.NOTSET)
+
+        if options["output"]:
+            dump_results(results, options["output"])
+        else:
+            self.stdout.write(json.dumps(results, ensure_ascii=False, indent=2, sort_keys=True))
+
+        if baseline is not None:
+            self.report(baseline, results, options["threshold"])
+
+    def report(self, baseline, results, threshold):
+        if baseline["meta"].get("database") != results["meta"]["database"]:
+            self.stderr.write(
+                f"Baseline was measured on {baseline['meta'].get('database')}, "
+                f"current run on {results['meta']['database']}"
+            )
+
+        regressions = 0
+        for name, metric, before, after, change, regression in compare_results(baseline, results, threshold):
+            mark = "REGRESSION" if regression else "ok"
+            self.stdout.write(f"{mark:<10} {name:<30} {metric:<10} {before:>12} -> {after:>12} ({change:+.1%})")
+            regressions += regression
+        if regressions:
+            raise CommandError(f"{regressions} metrics regressed by more than {threshold:.0%}")
@@ -0,0 +1,85 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.generator import (
+    PROFILES,
+    EventGenerator,
+    FileSink,
+    HTTPSink,
+    Pacer,
+    load_trace,
+    send_events,
+    sign_events,
+    sign_trace,
+)
+from events.keys import get_secret_registry
+
+
+class Command(BaseCommand):
+    help = "Генерирует подписанный поток событий провайдера в файл или на вебхук"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=1000)
+        parser.add_argument("--profile", choices=sorted(PROFILES), default="clean")
+        parser.add_argument("--duplicate-rate", type=float, default=None)
+        parser.add_argument("--reorder-window", type=int, default=None)
+        parser.add_argument("--refund-rate", type=float, default=None)
+        parser.add_argument("--dispute-rate", type=float, default=None)
+        parser.add_argument("--order-id", action="append", dest="order_ids", default=[], help="ID заказов по кругу")
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--trace", help="Переиграть записанный трафик (JSON Lines) вместо генерации")
+        parser.add_argument("--speed", type=float, default=1.0, help="Ускорение записанного трафика")
+        parser.add_argument("--rate", type=float, default=None, help="Событий в секунду, по умолчанию без ограничения")
+        parser.add_argument("--burst-factor", type=float, default=None)
+        parser.add_argument("--burst-period", type=float, default=10.0)
+        parser.add_argument("--burst-duration", type=float, default=1.0)
+        parser.add_argument("--provider", default=None)
+        parser.add_argument("--key-id", default=None)
+        parser.add_argument("--output", default="-", help="Файл JSON Lines, '-' - stdout")
+        parser.add_argument(
+            "--url", help="Отправлять на вебхук, например http://localhost:8000/v1/webhooks/events/create/"
+        )
+
+    def handle(self, *args, **options):
+        key = get_secret_registry().get_key(options["provider"], options["key_id"])
+        if key is None:
+            raise CommandError("Unknown HMAC key")
+
+        if options["trace"]:
+            events = list(sign_trace(load_trace(options["trace"]), key))
+        else:
+            generator = EventGenerator.from_profile(options["profile"], **self._generator_options(options))
+            events = [(None, event) for event in sign_events(generator.stream(options["count"]), key)]
+
+        burst_factor = options["burst_factor"]
+        if burst_factor is None:
+            burst_factor = PROFILES[options["profile"]]["burst_factor"]
+        pacer = Pacer(
+            rate=options["rate"],
+            burst_factor=burst_factor,
+            burst_period=options["burst_period"],
+            burst_duration=options["burst_duration"],
+            speed=options["speed"],
+        )
+        if options["url"]:
+            sink = HTTPSink(options["url"])
+            try:
+                statuses = send_events(events, sink, pacer)
+            finally:
+                sink.close()
+            self.stderr.write(f"Sent {len(events)} events: {statuses}")
+        elif options["output"] == "-":
+            send_events(events, FileSink(sys.stdout), pacer)
+        else:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                send_events(events, FileSink(file), pacer)
+            self.stderr.write(f"Written {len(events)} events to {options['output']}")
+
+    @staticmethod
+    def _generator_options(options):
+        generator_options = {"seed": options["seed"], "order_ids": options["order_ids"] or None}
+        for name in ("duplicate_rate", "reorder_window", "refund_rate", "dispute_rate"):
+            if options[name] is not None:
+                generator_options[name] = options[name]
+        return generator_options
@@ -0,0 +1,59 @@
+import json
+import math
+
+# Для пропускной способности больше - лучше, для задержек меньше - лучше
+HIGHER_IS_BETTER = ("throughput",)
+LOWER_IS_BETTER = ("p50", "p95", "p99")
+
+
+def percentile(values, pct):
+    """Перцентиль методом ближайшего ранга."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(latencies, elapsed):
+    """Сводка по замерам: latencies в секундах, elapsed - общее время прогона. Задержки в мс."""
+    count = len(latencies)
+    return {
+        "count": count,
+        "throughput": round(count / elapsed, 2) if elapsed else 0.0,
+        "mean": round(sum(latencies) / count * 1000, 3) if count else 0.0,
+        "p50": round(percentile(latencies, 50) * 1000, 3),
+        "p95": round(percentile(latencies, 95) * 1000, 3),
+        "p99": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def load_results(path):
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def dump_results(results, path):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(results, file, ensure_ascii=False, indent=2, sort_keys=True)
+        file.write("\n")
+
+
+def compare_results(baseline, current, threshold):
+    """
+    Сравнивает два прогона по общим сценариям. Возвращает строки (сценарий, метрика, было, стало,
+    относительное изменение, регрессия), регрессия - ухудшение больше чем на threshold.
+    """
+    rows = []
+    for name, current_stats in sorted(current["results"].items()):
+        baseline_stats = baseline["results"].get(name)
+        if baseline_stats is None:
+            continue
+        for metric in HIGHER_IS_BETTER + LOWER_IS_BETTER:
+            before, after = baseline_stats.get(metric), current_stats.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            rows.append((name, metric, before, after, change, worse > threshold))
+    return rows
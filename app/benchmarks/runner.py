@@ -0,0 +1,117 @@
+import platform
+import sys
+import time
+import uuid
+from datetime import datetime
+
+import django
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from events.dedup import get_seen_events
+from events.keys import get_secret_registry
+from events.models import Event
+from events.processors import get_processor_registry
+from events.services import EventService
+from finances.services import FinanceServices
+from orders.models import Order
+
+from .generator import EventGenerator, sign_events
+from .results import summarize
+
+
+class BenchmarkRunner:
+    """
+    Замеры конвейера вебхуков на текущей БД: прием событий через полный стек Django, стоимость
+    дубликатов и скорость обработки событий воркером по типам. Запускать на тестовой БД.
+    """
+
+    SCENARIOS = ("ingest", "duplicates", "process")
+
+    # Статус заказа, при котором событие обрабатывается успешно
+    ORDER_STATUS_FOR_EVENT = {
+        "charge.succeeded": Order.STATUS_NEW,
+        "refund.created": Order.STATUS_PAID,
+        "dispute.opened": Order.STATUS_PAID,
+    }
+    # Типы, которым нужна запись о списании: возврат больше списанного отклоняется
+    CHARGED_FOR_EVENT = {"refund.created"}
+
+    def __init__(self, events=500, scenarios=None, profile="clean", seed=0):
+        self.events = events
+        self.scenarios = scenarios or self.SCENARIOS
+        self.profile = profile
+        self.seed = seed
+        self.client = Client()
+        self._ingested = []
+
+    def run(self):
+        results = {}
+        for scenario in self.SCENARIOS:
+            if scenario in self.scenarios:
+                results.update(getattr(self, f"bench_{scenario}")())
+        return {"meta": self.get_meta(), "results": results}
+
+    def get_meta(self):
+        return {
+            "date": datetime.utcnow().isoformat(timespec="seconds"),
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "events": self.events,
+            "profile": self.profile,
+        }
+
+    def bench_ingest(self):
+        generator = EventGenerator.from_profile(self.profile, seed=self.seed)
+        self._ingested = list(sign_events(generator.stream(self.events), get_secret_registry().get_key()))
+        return {"ingest.create": self._post_all(self._ingested)}
+
+    def bench_duplicates(self):
+        if not self._ingested:
+            self.bench_ingest()
+        # Повтор сразу после приема отсекается кэшем увиденных событий, после его очистки - индексом БД
+        cached = self._post_all(self._ingested)
+        get_seen_events().clear()
+        db = self._post_all(self._ingested)
+        return {"duplicates.cached": cached, "duplicates.db": db}
+
+    def bench_process(self):
+        customer, _ = User.objects.get_or_create(username="benchmark")
+        service = EventService()
+        results = {}
+        for event_type in sorted(get_processor_registry().event_types):
+            status = self.ORDER_STATUS_FOR_EVENT.get(event_type, Order.STATUS_NEW)
+            event_ids = []
+            for _ in range(self.events):
+                order = Order.objects.create(customer=customer, amount=100, status=status)
+                if event_type in self.CHARGED_FOR_EVENT:
+                    FinanceServices.add_charge(customer.pk, order.id, order.amount)
+                event = Event.objects.create(
+                    provider_event_id=uuid.uuid4().hex, event_type=event_type, order_id=str(order.id), data={}
+                )
+                event_ids.append(event.pk)
+
+            latencies = []
+            started = time.perf_counter()
+            for event_id in event_ids:
+                start = time.perf_counter()
+                service.process_event(event_id, event_type)
+                latencies.append(time.perf_counter() - start)
+            results[f"process.{event_type}"] = summarize(latencies, time.perf_counter() - started)
+        return results
+
+    def _post_all(self, events):
+        path = reverse("events:event-create")
+        latencies = []
+        started = time.perf_counter()
+        for event in events:
+            headers = {f"HTTP_{name.upper().replace('-', '_')}": value for name, value in event.headers.items()}
+            start = time.perf_counter()
+            response = self.client.post(path, event.body, content_type="application/json", **headers)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                sys.stderr.write(f"Unexpected response {response.status_code}: {response.content[:200]}\n")
+        return summarize(latencies, time.perf_counter() - started)
@@ -0,0 +1,157 @@
+import json
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from benchmarks.generator import (
+    EventGenerator,
+    FileSink,
+    HTTPSink,
+    Pacer,
+    load_trace,
+    send_events,
+    sign_events,
+    sign_trace,
+)
+from core.tests.test_http import StubHandler
+from events.keys import HMACKey
+from events.serializers import EventSerializer
+from events.tests.test_authentication import generate_hmac_signature
+
+KEY = HMACKey("default", "default", b"generator-secret")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestEventGenerator:
+    def test_stream_matches_serializer(self):
+        events = list(EventGenerator(seed=1, refund_rate=0.5, dispute_rate=0.5).stream(50))
+
+        assert len(events) == 50
+        serializer = EventSerializer(data=events, many=True)
+        assert serializer.is_valid(), serializer.errors
+        assert {event["event_type"] for event in events} == {"charge.succeeded", "refund.created", "dispute.opened"}
+
+    def test_seed_is_reproducible(self):
+        first = [event["event_id"] for event in EventGenerator(seed=7).stream(10)]
+        second = [event["event_id"] for event in EventGenerator(seed=7).stream(10)]
+
+        assert first == second
+
+    def test_duplicates_profile(self):
+        events = list(EventGenerator.from_profile("duplicates", seed=1).stream(1000))
+
+        duplicates = len(events) - len({event["event_id"] for event in events})
+        assert 100 < duplicates < 250
+
+    def test_out_of_order_profile(self):
+        events = list(EventGenerator.from_profile("out-of-order", seed=1, refund_rate=0, dispute_rate=0).stream(100))
+
+        order_ids = [int(event["order_id"]) for event in events]
+        assert order_ids != sorted(order_ids)
+        assert max(abs(position + 1 - order_id) for position, order_id in enumerate(order_ids)) < 100
+
+    def test_order_ids_are_cycled(self):
+        events = list(EventGenerator(order_ids=[10, 20], refund_rate=0, dispute_rate=0).stream(4))
+
+        assert [event["order_id"] for event in events] == ["10", "20", "10", "20"]
+
+
+class TestSigning:
+    def test_signature_matches_hmac_authentication(self):
+        (event,) = sign_events([{"event_id": "1"}], KEY)
+
+        assert event.headers["X-HMAC-Signature"] == generate_hmac_signature(event.body, "generator-secret")
+        assert event.headers["X-HMAC-Provider"] == "default"
+
+
+class TestPacer:
+    def test_rate(self):
+        clock = FakeClock()
+        pacer = Pacer(rate=10)
+
+        for _ in range(3):
+            pacer.wait(clock=clock, sleep=clock.sleep)
+
+        assert clock.now == pytest.approx(0.2)
+
+    def test_burst(self):
+        clock = FakeClock()
+        pacer = Pacer(rate=10, burst_factor=10, burst_period=10, burst_duration=1)
+
+        for _ in range(101):
+            pacer.wait(clock=clock, sleep=clock.sleep)
+
+        # 100 событий в первую секунду всплеска
+        assert clock.now == pytest.approx(1.0)
+
+    def test_trace_offsets_with_speed(self):
+        clock = FakeClock()
+        pacer = Pacer(speed=2)
+
+        pacer.wait(0, clock=clock, sleep=clock.sleep)
+        pacer.wait(10, clock=clock, sleep=clock.sleep)
+
+        assert clock.now == 5
+
+
+class TestSinks:
+    def test_file_sink_and_trace_replay(self, tmp_path):
+        trace = tmp_path / "trace.jsonl"
+        trace.write_text(
+            json.dumps({"payload": {"event_id": "a"}, "offset": 0}) + "\n" + json.dumps({"event_id": "b"}) + "\n"
+        )
+        output = tmp_path / "out.jsonl"
+
+        records = list(load_trace(str(trace)))
+        with open(output, "w") as file:
+            send_events(
+                zip([offset for offset, _ in records], sign_events([p for _, p in records], KEY)), FileSink(file)
+            )
+
+        assert records == [(0, {"event_id": "a"}), (None, {"event_id": "b"})]
+        lines = [json.loads(line) for line in output.read_text().splitlines()]
+        assert [json.loads(line["body"])["event_id"] for line in lines] == ["a", "b"]
+
+    def test_generated_file_round_trip(self, tmp_path):
+        output = tmp_path / "generated.jsonl"
+        generated = list(sign_events(EventGenerator(seed=1).stream(3), KEY))
+        with open(output, "w") as file:
+            send_events([(None, event) for event in generated], FileSink(file))
+
+        other_key = HMACKey("default", "other", b"other-secret")
+        replayed = [event for _, event in sign_trace(load_trace(str(output)), other_key)]
+
+        # Переигрываются те же запросы: тело и заголовки из записи, без повторной подписи
+        assert [(event.body, event.headers) for event in replayed] == [
+            (event.body, event.headers) for event in generated
+        ]
+        assert [event.payload for event in replayed] == [event.payload for event in generated]
+
+    def test_http_sink(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        server.connections = set()
+        threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True).start()
+        sink = HTTPSink(f"http://127.0.0.1:{server.server_address[1]}/v1/webhooks/events/create/")
+        try:
+            events = sign_events(EventGenerator(seed=1).stream(3), KEY)
+            statuses = send_events(((None, event) for event in events), sink)
+        finally:
+            sink.close()
+            server.shutdown()
+            server.server_close()
+
+        assert statuses == {201: 3}
+        assert len(server.connections) == 1
@@ -0,0 +1,38 @@
+from benchmarks.results import compare_results, percentile, summarize
+
+
+class TestSummary:
+    def test_percentile(self):
+        values = list(range(1, 101))
+
+        assert percentile(values, 50) == 50
+        assert percentile(values, 95) == 95
+        assert percentile(values, 99) == 99
+        assert percentile([], 50) == 0
+
+    def test_summarize(self):
+        summary = summarize([0.001, 0.002, 0.003, 0.004], elapsed=0.01)
+
+        assert summary == {"count": 4, "throughput": 400.0, "mean": 2.5, "p50": 2.0, "p95": 4.0, "p99": 4.0}
+
+
+class TestCompareResults:
+    def test_flags_regressions(self):
+        baseline = {"results": {"ingest.create": {"throughput": 100, "p50": 2.0, "p95": 4.0, "p99": 8.0}}}
+        current = {
+            "results": {
+                "ingest.create": {"throughput": 80, "p50": 2.1, "p95": 3.0, "p99": 8.0},
+                "process.charge.succeeded": {"throughput": 10, "p50": 1, "p95": 1, "p99": 1},
+            }
+        }
+
+        rows = {
+            (name, metric): regression for name, metric, _, _, _, regression in compare_results(baseline, current, 0.1)
+        }
+
+        assert rows == {
+            ("ingest.create", "throughput"): True,
+            ("ingest.create", "p50"): False,
+            ("ingest.create", "p95"): False,
+            ("ingest.create", "p99"): False,
+        }
@@ -0,0 +1,44 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError
+
+from benchmarks.management.commands.benchmark import Command
+from benchmarks.runner import BenchmarkRunner
+from events.models import Event, EventOutbox
+from orders.models import Order
+
+
+@pytest.mark.django_db
+class TestBenchmarkRunner:
+    def test_run(self, settings):
+        settings.HMAC_SECRET_KEY = "benchmark-secret"
+
+        results = BenchmarkRunner(events=3).run()
+
+        assert results["meta"]["database"] == "sqlite"
+        assert set(results["results"]) == {
+            "ingest.create",
+            "duplicates.cached",
+            "duplicates.db",
+            "process.charge.succeeded",
+            "process.dispute.opened",
+            "process.refund.created",
+        }
+        assert all(stats["count"] == 3 for stats in results["results"].values())
+        # дубликаты не создали новых событий, обработанные события дошли до конца
+        assert EventOutbox.objects.count() == 3
+        assert Event.objects.filter(status=Event.STATUS_PROCESSED).count() == 9
+        assert Order.objects.filter(status=Order.STATUS_PAID).count() == 3 + 3
+
+
+class TestBenchmarkCommand:
+    def test_report_raises_on_regression(self):
+        baseline = {"meta": {"database": "sqlite"}, "results": {"ingest.create": {"throughput": 100, "p95": 4.0}}}
+        current = {"meta": {"database": "sqlite"}, "results": {"ingest.create": {"throughput": 50, "p95": 4.0}}}
+        out = StringIO()
+
+        with pytest.raises(CommandError, match="1 metrics regressed"):
+            Command(stdout=out).report(baseline, current, threshold=0.1)
+
+        assert "REGRESSION ingest.create" in out.getvalue()
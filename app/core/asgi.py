@@ -0,0 +1,21 @@
+"""
+ASGI entrypoint for the async webhook ingest path.
+
+POST /v1/webhooks/payment is handled by events.asgi.AsyncIngestApplication: many requests
+stay in flight per process while database writes run in a thread pool:
+
+    uvicorn core.asgi:application --workers 2
+
+Django 1.11 has no ASGI handler, other requests are served by core.wsgi / core.ingest.
+"""
+
+import os
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+django.setup()
+
+from events.asgi import AsyncIngestApplication  # noqa: E402  (после настройки Django)
+
+application = AsyncIngestApplication()
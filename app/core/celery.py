@@ -1,9 +1,22 @@
 import os
 
+from billiard.process import current_process
 from celery import Celery
+from celery.signals import worker_process_init
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.core.settings")
 
 app = Celery("proj")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
+
+
+@worker_process_init.connect
+def start_metrics_server(**kwargs):
+    from django.conf import settings
+
+    from core.metrics import start_http_server
+
+    if settings.METRICS_WORKER_PORT:
+        # у каждого процесса prefork-пула свои метрики и свой порт
+        start_http_server(settings.METRICS_WORKER_PORT + getattr(current_process(), "index", 0))
@@ -0,0 +1,56 @@
+from django.db import IntegrityError, connections, transaction
+
+# Бэкенды, которые умеют INSERT ... ON CONFLICT DO NOTHING RETURNING (SQLite >= 3.35, PostgreSQL >= 9.5)
+ON_CONFLICT_VENDORS = ("postgresql", "sqlite")
+
+
+def insert_ignore(model, objs, conflict_fields, returning, using="default"):
+    """
+    Вставляет объекты одним запросом на пачку, пропуская конфликтующие по conflict_fields строки.
+    Возвращает кортежи значений полей returning для реально вставленных строк.
+    """
+    if not objs:
+        return []
+
+    connection = connections[using]
+    opts = model._meta
+    fields = [field for field in opts.concrete_fields if not field.auto_created]
+
+    if connection.vendor not in ON_CONFLICT_VENDORS:
+        return _insert_ignore_fallback(objs, returning, using)
+
+    quote = connection.ops.quote_name
+    columns = ", ".join(quote(field.column) for field in fields)
+    conflict = ", ".join(quote(opts.get_field(name).column) for name in conflict_fields)
+    returning_columns = ", ".join(quote(opts.get_field(name).column) for name in returning)
+    row_placeholder = "({})".format(", ".join(["%s"] * len(fields)))
+
+    inserted = []
+    batch_size = max(connection.ops.bulk_batch_size(fields, objs), 1)
+    with connection.cursor() as cursor:
+        for start in range(0, len(objs), batch_size):
+            batch = objs[start : start + batch_size]
+            params = []
+            for obj in batch:
+                for field in fields:
+                    params.append(field.get_db_prep_save(field.pre_save(obj, True), connection))
+            cursor.execute(
+                f"INSERT INTO {quote(opts.db_table)} ({columns}) "
+                f"VALUES {', '.join([row_placeholder] * len(batch))} "
+                f"ON CONFLICT ({conflict}) DO NOTHING RETURNING {returning_columns}",
+                params,
+            )
+            inserted.extend(tuple(row) for row in cursor.fetchall())
+    return inserted
+
+
+def _insert_ignore_fallback(objs, returning, using):
+    inserted = []
+    for obj in objs:
+        try:
+            with transaction.atomic(using=using):
+                obj.save(force_insert=True, using=using)
+        except IntegrityError:
+            continue
+        inserted.append(tuple(getattr(obj, name) for name in returning))
+    return inserted
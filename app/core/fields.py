@@ -0,0 +1,88 @@
+import base64
+import json
+import zlib
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+COMPRESSED_PREFIX = "zlib:"
+
+
+def encode_payload(value, compress=False):
+    raw = json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(",", ":"))
+    if compress and len(raw) >= settings.PAYLOAD_COMPRESS_THRESHOLD:
+        # Валидный JSON не может начинаться с "z", поэтому префикс однозначно отличает сжатое значение
+        raw = COMPRESSED_PREFIX + base64.b64encode(zlib.compress(raw.encode("utf-8"))).decode("ascii")
+    return raw
+
+
+def decode_payload(raw):
+    if raw.startswith(COMPRESSED_PREFIX):
+        raw = zlib.decompress(base64.b64decode(raw[len(COMPRESSED_PREFIX) :])).decode("utf-8")
+    return json.loads(raw)
+
+
+class RawPayload:
+    """Значение из БД, которое еще не раскодировано."""
+
+    __slots__ = ("raw",)
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def decode(self):
+        return decode_payload(self.raw)
+
+
+class PayloadDescriptor(DeferredAttribute):
+    """Раскодирует JSON при первом обращении к атрибуту, а не при загрузке строки из БД."""
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, RawPayload):
+            value = value.decode()
+            instance.__dict__[self.field_name] = value
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field_name] = value
+
+
+class PayloadField(models.Field):
+    """
+    JSON-данные: jsonb на PostgreSQL (TOAST сам сжимает большие значения), на остальных бэкендах
+    компактный JSON в текстовой колонке, значения длиннее PAYLOAD_COMPRESS_THRESHOLD сжимаются zlib.
+    Нераскодированное значение при сохранении пишется обратно как есть, без повторной сериализации.
+    """
+
+    description = "JSON payload"
+
+    def db_type(self, connection):
+        return "jsonb" if connection.vendor == "postgresql" else "text"
+
+    def contribute_to_class(self, cls, name, **kwargs):
+        super().contribute_to_class(cls, name, **kwargs)
+        setattr(cls, self.attname, PayloadDescriptor(self.attname, cls))
+
+    def from_db_value(self, value, expression, connection, context):
+        # psycopg2 уже отдает jsonb разобранным
+        if isinstance(value, str):
+            return RawPayload(value)
+        return value
+
+    def pre_save(self, model_instance, add):
+        return model_instance.__dict__.get(self.attname)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if value is None:
+            return None
+        if isinstance(value, RawPayload):
+            return value.raw
+        return encode_payload(value, compress=connection.vendor != "postgresql")
+
+    def value_to_string(self, obj):
+        return encode_payload(self.value_from_object(obj))
@@ -0,0 +1,25 @@
+"""
+Gunicorn config: every worker serves its own Prometheus metrics on a free port
+from METRICS_WEB_PORT .. METRICS_WEB_PORT + METRICS_WEB_PORTS - 1. Scrape the whole range:
+
+    gunicorn -c python:core.gunicorn --workers 8 core.ingest:application
+
+Keep METRICS_WEB_PORTS at least twice the number of workers, so workers started by a
+graceful reload find a port while the old ones are still shutting down.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def post_fork(server, worker):
+    from django.conf import settings
+
+    from core.metrics import start_http_server_on_free_port
+
+    if settings.METRICS_WEB_PORT:
+        try:
+            start_http_server_on_free_port(settings.METRICS_WEB_PORT, settings.METRICS_WEB_PORTS)
+        except OSError as exc:
+            logger.error(f"Metrics server for worker {worker.pid} is not started: {exc}")
@@ -0,0 +1,153 @@
+import http.client
+import io
+import json
+import threading
+import time
+from collections import deque
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+
+class DownstreamResponse:
+    def __init__(self, url, status, reason, headers, body):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body.decode("utf-8"))
+
+
+class DownstreamClient:
+    """
+    HTTP-клиент для обращений процессоров к внешним сервисам. Держит пул постоянных соединений
+    на каждый хост, чтобы не платить за TCP/TLS-рукопожатие на каждом событии. Ошибки те же, что
+    у urllib: HTTPError на ответ со статусом >= 400 и URLError на сетевые сбои, поэтому их понимает
+    логика повторов в process_event. URLError несет адрес запроса в filename.
+    """
+
+    IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+    def __init__(self, timeout=None, pool_size=None, keepalive=None):
+        self.timeout = settings.DOWNSTREAM_TIMEOUT if timeout is None else timeout
+        self.pool_size = settings.DOWNSTREAM_POOL_SIZE if pool_size is None else pool_size
+        self.keepalive = settings.DOWNSTREAM_KEEPALIVE if keepalive is None else keepalive
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def get(self, url, headers=None):
+        return self.request("GET", url, headers=headers)
+
+    def post(self, url, data=None, headers=None):
+        headers = dict(headers or {})
+        body = None
+        if data is not None:
+            body = json.dumps(data, separators=(",", ":")).encode("utf-8")
+            headers.setdefault("Content-Type", "application/json")
+        return self.request("POST", url, body=body, headers=headers)
+
+    def request(self, method, url, body=None, headers=None):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise URLError(f"unsupported url {url}", url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+
+        connection, reused = self._acquire(key)
+        try:
+            response = self._send(connection, method, path, body, headers)
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as exc:
+            connection.close()
+            if not reused or not self._can_resend(method, headers):
+                raise URLError(exc, url) from exc
+            # Сервер закрыл простаивающее соединение: повторяем один раз на новом
+            connection, reused = self._create(key), False
+            response = self._send_or_close(connection, url, method, path, body, headers)
+        except (OSError, http.client.HTTPException) as exc:
+            connection.close()
+            raise URLError(exc, url) from exc
+
+        status, reason, response_headers, data, will_close = response
+        if will_close:
+            connection.close()
+        else:
+            self._release(key, connection)
+
+        if status >= 400:
+            raise HTTPError(url, status, reason, response_headers, io.BytesIO(data))
+        return DownstreamResponse(url, status, reason, response_headers, data)
+
+    def _send_or_close(self, connection, url, method, path, body, headers):
+        try:
+            return self._send(connection, method, path, body, headers)
+        except (OSError, http.client.HTTPException) as exc:
+            connection.close()
+            raise URLError(exc, url) from exc
+
+    def _can_resend(self, method, headers):
+        # Запрос мог дойти до сервера до разрыва: повторяем только то, что безопасно выполнить дважды
+        return method in self.IDEMPOTENT_METHODS or any(name.lower() == "idempotency-key" for name in (headers or {}))
+
+    @staticmethod
+    def _send(connection, method, path, body, headers):
+        connection.request(method, path, body=body, headers=headers or {})
+        response = connection.getresponse()
+        data = response.read()
+        return response.status, response.reason, response.msg, data, response.will_close
+
+    def _acquire(self, key):
+        with self._lock:
+            pool = self._pools.get(key)
+            while pool:
+                connection, released_at = pool.pop()
+                if time.monotonic() - released_at < self.keepalive:
+                    return connection, True
+                connection.close()
+        return self._create(key), False
+
+    def _release(self, key, connection):
+        with self._lock:
+            pool = self._pools.setdefault(key, deque())
+            if len(pool) >= self.pool_size:
+                connection.close()
+                return
+            pool.append((connection, time.monotonic()))
+
+    def _create(self, key):
+        scheme, host, port = key
+        connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return connection_class(host, port, timeout=self.timeout)
+
+    def close(self):
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            for connection, _ in pool:
+                connection.close()
+
+
+_downstream_client = None
+
+
+def get_downstream_client():
+    """Клиент на процесс: создается лениво, поэтому соединения не наследуются форкнутыми воркерами."""
+    global _downstream_client
+    if _downstream_client is None:
+        _downstream_client = DownstreamClient()
+    return _downstream_client
+
+
+@receiver(setting_changed)
+def reset_downstream_client(setting, **kwargs):
+    global _downstream_client
+    if setting.startswith("DOWNSTREAM_") and _downstream_client is not None:
+        _downstream_client.close()
+        _downstream_client = None
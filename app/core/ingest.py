@@ -0,0 +1,20 @@
+"""
+WSGI entrypoint with the fast webhook ingest path.
+
+POST /v1/webhooks/payment is handled by events.ingest.IngestApplication without
+DRF and the middleware stack, every other request goes to the regular Django app:
+
+    gunicorn core.ingest:application
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+django_application = get_wsgi_application()
+
+from events.ingest import IngestApplication  # noqa: E402  (после настройки Django)
+
+application = IngestApplication(fallback=django_application)
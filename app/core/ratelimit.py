@@ -0,0 +1,141 @@
+import logging
+import threading
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+logger = logging.getLogger(__name__)
+
+# Кэши, которые не видны другим процессам: общие лимиты, предохранитель и версии кэша статусов
+# на них работают в каждом процессе отдельно
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+_warned_aliases = set()
+
+
+def get_shared_cache(alias):
+    """Кэш для состояния, общего для всех воркеров; один раз на процесс предупреждает, если кэш локальный."""
+    cache = caches[alias]
+    if isinstance(cache, PROCESS_LOCAL_CACHES) and alias not in _warned_aliases:
+        _warned_aliases.add(alias)
+        logger.warning(
+            f"Кэш {alias!r} ({type(cache).__name__}) локален для процесса: его состояние "
+            f"не будет общим для воркеров. Укажите общий кэш, например redis."
+        )
+    return cache
+
+
+class TokenBucket:
+    """
+    Ограничение скорости: rate токенов в секунду, не больше capacity накопленных.
+    acquire блокируется, пока в ведре не наберется нужное количество токенов.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = self.capacity
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def try_acquire(self, tokens=1):
+        """Забирает токены, если они есть, иначе возвращает, сколько секунд ждать."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens=1):
+        tokens = min(tokens, self.capacity)
+        while True:
+            wait = self.try_acquire(tokens)
+            if not wait:
+                return
+            self.sleep(wait)
+
+
+class SharedRateLimit:
+    """
+    Ограничение скорости, общее для всех воркеров: счетчик в кэше Django на окно фиксированной длины.
+    rate - событий в секунду; для rate < 1 окно растягивается, чтобы в него помещалось одно событие.
+    """
+
+    KEY_PREFIX = "ratelimit:"
+
+    def __init__(self, name, rate, cache, clock=time.time):
+        self.name = name
+        self.period = max(1.0, 1.0 / rate)
+        self.limit = max(1, int(rate * self.period))
+        self.cache = cache
+        self.clock = clock
+
+    def try_acquire(self):
+        """Занимает место в текущем окне, иначе возвращает, сколько секунд ждать следующего."""
+        now = self.clock()
+        window = int(now // self.period)
+        key = f"{self.KEY_PREFIX}{self.name}:{window}"
+        timeout = int(self.period) + 1
+        self.cache.add(key, 0, timeout)
+        try:
+            count = self.cache.incr(key)
+        except ValueError:
+            count = 1
+            self.cache.set(key, count, timeout)
+        if count <= self.limit:
+            return 0.0
+        return (window + 1) * self.period - now
+
+
+class SharedConcurrencyLimit:
+    """
+    Семафор, общий для всех воркеров: число занятых слотов в кэше Django. TTL ключа возвращает
+    слоты, которые не освободил упавший воркер; каждый захват слота его продлевает, чтобы счетчик
+    не истек посреди работы.
+    """
+
+    KEY_PREFIX = "concurrency:"
+
+    def __init__(self, name, limit, cache, ttl=60 * 60):
+        self.name = name
+        self.limit = limit
+        self.cache = cache
+        self.ttl = ttl
+        self._key = f"{self.KEY_PREFIX}{name}"
+
+    def try_acquire(self):
+        self.cache.add(self._key, 0, self.ttl)
+        try:
+            running = self.cache.incr(self._key)
+        except ValueError:
+            running = 1
+        self._refresh_ttl(running)
+        if running <= self.limit:
+            return True
+        self.release()
+        return False
+
+    def _refresh_ttl(self, running):
+        # touch есть в Django >= 2.1, expire - у django-redis. Без них ключ перезаписывается значением
+        # после incr: параллельный захват между ними может потеряться, но не дольше чем на ttl.
+        touch = getattr(self.cache, "touch", None) or getattr(self.cache, "expire", None)
+        if touch is not None:
+            touch(self._key, self.ttl)
+        else:
+            self.cache.set(self._key, running, self.ttl)
+
+    def release(self):
+        try:
+            if self.cache.decr(self._key) < 0:
+                self.cache.set(self._key, 0, self.ttl)
+        except ValueError:
+            pass
@@ -0,0 +1,96 @@
+import random
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+from core.ratelimit import get_shared_cache
+from core.utils import calculate_delay
+
+
+def parse_retry_after(value, now=None):
+    """Значение заголовка Retry-After (секунды или HTTP-дата) в секундах ожидания; None, если не разобрать."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max((retry_at.timestamp() - (now if now is not None else time.time())), 0.0)
+
+
+def get_downstream_name(url):
+    """Имя downstream для предохранителя: хост без схемы, порта и пути. Принимает URL или хост с портом."""
+    url = url or ""
+    if "//" not in url:
+        url = f"//{url}"
+    return urlsplit(url).hostname or "default"
+
+
+class CircuitBreaker:
+    """
+    Общий для всех воркеров предохранитель на один downstream, состояние хранится в кэше Django.
+    После failure_threshold ошибок за reset_timeout секунд (или ответа с Retry-After) цепь размыкается,
+    и задачи откладываются до ее замыкания, не обращаясь к downstream.
+    """
+
+    KEY_PREFIX = "circuit:"
+
+    def __init__(self, name, failure_threshold=None, reset_timeout=None, cache=None):
+        # URL ошибки и downstream процессора сводятся к одному ключу
+        self.name = get_downstream_name(name)
+        self.failure_threshold = failure_threshold or settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD
+        self.reset_timeout = reset_timeout or settings.CIRCUIT_BREAKER_RESET_TIMEOUT
+        self.cache = cache or get_shared_cache(settings.CIRCUIT_BREAKER_CACHE_ALIAS)
+        self._failures_key = f"{self.KEY_PREFIX}{self.name}:failures"
+        self._open_until_key = f"{self.KEY_PREFIX}{self.name}:open-until"
+
+    @classmethod
+    def for_url(cls, url, **kwargs):
+        return cls(get_downstream_name(url), **kwargs)
+
+    def open_for(self):
+        """Сколько секунд цепь еще разомкнута, 0 если замкнута."""
+        open_until = self.cache.get(self._open_until_key)
+        if open_until is None:
+            return 0.0
+        return max(open_until - time.time(), 0.0)
+
+    def record_failure(self, retry_after=None):
+        self.cache.add(self._failures_key, 0, self.reset_timeout)
+        try:
+            failures = self.cache.incr(self._failures_key)
+        except ValueError:
+            failures = 1
+            self.cache.set(self._failures_key, failures, self.reset_timeout)
+
+        if retry_after or failures >= self.failure_threshold:
+            self.open(max(retry_after or 0, self.reset_timeout))
+
+    def record_success(self):
+        self.cache.delete_many([self._failures_key, self._open_until_key])
+
+    def open(self, seconds):
+        self.cache.set(self._open_until_key, time.time() + seconds, seconds)
+
+
+def get_retry_countdown(retry_count, retry_after=None, breaker=None):
+    """
+    Задержка перед повтором: ограниченная экспонента, не меньше Retry-After от downstream и не раньше
+    замыкания цепи. Повторы при разомкнутой цепи размазываются по reset_timeout, чтобы не ударить по
+    восстановившемуся сервису всем хвостом сразу.
+    """
+    countdown = calculate_delay(retry_count)
+    if retry_after:
+        countdown = max(countdown, retry_after + random.uniform(0, 1))
+    if breaker is not None:
+        open_for = breaker.open_for()
+        if open_for:
+            countdown = max(countdown, open_for + random.uniform(0, breaker.reset_timeout))
+    return countdown
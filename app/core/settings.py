@@ -124,6 +124,121 @@ STATIC_URL = "/static/"
 
 HMAC_SECRET_KEY = "secret_key"
 
+# Payload событий длиннее порога (в символах JSON) хранится сжатым, кроме PostgreSQL с его jsonb
+PAYLOAD_COMPRESS_THRESHOLD = 4096
+
+# Ключи HMAC по провайдерам: {"provider": {"key_id": "secret"}}. Ключ выбирается по заголовкам
+# X-HMAC-Provider и X-HMAC-Key-Id. Без X-HMAC-Key-Id подходит только единственный ключ провайдера:
+# во время ротации (несколько ключей) заголовок обязателен.
+# HMAC_SECRET_KEY работает как ключ "default" провайдера HMAC_DEFAULT_PROVIDER.
+HMAC_PROVIDER_KEYS = {}
+HMAC_DEFAULT_PROVIDER = "default"
+
+# Максимальное количество событий в одном запросе на пакетный вебхук
+WEBHOOK_BATCH_MAX_SIZE = 1000
+
+# ASGI-прием (core.asgi): сколько потоков пишут события в БД. Это же число соединений с БД на процесс.
+INGEST_THREAD_POOL_SIZE = 20
+
+# Кэш уже полученных id событий: локальный LRU в процессе и необязательный общий уровень
+# (алиас из CACHES, например redis). Дубликаты отсекаются до открытия транзакции.
+SEEN_EVENTS_LOCAL_SIZE = 100000
+SEEN_EVENTS_TTL = 24 * 60 * 60
+SEEN_EVENTS_CACHE_ALIAS = None
+
 # celery
 MAX_RETRIES = 10
 BASE_DELAY = 2
+MAX_RETRY_DELAY = 5 * 60
+# Ожидания разомкнутого предохранителя не тратят попытки, но их число тоже ограничено
+MAX_DEFERRALS = 1000
+
+# Предохранитель на downstream: состояние общее для воркеров через кэш CIRCUIT_BREAKER_CACHE_ALIAS
+# (в проде это должен быть общий кэш, например redis). Цепь размыкается после
+# CIRCUIT_BREAKER_FAILURE_THRESHOLD ошибок за CIRCUIT_BREAKER_RESET_TIMEOUT секунд.
+CIRCUIT_BREAKER_CACHE_ALIAS = "default"
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = 20
+CIRCUIT_BREAKER_RESET_TIMEOUT = 30
+
+# Кэши. В проде ORDER_STATUS_CACHE_ALIAS, CIRCUIT_BREAKER_CACHE_ALIAS, EVENT_PROCESSOR_CACHE_ALIAS
+# (и общие уровни выше) должны указывать на общий кэш, например redis; локальная память процесса
+# подходит для тестов и разработки (core.settings_bench). Кэш статусов заказов общий и по умолчанию:
+# версии сбрасывают воркеры Celery, а читают процессы gunicorn. Его таблица создается командой
+# createcachetable, вместо нее можно подставить memcached или redis.
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "order-status": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "order_status_cache"},
+}
+
+# Платежный статус заказа (GET v1/orders/<id>/payment-status/) читается из кэша, процессоры событий
+# сбрасывают запись после коммита. TTL страхует от потерянного сброса.
+ORDER_STATUS_CACHE_ALIAS = "order-status"
+ORDER_STATUS_CACHE_TTL = 60 * 60
+
+# HTTP-клиент процессоров (core.http): таймаут запроса, число постоянных соединений на хост
+# и сколько секунд простаивающее соединение считается живым
+DOWNSTREAM_TIMEOUT = 10
+DOWNSTREAM_POOL_SIZE = 10
+DOWNSTREAM_KEEPALIVE = 60
+
+# Метрики в формате Prometheus: /metrics отдается только с этих адресов (None - всем),
+# процессы воркеров Celery отдают свои метрики на METRICS_WORKER_PORT + номер процесса (None - выключено).
+# Метрики хранятся в памяти процесса: при нескольких воркерах gunicorn задайте METRICS_WEB_PORT,
+# каждый воркер займет свободный порт из METRICS_WEB_PORT .. + METRICS_WEB_PORTS - 1 (см. core/gunicorn.py),
+# а /metrics отключится.
+METRICS_ALLOWED_IPS = ["127.0.0.1", "::1"]
+METRICS_WORKER_PORT = None
+METRICS_WEB_PORT = None
+METRICS_WEB_PORTS = 32
+
+# outbox: сколько событий публикуется за один проход и пауза между опросами пустого outbox (сек.)
+OUTBOX_BATCH_SIZE = 500
+OUTBOX_POLL_INTERVAL = 0.5
+
+# Пакетная обработка: dispatcher отправляет одну задачу process_events_batch на EVENTS_BATCH_SIZE событий
+# (charge/refund/dispute), события процессоров из EVENT_PROCESSORS идут отдельными задачами process_event
+EVENTS_BATCH_PROCESSING = False
+EVENTS_BATCH_SIZE = 100
+
+# Полосы обработки: события заказа уходят в очередь f"{EVENT_LANE_QUEUE_PREFIX}{crc32(order_id) % EVENT_LANES}".
+# Каждую очередь должен слушать ровно один воркер с --concurrency=1. 0 - полосы выключены.
+EVENT_LANES = 0
+EVENT_LANE_QUEUE_PREFIX = "events.lane."
+
+# Архив: обработанные события старше EVENTS_ARCHIVE_AFTER_DAYS переносятся в EventArchive
+EVENTS_ARCHIVE_AFTER_DAYS = 30
+EVENTS_ARCHIVE_BATCH_SIZE = 1000
+EVENTS_ARCHIVE_INTERVAL = 60 * 60
+
+# Периодические задачи, запускаются celery -A core beat
+CELERY_BEAT_SCHEDULE = {
+    "archive-events": {"task": "events.tasks.archive_events", "schedule": EVENTS_ARCHIVE_INTERVAL},
+}
+
+# Процессоры по типам событий (events.processors). processor - путь к классу, импортируется при первом
+# событии типа; ключ может быть шаблоном ("payout.*"). Типы можно регистрировать и entry point группы
+# "stepik.event_processors", здесь их опции переопределяются. Необязательные опции:
+# queue - своя очередь Celery, чтобы тяжелые и редкие типы не занимали слоты воркеров charge;
+# concurrency - сколько событий типа обрабатывается одновременно во всех воркерах;
+# rate_limit - не больше стольких событий типа в секунду во всех воркерах.
+# Сверх лимитов задача откладывается без траты попыток. Типы без процессора уходят в EVENT_PROCESSOR_DEFAULT.
+EVENT_PROCESSORS = {
+    "charge.succeeded": {"processor": "events.services.ChargeEvent"},
+    "dispute.opened": {"processor": "events.services.DisputeOpenedEvent"},
+    "refund.created": {"processor": "events.services.RefundCreatedEvent"},
+}
+EVENT_PROCESSOR_DEFAULT = {"processor": "events.services.UnhandledEvent"}
+# Лимиты общие для воркеров только в общем кэше (redis и т.п.); на локальной памяти процесса
+# они действуют в каждом процессе отдельно, о чем воркер предупредит в логе.
+EVENT_PROCESSOR_CACHE_ALIAS = "default"
+
+# Reaper: события в NEW/ERROR старше REAPER_STALE_AFTER секунд переотправляются, не больше REAPER_MAX_REPLAYS раз.
+# Отложенные и ждущие повтора задачи не трогаются до REAPER_STALE_AFTER после ожидаемой попытки (Event.retry_at).
+# Переотправка (reaper и команда replay_events) ограничена REPLAY_RATE событиями в секунду.
+REAPER_STALE_AFTER = 15 * 60
+REAPER_MAX_REPLAYS = 5
+REPLAY_RATE = 100
+REPLAY_BATCH_SIZE = 500
+# Reaper проходит несколько раз за REAPER_STALE_AFTER, чтобы событие не висело почти два интервала
+REAPER_INTERVAL = REAPER_STALE_AFTER // 3
+CELERY_BEAT_SCHEDULE["reap-stale-events"] = {"task": "events.tasks.reap_stale_events", "schedule": REAPER_INTERVAL}
@@ -0,0 +1,29 @@
+"""
+Settings for benchmarks and CI: the regular settings plus the benchmarks app
+and an optional local PostgreSQL database.
+
+    python manage.py benchmark --settings=core.settings_bench
+"""
+
+import os
+
+from core.settings import *  # noqa: F401,F403
+from core.settings import CACHES, DATABASES, INSTALLED_APPS
+
+INSTALLED_APPS = INSTALLED_APPS + ["benchmarks"]
+
+# Замеры и тесты идут в одном процессе, кэш статусов заказов - в его памяти
+CACHES = dict(
+    CACHES, **{"order-status": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "order-status"}}
+)
+
+# Локальный PostgreSQL для замеров: задается через POSTGRES_DB, нужен psycopg2
+if os.environ.get("POSTGRES_DB"):
+    DATABASES["default"] = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": os.environ["POSTGRES_DB"],
+        "USER": os.environ.get("POSTGRES_USER", "postgres"),
+        "PASSWORD": os.environ.get("POSTGRES_PASSWORD", ""),
+        "HOST": os.environ.get("POSTGRES_HOST", "localhost"),
+        "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+    }
@@ -0,0 +1,61 @@
+import pytest
+
+from core.fields import COMPRESSED_PREFIX, RawPayload, decode_payload, encode_payload
+from events.models import Event
+
+
+class TestPayloadEncoding:
+    def test_encode_is_compact_json(self):
+        assert encode_payload({"amount": 10, "note": "тест"}) == '{"amount":10,"note":"тест"}'
+
+    def test_large_payload_is_compressed(self, settings):
+        settings.PAYLOAD_COMPRESS_THRESHOLD = 100
+        payload = {"items": ["x" * 50] * 20}
+
+        raw = encode_payload(payload, compress=True)
+
+        assert raw.startswith(COMPRESSED_PREFIX)
+        assert len(raw) < len(encode_payload(payload))
+        assert decode_payload(raw) == payload
+
+    def test_small_payload_is_not_compressed(self, settings):
+        settings.PAYLOAD_COMPRESS_THRESHOLD = 100
+
+        assert encode_payload({"a": 1}, compress=True) == '{"a":1}'
+
+
+@pytest.mark.django_db
+class TestPayloadField:
+    @staticmethod
+    def _create(data):
+        return Event.objects.create(provider_event_id="evt-1", event_type="charge.succeeded", order_id="1", data=data)
+
+    def test_roundtrip_is_decoded_lazily(self):
+        payload = {"note": "some data", "amount": 10}
+        self._create(payload)
+
+        event = Event.objects.get()
+
+        assert isinstance(event.__dict__["data"], RawPayload)
+        assert event.data == payload
+        assert event.__dict__["data"] == payload
+
+    def test_save_keeps_raw_value_untouched(self, settings):
+        settings.PAYLOAD_COMPRESS_THRESHOLD = 100
+        payload = {"items": ["x" * 50] * 20}
+        self._create(payload)
+
+        event = Event.objects.get()
+        event.status = Event.STATUS_PROCESSED
+        event.save()
+
+        raw = Event.objects.values_list("data", flat=True).get().raw
+        assert raw.startswith(COMPRESSED_PREFIX)
+        assert Event.objects.get().data == payload
+
+    def test_deferred_field_is_loaded_on_access(self):
+        self._create({"a": 1})
+
+        event = Event.objects.defer("data").get()
+
+        assert event.data == {"a": 1}
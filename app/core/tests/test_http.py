@@ -0,0 +1,138 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import HTTPError, URLError
+
+import pytest
+
+from core.http import DownstreamClient
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.connections.add(self.client_address)
+        if self.path == "/rate-limited":
+            self._respond(429, b"slow down", {"Retry-After": "30"})
+        elif self.path == "/close":
+            self._respond(200, b"bye", {"Connection": "close"})
+        else:
+            self._respond(200, b'{"ok": true}')
+
+    def do_POST(self):
+        self.server.connections.add(self.client_address)
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self._respond(201, body)
+
+    def _respond(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.connections = set()
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client():
+    client = DownstreamClient(timeout=5, pool_size=2, keepalive=60)
+    yield client
+    client.close()
+
+
+def url(server, path="/"):
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+class TestDownstreamClient:
+    def test_connection_is_reused(self, stub_server, client):
+        for _ in range(5):
+            assert client.get(url(stub_server)).json() == {"ok": True}
+
+        assert len(stub_server.connections) == 1
+
+    def test_post_json(self, stub_server, client):
+        response = client.post(url(stub_server, "/charges"), data={"order_id": 1})
+
+        assert response.status == 201
+        assert json.loads(response.body) == {"order_id": 1}
+
+    def test_http_error_is_raised_with_headers(self, stub_server, client):
+        with pytest.raises(HTTPError) as exc_info:
+            client.get(url(stub_server, "/rate-limited"))
+
+        assert exc_info.value.code == 429
+        assert exc_info.value.filename == url(stub_server, "/rate-limited")
+        assert exc_info.value.hdrs["Retry-After"] == "30"
+        assert exc_info.value.read() == b"slow down"
+
+        client.get(url(stub_server))
+        assert len(stub_server.connections) == 1
+
+    def test_connection_close_is_respected(self, stub_server, client):
+        client.get(url(stub_server, "/close"))
+        client.get(url(stub_server))
+
+        assert len(stub_server.connections) == 2
+
+    def test_expired_connection_is_not_reused(self, stub_server):
+        client = DownstreamClient(timeout=5, keepalive=0)
+        client.get(url(stub_server))
+        client.get(url(stub_server))
+        client.close()
+
+        assert len(stub_server.connections) == 2
+
+    def test_stale_connection_is_retried(self, stub_server, client):
+        client.get(url(stub_server))
+        self._break_pooled_connections(client)
+
+        assert client.get(url(stub_server)).status == 200
+
+    @staticmethod
+    def _break_pooled_connections(client):
+        for pool in client._pools.values():
+            for connection, _ in pool:
+                connection.sock.shutdown(2)
+
+    def test_stale_connection_is_not_retried_for_post(self, stub_server, client):
+        client.get(url(stub_server))
+        self._break_pooled_connections(client)
+
+        with pytest.raises(URLError) as exc_info:
+            client.post(url(stub_server, "/charges"), data={"order_id": 1})
+
+        assert exc_info.value.filename == url(stub_server, "/charges")
+
+    def test_stale_connection_is_retried_for_post_with_idempotency_key(self, stub_server, client):
+        client.get(url(stub_server))
+        self._break_pooled_connections(client)
+
+        response = client.post(url(stub_server, "/charges"), data={"order_id": 1}, headers={"Idempotency-Key": "1"})
+
+        assert response.status == 201
+
+    def test_connection_refused_raises_url_error(self, client):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        port = server.server_address[1]
+        server.server_close()
+
+        with pytest.raises(URLError) as exc_info:
+            client.get(f"http://127.0.0.1:{port}/")
+
+        assert exc_info.value.filename == f"http://127.0.0.1:{port}/"
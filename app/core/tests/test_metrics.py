@@ -0,0 +1,97 @@
+from urllib.request import urlopen
+
+import pytest
+from django.test import Client
+
+from core.metrics import REGISTRY, Counter, Histogram, start_http_server, start_http_server_on_free_port
+
+
+class TestHistogram:
+    def test_render(self):
+        metric = Histogram("request_seconds", "Время запроса", ["endpoint"], buckets=(0.1, 1))
+        metric.observe(0.05, endpoint="create")
+        metric.observe(0.5, endpoint="create")
+        metric.observe(5, endpoint="create")
+
+        assert metric.render() == [
+            "# HELP request_seconds Время запроса",
+            "# TYPE request_seconds histogram",
+            'request_seconds_bucket{endpoint="create",le="0.1"} 1',
+            'request_seconds_bucket{endpoint="create",le="1"} 2',
+            'request_seconds_bucket{endpoint="create",le="+Inf"} 3',
+            'request_seconds_sum{endpoint="create"} 5.55',
+            'request_seconds_count{endpoint="create"} 3',
+        ]
+
+    def test_time(self):
+        metric = Histogram("duration_seconds", "Время")
+
+        with metric.time():
+            pass
+
+        assert metric.get_count() == 1
+
+    def test_wrong_labels(self):
+        metric = Histogram("duration_seconds", "Время", ["endpoint"])
+
+        with pytest.raises(ValueError):
+            metric.observe(1, event_type="charge")
+
+
+class TestCounter:
+    def test_render_escapes_labels(self):
+        metric = Counter("retries_total", "Повторы", ["reason"])
+        metric.inc(reason='http "500"')
+        metric.inc(2, reason='http "500"')
+
+        assert metric.get(reason='http "500"') == 3
+        assert metric.render()[-1] == 'retries_total{reason="http \\"500\\""} 3'
+
+
+class TestMetricsEndpoint:
+    def test_local_request(self, settings):
+        settings.METRICS_ALLOWED_IPS = ["127.0.0.1"]
+
+        response = Client().get("/metrics")
+
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+        assert b"# TYPE webhook_request_duration_seconds histogram" in response.content
+
+    def test_remote_request_is_forbidden(self, settings):
+        settings.METRICS_ALLOWED_IPS = ["127.0.0.1"]
+
+        assert Client(REMOTE_ADDR="10.0.0.1").get("/metrics").status_code == 403
+
+    def test_http_server(self):
+        server = start_http_server(0)
+        try:
+            with urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics") as response:
+                assert response.read().decode("utf-8") == REGISTRY.render()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_endpoint_is_disabled_with_per_worker_ports(self, settings):
+        settings.METRICS_WEB_PORT = 9200
+
+        assert Client().get("/metrics").status_code == 404
+
+    def test_http_server_takes_next_free_port(self):
+        busy = start_http_server(0)
+        port = busy.server_address[1]
+        try:
+            server = start_http_server_on_free_port(port, 2)
+        except OSError:
+            # соседний порт занят кем-то еще
+            busy.shutdown()
+            busy.server_close()
+            pytest.skip(f"port {port + 1} is busy")
+        try:
+            assert server.server_address[1] == port + 1
+            with pytest.raises(OSError):
+                start_http_server_on_free_port(port, 1)
+        finally:
+            for running in (busy, server):
+                running.shutdown()
+                running.server_close()
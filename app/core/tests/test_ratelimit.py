@@ -0,0 +1,136 @@
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.core.cache import cache, caches
+
+from core.ratelimit import SharedConcurrencyLimit, SharedRateLimit, TokenBucket, get_shared_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestTokenBucket:
+    def test_try_acquire_returns_wait_time(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, capacity=10, clock=clock, sleep=clock.sleep)
+
+        assert bucket.try_acquire(10) == 0
+        assert bucket.try_acquire(5) == 0.5
+
+        clock.now += 0.5
+        assert bucket.try_acquire(5) == 0
+
+    def test_acquire_sleeps_until_tokens_refill(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=100, capacity=100, clock=clock, sleep=clock.sleep)
+
+        for _ in range(3):
+            bucket.acquire(100)
+
+        assert clock.now == 2.0
+
+    def test_acquire_more_than_capacity_is_capped(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1, capacity=5, clock=clock, sleep=clock.sleep)
+
+        bucket.acquire(50)
+
+        assert clock.now == 0
+
+
+class TestSharedRateLimit:
+    def test_limit_per_window(self):
+        clock = FakeClock()
+        clock.now = 100.25
+        limit = SharedRateLimit("test", rate=2, cache=cache, clock=clock)
+
+        assert limit.try_acquire() == 0
+        assert limit.try_acquire() == 0
+        assert limit.try_acquire() == 0.75
+
+        clock.now = 101.0
+        assert limit.try_acquire() == 0
+
+    def test_fractional_rate_stretches_window(self):
+        clock = FakeClock()
+        clock.now = 1000.0
+        limit = SharedRateLimit("slow", rate=0.5, cache=cache, clock=clock)
+
+        assert limit.try_acquire() == 0
+        assert limit.try_acquire() == 2.0
+
+
+class TestSharedConcurrencyLimit:
+    def test_slots_are_shared_and_released(self):
+        first = SharedConcurrencyLimit("test", limit=1, cache=cache)
+        second = SharedConcurrencyLimit("test", limit=1, cache=cache)
+
+        assert first.try_acquire() is True
+        assert second.try_acquire() is False
+
+        first.release()
+        assert second.try_acquire() is True
+
+    def test_release_never_goes_negative(self):
+        limit = SharedConcurrencyLimit("test", limit=1, cache=cache)
+        limit.release()
+        limit.release()
+
+        assert limit.try_acquire() is True
+        assert limit.try_acquire() is False
+
+    def test_acquire_refreshes_ttl(self):
+        limit = SharedConcurrencyLimit("test", limit=2, cache=cache, ttl=60)
+        now = time.time()
+        with patch("django.core.cache.backends.locmem.time.time", return_value=now):
+            assert limit.try_acquire() is True
+        with patch("django.core.cache.backends.locmem.time.time", return_value=now + 50):
+            assert limit.try_acquire() is True
+        # Первый захват истек бы здесь, но второй продлил счетчик
+        with patch("django.core.cache.backends.locmem.time.time", return_value=now + 100):
+            assert cache.get(limit._key) == 2
+            assert limit.try_acquire() is False
+
+    def test_acquire_touches_key_when_backend_supports_it(self):
+        backend = MagicMock()
+        backend.incr.return_value = 1
+        limit = SharedConcurrencyLimit("test", limit=1, cache=backend, ttl=60)
+
+        assert limit.try_acquire() is True
+        backend.touch.assert_called_once_with(limit._key, 60)
+        backend.set.assert_not_called()
+
+
+class TestGetSharedCache:
+    @patch("core.ratelimit._warned_aliases", new_callable=set)
+    @patch("core.ratelimit.logger")
+    def test_warns_once_about_process_local_cache(self, mock_logger, warned):
+        assert get_shared_cache("default") is caches["default"]
+        get_shared_cache("default")
+
+        mock_logger.warning.assert_called_once()
+        assert "'default'" in mock_logger.warning.call_args[0][0]
+
+    @patch("core.ratelimit._warned_aliases", new_callable=set)
+    @patch("core.ratelimit.logger")
+    def test_shared_cache_is_not_reported(self, mock_logger, warned):
+        with patch("core.ratelimit.caches", {"shared": MagicMock()}):
+            get_shared_cache("shared")
+
+        mock_logger.warning.assert_not_called()
@@ -0,0 +1,83 @@
+from email.utils import formatdate
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+
+from core.retry import CircuitBreaker, get_retry_countdown, parse_retry_after
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+class TestParseRetryAfter:
+    def test_seconds(self):
+        assert parse_retry_after("120") == 120
+
+    def test_http_date(self):
+        assert parse_retry_after(formatdate(1000 + 30, usegmt=True), now=1000) == 30
+
+    @pytest.mark.parametrize("value", [None, "", "soon"])
+    def test_invalid(self, value):
+        assert parse_retry_after(value) is None
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker("psp", failure_threshold=3, reset_timeout=30)
+
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.open_for() == 0
+
+        breaker.record_failure()
+        assert 29 < breaker.open_for() <= 30
+
+    def test_state_is_shared_between_instances(self):
+        CircuitBreaker("psp", reset_timeout=30).record_failure(retry_after=90)
+
+        assert 89 < CircuitBreaker("psp").open_for() <= 90
+        assert CircuitBreaker("other").open_for() == 0
+
+    def test_success_resets(self):
+        breaker = CircuitBreaker("psp", failure_threshold=1)
+        breaker.record_failure()
+
+        breaker.record_success()
+
+        assert breaker.open_for() == 0
+
+    def test_for_url(self):
+        assert CircuitBreaker.for_url("https://psp.example.com/charges").name == "psp.example.com"
+        assert CircuitBreaker.for_url(None).name == "default"
+
+    def test_url_with_port_and_bare_host_share_state(self):
+        CircuitBreaker.for_url("https://PSP.example.com:8443/charges", failure_threshold=1).record_failure()
+
+        for name in ["psp.example.com", "psp.example.com:8443"]:
+            breaker = CircuitBreaker(name)
+            assert breaker.name == "psp.example.com"
+            assert breaker.open_for() > 0
+
+
+@patch("core.retry.random")
+@patch("core.retry.calculate_delay", return_value=4)
+class TestGetRetryCountdown:
+    def test_exponential_delay(self, mock_delay, mock_random):
+        assert get_retry_countdown(1) == 4
+        mock_delay.assert_called_once_with(1)
+
+    def test_retry_after_wins(self, mock_delay, mock_random):
+        mock_random.uniform.return_value = 0
+        assert get_retry_countdown(1, retry_after=60) == 60
+
+    def test_waits_for_open_circuit(self, mock_delay, mock_random):
+        mock_random.uniform.return_value = 5
+        breaker = CircuitBreaker("psp", reset_timeout=30)
+        breaker.open(100)
+
+        assert 104 < get_retry_countdown(1, breaker=breaker) <= 105
@@ -18,3 +18,9 @@ class TestCalculateDelay:
         mock_random.uniform.return_value = 0.5
         delay = calculate_delay(2)
         assert delay == 8.5
+
+    @patch("core.utils.random")
+    def test_calculate_delay_is_capped(self, mock_random, settings):
+        mock_random.uniform.return_value = 0
+        settings.MAX_RETRY_DELAY = 300
+        assert calculate_delay(10) == 300
@@ -1,7 +1,11 @@
 from django.conf.urls import include, url
 from django.contrib import admin
 
+from core.views import metrics
+
 urlpatterns = [
     url(r"^admin/", admin.site.urls),
+    url(r"^metrics$", metrics, name="metrics"),
+    url(r"^v1/orders/", include("orders.urls", namespace="orders")),
     url("v1/webhooks/", include("events.urls", namespace="events")),
 ]
@@ -4,4 +4,4 @@ from django.conf import settings
 
 
 def calculate_delay(retry_count):
-    return settings.BASE_DELAY * (2**retry_count) + random.uniform(0, 1)
+    return min(settings.BASE_DELAY * (2**retry_count), settings.MAX_RETRY_DELAY) + random.uniform(0, 1)
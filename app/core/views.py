@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+
+from core.metrics import CONTENT_TYPE, REGISTRY
+
+
+def metrics(request):
+    """
+    Метрики процесса в текстовом формате Prometheus. При нескольких воркерах gunicorn (METRICS_WEB_PORT)
+    ответ пришел бы от случайного воркера, поэтому метрики отдаются только с портов воркеров.
+    """
+    if settings.METRICS_WEB_PORT:
+        raise Http404
+    allowed_ips = settings.METRICS_ALLOWED_IPS
+    if allowed_ips is not None and request.META.get("REMOTE_ADDR") not in allowed_ips:
+        return HttpResponseForbidden()
+    return HttpResponse(REGISTRY.render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,80 @@
+import json
+import logging
+import zlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from core.db import insert_ignore
+from events.models import DeadLetter, Event, EventArchive
+
+logger = logging.getLogger(__name__)
+
+
+class EventArchiver:
+    """
+    Переносит обработанные события старше N дней из горячей таблицы Event в EventArchive пачками.
+    Каждая пачка переносится в своей транзакции: вставка в архив и удаление из Event атомарны.
+    DeadLetter события удаляется вместе с ним, поэтому его ошибка и попытки переносятся в архив.
+    """
+
+    def __init__(self, days=None, batch_size=None):
+        self.days = settings.EVENTS_ARCHIVE_AFTER_DAYS if days is None else days
+        self.batch_size = batch_size or settings.EVENTS_ARCHIVE_BATCH_SIZE
+
+    def archive(self):
+        cutoff = timezone.now() - timedelta(days=self.days)
+        archived = 0
+        while True:
+            moved = self.archive_batch(cutoff)
+            archived += moved
+            if moved < self.batch_size:
+                break
+        logger.info(f"Archived {archived} events older than {cutoff.isoformat()}")
+        return archived
+
+    @transaction.atomic
+    def archive_batch(self, cutoff):
+        events = Event.objects.claim(self.batch_size, statuses=[Event.STATUS_PROCESSED], older_than=cutoff)
+        if not events:
+            return 0
+
+        dead_letters = {
+            dead_letter.event_id: dead_letter
+            for dead_letter in DeadLetter.objects.filter(event_id__in=[event.pk for event in events])
+        }
+        insert_ignore(
+            EventArchive,
+            [self._to_archive(event, dead_letters.get(event.pk)) for event in events],
+            conflict_fields=["provider_event_id"],
+            returning=["provider_event_id"],
+        )
+        Event.objects.filter(pk__in=[event.pk for event in events]).delete()
+        return len(events)
+
+    @staticmethod
+    def _to_archive(event, dead_letter=None):
+        archive = EventArchive(
+            provider_event_id=event.provider_event_id,
+            event_type=event.event_type,
+            status=event.status,
+            order_id=event.order_id,
+            data=compress_data(event.data),
+            date=event.date,
+        )
+        if dead_letter is not None:
+            archive.error = dead_letter.error
+            archive.attempts = dead_letter.attempts
+            archive.failed_at = dead_letter.failed_at
+        return archive
+
+
+def compress_data(data):
+    return zlib.compress(json.dumps(data, cls=DjangoJSONEncoder, separators=(",", ":")).encode("utf-8"))
+
+
+def decompress_data(data):
+    return json.loads(zlib.decompress(bytes(data)).decode("utf-8"))
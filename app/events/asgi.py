@@ -0,0 +1,116 @@
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from events.ingest import IngestError, WebhookIngest
+from events.metrics import WEBHOOK_LATENCY
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncIngestApplication:
+    """
+    ASGI-приложение для POST /v1/webhooks/payment. Тело читается и подпись проверяется в event loop,
+    запись в БД (EventService.receive_event) уходит в пул из INGEST_THREAD_POOL_SIZE потоков, поэтому
+    один процесс держит в полете много запросов, пока пул ждет БД. В брокер запрос не пишет:
+    задачи публикует OutboxDispatcher. Остальные запросы передаются в ASGI fallback, если он задан.
+    """
+
+    def __init__(self, fallback=None, executor=None):
+        self.fallback = fallback
+        self.ingest = WebhookIngest()
+        self._executor = executor
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.INGEST_THREAD_POOL_SIZE, thread_name_prefix="ingest-db"
+            )
+        return self._executor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] != "http" or scope["path"].rstrip("/") != self.ingest.PATH:
+            if self.fallback is not None:
+                return await self.fallback(scope, receive, send)
+            return await self._respond(send, 404, {"detail": "Not found."})
+        if scope["method"] != "POST":
+            return await self._respond(send, 405, {"detail": f'Method "{scope["method"]}" not allowed.'})
+
+        with WEBHOOK_LATENCY.time(endpoint="ingest-asgi"):
+            status, payload = await self.handle(scope, receive)
+        await self._respond(send, status, payload)
+
+    async def handle(self, scope, receive):
+        headers = {name.decode("latin-1").lower(): value.decode("latin-1") for name, value in scope["headers"]}
+        try:
+            content_length = int(headers.get("content-length") or 0)
+        except ValueError:
+            content_length = 0
+
+        try:
+            signer = self.ingest.start(headers, content_length)
+            body = await self._read_body(receive, signer)
+            event = self.ingest.verify(headers, signer, body)
+            loop = asyncio.get_running_loop()
+            return 200, await loop.run_in_executor(self.executor, self._save, event)
+        except IngestError as exc:
+            if exc.status == 401:
+                logger.warning(f"Webhook rejected: {exc.detail}")
+            return exc.status, {"detail": exc.detail}
+
+    async def _read_body(self, receive, signer):
+        # Content-Length может не быть (chunked), поэтому лимит проверяем и по мере чтения
+        max_size = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                raise IngestError(400, "Client disconnected.")
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if max_size is not None and size > max_size:
+                raise IngestError(413, "Request body is too large.")
+            signer.update(chunk)
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                return b"".join(chunks)
+
+    def _save(self, event):
+        # Соединения с БД живут в потоках пула: закрываем протухшие, как Django на границах запроса
+        close_old_connections()
+        try:
+            return self.ingest.save(event)
+        finally:
+            close_old_connections()
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self._executor is not None:
+                    self._executor.shutdown(wait=True)
+                    self._executor = None
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    @staticmethod
+    async def _respond(send, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
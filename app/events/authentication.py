@@ -2,28 +2,39 @@ import base64
 import hashlib
 import hmac
 
-from django.conf import settings
 from rest_framework import authentication, exceptions
 
+from events.keys import get_secret_registry
+
 
 class HMACAuthentication(authentication.BaseAuthentication):
     HMAC_HEADER = "X-HMAC-Signature"
+    PROVIDER_HEADER = "X-HMAC-Provider"
+    KEY_ID_HEADER = "X-HMAC-Key-Id"
 
     def authenticate(self, request):
-        secret_key = getattr(settings, "HMAC_SECRET_KEY", None)
-        if not secret_key:
+        registry = get_secret_registry()
+        if not registry:
             raise exceptions.AuthenticationFailed("HMAC key is not configured.")
 
-        signature_header = request.META.get(f'HTTP_{self.HMAC_HEADER.upper().replace("-", "_")}')
+        signature_header = self._get_header(request, self.HMAC_HEADER)
         if not signature_header:
             return None
 
+        key = registry.get_key(
+            self._get_header(request, self.PROVIDER_HEADER), self._get_header(request, self.KEY_ID_HEADER)
+        )
+        if key is None:
+            raise exceptions.AuthenticationFailed("Unknown HMAC key.")
+
+        # Тело читается из потока один раз и кэшируется в request.body: по этим же байтам
+        # VerifiedJSONParser потом строит request.data
         try:
-            request.body
+            body = request.body
         except Exception:
             return None
 
-        expected_signature = self._calculate_hmac(request.body, secret_key.encode("utf-8"))
+        expected_signature = self._calculate_hmac(body, key.secret)
 
         if not hmac.compare_digest(signature_header.encode("utf-8"), expected_signature):
             raise exceptions.AuthenticationFailed("HMAC signature verification failed.")
@@ -33,6 +44,10 @@ class HMACAuthentication(authentication.BaseAuthentication):
     def authenticate_header(selfself, request):
         return "HMAC signature verification"
 
+    @staticmethod
+    def _get_header(request, header):
+        return request.META.get(f'HTTP_{header.upper().replace("-", "_")}')
+
     @staticmethod
     def _calculate_hmac(data, key):
         hash_digest = hmac.new(key, data, hashlib.sha256).digest()
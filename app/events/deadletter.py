@@ -0,0 +1,43 @@
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from events.models import DeadLetter, Event
+from events.replay import EventReplayer
+
+logger = logging.getLogger(__name__)
+
+
+def record_dead_letter(event_id, error, attempts):
+    """Переводит событие в ERROR и сохраняет причину; повторная ошибка обновляет существующую запись."""
+    with transaction.atomic():
+        event = Event.objects.select_for_update().filter(pk=event_id).only("event_type", "order_id").first()
+        if event is None:
+            logger.error(f"Event with id {event_id} does not exist")
+            return None
+        Event.objects.filter(pk=event_id).update(status=Event.STATUS_ERROR)
+        dead_letter, _ = DeadLetter.objects.update_or_create(
+            event_id=event_id,
+            defaults={
+                "event_type": event.event_type,
+                "order_id": event.order_id,
+                "error": error,
+                "attempts": attempts,
+                "failed_at": timezone.now(),
+                "redriven_at": None,
+            },
+        )
+    logger.error(f"Event {event_id} moved to dead letters after {attempts} attempts: {error}")
+    return dead_letter
+
+
+class DeadLetterRedriver(EventReplayer):
+    """Переотправляет события из очереди мертвых писем через outbox пачками с ограничением скорости."""
+
+    def redrive(self, dead_letters):
+        return self.replay(Event.objects.filter(pk__in=dead_letters.values("event_id")))
+
+    def _enqueue(self, events):
+        super()._enqueue(events)
+        DeadLetter.objects.filter(event_id__in=[pk for pk, _, _ in events]).update(redriven_at=timezone.now())
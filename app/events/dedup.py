@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+
+class LocalSeenEvents:
+    """Ограниченный по размеру LRU-кэш id событий с TTL, живет в памяти процесса."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def contains(self, key):
+        with self._lock:
+            expires_at = self._items.get(key)
+            if expires_at is None:
+                return False
+            if expires_at < time.monotonic():
+                del self._items[key]
+                return False
+            self._items.move_to_end(key)
+            return True
+
+    def add(self, key):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._items[key] = time.monotonic() + self.ttl
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+class SeenEventsCache:
+    """
+    Быстрая проверка дубликатов до записи в БД: локальный LRU/TTL-уровень и необязательный общий
+    уровень на кэше Django. Источником истины остается уникальный индекс Event.provider_event_id.
+    """
+
+    KEY_PREFIX = "seen-event:"
+
+    def __init__(self, local_size, ttl, shared_cache=None):
+        self.ttl = ttl
+        self.local = LocalSeenEvents(local_size, ttl)
+        self.shared = shared_cache
+
+    @classmethod
+    def from_settings(cls):
+        alias = settings.SEEN_EVENTS_CACHE_ALIAS
+        return cls(
+            local_size=settings.SEEN_EVENTS_LOCAL_SIZE,
+            ttl=settings.SEEN_EVENTS_TTL,
+            shared_cache=caches[alias] if alias else None,
+        )
+
+    def contains(self, provider_event_id):
+        return bool(self.filter_seen([provider_event_id]))
+
+    def filter_seen(self, provider_event_ids):
+        seen = {event_id for event_id in provider_event_ids if self.local.contains(event_id)}
+        missing = [event_id for event_id in provider_event_ids if event_id not in seen]
+        if self.shared is not None and missing:
+            found = self.shared.get_many([self.KEY_PREFIX + event_id for event_id in missing])
+            for key in found:
+                event_id = key[len(self.KEY_PREFIX) :]
+                self.local.add(event_id)
+                seen.add(event_id)
+        return seen
+
+    def add(self, provider_event_id):
+        self.add_many([provider_event_id])
+
+    def add_many(self, provider_event_ids):
+        for event_id in provider_event_ids:
+            self.local.add(event_id)
+        if self.shared is not None and provider_event_ids:
+            self.shared.set_many({self.KEY_PREFIX + event_id: 1 for event_id in provider_event_ids}, self.ttl)
+
+    def clear(self):
+        self.local.clear()
+
+
+_seen_events = None
+
+
+def get_seen_events():
+    global _seen_events
+    if _seen_events is None:
+        _seen_events = SeenEventsCache.from_settings()
+    return _seen_events
+
+
+@receiver(setting_changed)
+def reset_seen_events(setting, **kwargs):
+    global _seen_events
+    if setting.startswith("SEEN_EVENTS_"):
+        _seen_events = None
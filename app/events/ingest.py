@@ -0,0 +1,162 @@
+import base64
+import hashlib
+import hmac
+import json
+import logging
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core import signals
+from django.utils.dateparse import parse_datetime
+
+from events.keys import get_secret_registry
+from events.metrics import WEBHOOK_LATENCY
+from events.services import EventService
+
+logger = logging.getLogger(__name__)
+
+
+class IngestError(Exception):
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+class WebhookIngest:
+    """
+    Минимальный прием вебхука без DRF и middleware: HMAC считается по кускам тела по мере чтения,
+    схема проверяется вручную, событие сохраняется через EventService.receive_event.
+    Не зависит от протокола сервера: используется и WSGI, и ASGI приложением.
+    """
+
+    PATH = "/v1/webhooks/payment"
+    READ_CHUNK_SIZE = 64 * 1024
+    STRING_FIELDS = {"event_id": 255, "event_type": 50, "order_id": 32}
+
+    def start(self, headers, content_length):
+        """Проверяет заголовки до чтения тела и возвращает HMAC, в который будет дописываться тело."""
+        # None в DATA_UPLOAD_MAX_MEMORY_SIZE означает "без ограничения", как в Django
+        max_size = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        if max_size is not None and content_length > max_size:
+            raise IngestError(413, "Request body is too large.")
+
+        registry = get_secret_registry()
+        if not registry:
+            raise IngestError(401, "HMAC key is not configured.")
+        if not headers.get("x-hmac-signature"):
+            raise IngestError(401, "HMAC signature is missing.")
+
+        key = registry.get_key(headers.get("x-hmac-provider"), headers.get("x-hmac-key-id"))
+        if key is None:
+            raise IngestError(401, "Unknown HMAC key.")
+        return hmac.new(key.secret, digestmod=hashlib.sha256)
+
+    def finish(self, headers, signer, body):
+        return self.save(self.verify(headers, signer, body))
+
+    def verify(self, headers, signer, body):
+        """Сверяет подпись с прочитанным телом и возвращает провалидированное событие."""
+        expected_signature = base64.b64encode(signer.digest())
+        if not hmac.compare_digest(headers["x-hmac-signature"].encode("utf-8"), expected_signature):
+            raise IngestError(401, "HMAC signature verification failed.")
+        return self.validate(body)
+
+    def save(self, event):
+        EventService().receive_event(
+            provider_event_id=event["event_id"],
+            event_type=event["event_type"],
+            order_id=event["order_id"],
+            data=event["data"],
+        )
+        return {"message": "Event received.", "event_id": event["event_id"]}
+
+    def validate(self, body):
+        try:
+            event = json.loads(body.decode("utf-8"))
+        except ValueError as exc:
+            raise IngestError(400, f"JSON parse error - {exc}")
+        if not isinstance(event, dict):
+            raise IngestError(400, "Expected a JSON object.")
+
+        for field, max_length in self.STRING_FIELDS.items():
+            value = event.get(field)
+            if not isinstance(value, (str, int)) or isinstance(value, bool) or not str(value):
+                raise IngestError(400, f"{field}: This field is required.")
+            if len(str(value)) > max_length:
+                raise IngestError(400, f"{field}: Ensure this field has no more than {max_length} characters.")
+            event[field] = str(value)
+
+        date = event.get("date")
+        if not isinstance(date, str) or parse_datetime(date) is None:
+            raise IngestError(400, "date: Datetime has wrong format.")
+        if event.get("data") is None:
+            raise IngestError(400, "data: This field is required.")
+        return event
+
+
+class IngestApplication:
+    """
+    WSGI-приложение для POST /v1/webhooks/payment. Остальные запросы передаются в fallback
+    (обычно core.wsgi.application), так что его можно поставить перед основным Django-приложением.
+    """
+
+    def __init__(self, fallback=None):
+        self.fallback = fallback
+        self.ingest = WebhookIngest()
+
+    def __call__(self, environ, start_response):
+        if environ.get("PATH_INFO", "").rstrip("/") != self.ingest.PATH:
+            if self.fallback is not None:
+                return self.fallback(environ, start_response)
+            return self._respond(start_response, 404, {"detail": "Not found."})
+        if environ["REQUEST_METHOD"] != "POST":
+            return self._respond(start_response, 405, {"detail": f'Method "{environ["REQUEST_METHOD"]}" not allowed.'})
+
+        # Как и Django WSGIHandler, даем закрыть протухшие соединения с БД до и после запроса
+        signals.request_started.send(sender=self.__class__, environ=environ)
+        try:
+            with WEBHOOK_LATENCY.time(endpoint="ingest"):
+                status, payload = self.handle(environ)
+        finally:
+            signals.request_finished.send(sender=self.__class__)
+        return self._respond(start_response, status, payload)
+
+    def handle(self, environ):
+        headers = {
+            key[5:].replace("_", "-").lower(): value for key, value in environ.items() if key.startswith("HTTP_")
+        }
+        try:
+            content_length = int(environ.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            content_length = 0
+
+        try:
+            signer = self.ingest.start(headers, content_length)
+            body = self._read_body(environ["wsgi.input"], content_length, signer)
+            return 200, self.ingest.finish(headers, signer, body)
+        except IngestError as exc:
+            if exc.status == 401:
+                logger.warning(f"Webhook rejected: {exc.detail}")
+            return exc.status, {"detail": exc.detail}
+
+    def _read_body(self, stream, content_length, signer):
+        chunks = []
+        remaining = content_length
+        while remaining > 0:
+            chunk = stream.read(min(self.ingest.READ_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            signer.update(chunk)
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b"".join(chunks)
+
+    @staticmethod
+    def _respond(start_response, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        start_response(
+            f"{status} {HTTPStatus(status).phrase}",
+            [("Content-Type", "application/json"), ("Content-Length", str(len(body)))],
+        )
+        return [body]
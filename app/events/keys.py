@@ -0,0 +1,61 @@
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+HMACKey = namedtuple("HMACKey", ["provider", "key_id", "secret"])
+
+
+class SecretRegistry:
+    """
+    Активные ключи HMAC по провайдерам. Секреты кодируются в bytes один раз при сборке реестра,
+    ключ выбирается по (provider, key_id) из заголовков без перебора. Несколько ключей у одного
+    провайдера позволяют ротацию без простоя: новый ключ добавляется, старый удаляется после переключения.
+    Пока у провайдера больше одного ключа, X-HMAC-Key-Id обязателен: иначе запросы без него проверялись бы
+    старым ключом и ротация ничего бы не давала.
+    """
+
+    def __init__(self, provider_keys, default_provider):
+        self.default_provider = default_provider
+        self._keys = {}
+        self._single = {}
+        for provider, keys in provider_keys.items():
+            for key_id, secret in keys.items():
+                self._keys[(provider, key_id)] = HMACKey(provider, key_id, secret.encode("utf-8"))
+            if len(keys) == 1:
+                self._single[provider] = self._keys[(provider, key_id)]
+
+    @classmethod
+    def from_settings(cls):
+        provider_keys = {provider: dict(keys) for provider, keys in settings.HMAC_PROVIDER_KEYS.items()}
+        if settings.HMAC_SECRET_KEY:
+            provider_keys.setdefault(settings.HMAC_DEFAULT_PROVIDER, {}).setdefault("default", settings.HMAC_SECRET_KEY)
+        return cls(provider_keys, settings.HMAC_DEFAULT_PROVIDER)
+
+    def __bool__(self):
+        return bool(self._keys)
+
+    def get_key(self, provider=None, key_id=None):
+        provider = provider or self.default_provider
+        if key_id is None:
+            return self._single.get(provider)
+        return self._keys.get((provider, key_id))
+
+
+_registry = None
+
+
+def get_secret_registry():
+    """Реестр кэшируется в памяти процесса и сбрасывается при изменении настроек с ключами."""
+    global _registry
+    if _registry is None:
+        _registry = SecretRegistry.from_settings()
+    return _registry
+
+
+@receiver(setting_changed)
+def reset_secret_registry(setting, **kwargs):
+    global _registry
+    if setting.startswith("HMAC_"):
+        _registry = None
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from events.archive import EventArchiver
+
+
+class Command(BaseCommand):
+    help = "Переносит обработанные события старше N дней в архив"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None)
+        parser.add_argument("--batch-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        archived = EventArchiver(days=options["days"], batch_size=options["batch_size"]).archive()
+        self.stdout.write(f"Archived {archived} events")
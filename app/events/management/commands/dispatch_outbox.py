@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from events.outbox import OutboxDispatcher
+
+
+class Command(BaseCommand):
+    help = "Публикует события из outbox в очередь Celery"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--interval", type=float, default=None, help="Пауза между опросами пустого outbox, сек.")
+        parser.add_argument("--once", action="store_true", help="Отправить одну пачку и завершиться")
+
+    def handle(self, *args, **options):
+        dispatcher = OutboxDispatcher(batch_size=options["batch_size"])
+        if options["once"]:
+            dispatched = dispatcher.dispatch()
+            self.stdout.write(f"Dispatched {dispatched} events")
+            return
+        dispatcher.run(interval=options["interval"])
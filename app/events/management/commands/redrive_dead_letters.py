@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from events.deadletter import DeadLetterRedriver
+from events.models import DeadLetter
+
+
+class Command(BaseCommand):
+    help = "Показывает и переотправляет события из очереди мертвых писем"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="Дата ошибки от (ISO 8601)")
+        parser.add_argument("--until", help="Дата ошибки до (ISO 8601)")
+        parser.add_argument("--event-type", action="append", dest="event_types", default=[])
+        parser.add_argument("--error", help="Подстрока в тексте ошибки")
+        parser.add_argument("--include-redriven", action="store_true", help="Учитывать уже переотправленные")
+        parser.add_argument("--list", action="store_true", help="Только показать мертвые письма")
+        parser.add_argument("--limit", type=int, default=50, help="Сколько строк показать в --list")
+        parser.add_argument("--rate", type=float, default=None, help="Событий в секунду")
+        parser.add_argument("--batch-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        dead_letters = self._get_queryset(options)
+
+        if options["list"]:
+            rows = dead_letters.order_by("-failed_at").values_list(
+                "event_id", "event_type", "attempts", "failed_at", "error"
+            )[: options["limit"]]
+            for event_id, event_type, attempts, failed_at, error in rows:
+                self.stdout.write(f"{event_id}\t{event_type}\t{attempts}\t{failed_at:%Y-%m-%d %H:%M:%S}\t{error}")
+            self.stdout.write(f"{dead_letters.count()} dead letters")
+            return
+
+        redriver = DeadLetterRedriver(rate=options["rate"], batch_size=options["batch_size"])
+        redriven = redriver.redrive(dead_letters)
+        self.stdout.write(f"Redriven {redriven} events")
+
+    def _get_queryset(self, options):
+        queryset = DeadLetter.objects.all() if options["include_redriven"] else DeadLetter.objects.pending()
+        for option, lookup in (("since", "failed_at__gte"), ("until", "failed_at__lt")):
+            if options[option]:
+                value = parse_datetime(options[option])
+                if value is None:
+                    raise CommandError(f"--{option}: wrong datetime format")
+                queryset = queryset.filter(**{lookup: value})
+        if options["event_types"]:
+            queryset = queryset.filter(event_type__in=options["event_types"])
+        if options["error"]:
+            queryset = queryset.filter(error__contains=options["error"])
+        return queryset
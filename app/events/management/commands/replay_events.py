@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from events.models import Event
+from events.replay import EventReaper, EventReplayer
+
+
+class Command(BaseCommand):
+    help = "Повторно ставит события в очередь обработки с ограничением скорости"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--stale", action="store_true", help="Переотправить застрявшие события, как это делает reaper"
+        )
+        parser.add_argument("--since", help="Дата получения события от (ISO 8601)")
+        parser.add_argument("--until", help="Дата получения события до (ISO 8601)")
+        parser.add_argument("--event-type", action="append", dest="event_types", default=[])
+        parser.add_argument("--order-id", action="append", dest="order_ids", default=[])
+        parser.add_argument(
+            "--status",
+            action="append",
+            dest="statuses",
+            choices=[Event.STATUS_NEW, Event.STATUS_ERROR, Event.STATUS_PARKED],
+            default=[],
+        )
+        parser.add_argument("--rate", type=float, default=None, help="Событий в секунду")
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        replayer = EventReplayer(rate=options["rate"], batch_size=options["batch_size"])
+        if options["stale"]:
+            queryset = EventReaper(replayer=replayer).get_stale_events()
+        else:
+            queryset = self._get_queryset(options)
+
+        if options["dry_run"]:
+            self.stdout.write(f"{queryset.count()} events would be replayed")
+            return
+
+        replayed = replayer.replay(queryset)
+        self.stdout.write(f"Replayed {replayed} events")
+
+    def _get_queryset(self, options):
+        queryset = Event.objects.filter(status__in=options["statuses"] or [Event.STATUS_NEW, Event.STATUS_ERROR])
+        for option, lookup in (("since", "date__gte"), ("until", "date__lt")):
+            if options[option]:
+                value = parse_datetime(options[option])
+                if value is None:
+                    raise CommandError(f"--{option}: wrong datetime format")
+                queryset = queryset.filter(**{lookup: value})
+        if options["event_types"]:
+            queryset = queryset.filter(event_type__in=options["event_types"])
+        if options["order_ids"]:
+            queryset = queryset.filter(order_id__in=options["order_ids"])
+        return queryset
@@ -0,0 +1,15 @@
+from core.metrics import counter, histogram
+
+WEBHOOK_LATENCY = histogram("webhook_request_duration_seconds", "Время обработки входящего вебхука", ["endpoint"])
+EVENT_SAVE_LATENCY = histogram("event_save_duration_seconds", "Время сохранения события с outbox")
+EVENT_PROCESSING_DELAY = histogram(
+    "event_processing_delay_seconds", "Время от получения события до начала обработки", ["event_type"]
+)
+EVENT_PROCESSING_LATENCY = histogram(
+    "event_processing_duration_seconds", "Время обработки события процессором", ["event_type"]
+)
+LOCK_WAIT = histogram("event_lock_wait_seconds", "Ожидание блокировки строки при обработке", ["lock"])
+TASK_ATTEMPTS = histogram(
+    "event_task_attempts", "Число попыток до завершения задачи", ["event_type", "result"], buckets=range(1, 12)
+)
+TASK_RETRIES = counter("event_task_retries_total", "Перезапуски задач обработки", ["event_type", "reason"])
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.17 on 2026-10-18 04:46
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventOutbox',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(max_length=64, verbose_name='тип события')),
+                ('date', models.DateTimeField(auto_now_add=True, verbose_name='Дата')),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outbox', to='events.Event', verbose_name='Событие')),
+            ],
+            options={
+                'verbose_name': 'Событие к отправке в очередь',
+                'verbose_name_plural': 'События к отправке в очередь',
+            },
+        ),
+    ]
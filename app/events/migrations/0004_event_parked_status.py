@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.17 on 2026-10-18 04:48
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0003_event_outbox_order_id'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='event',
+            name='status',
+            field=models.CharField(choices=[('new', 'Новое'), ('processed', 'Обработано'), ('error', 'Ошибка'), ('parked', 'Ожидает оплаты заказа')], default='new', max_length=10, verbose_name='Статус обработки'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['order_id', 'status'], name='events_order_status_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.17 on 2026-10-18 04:51
+from __future__ import unicode_literals
+
+import ast
+import json
+
+import core.fields
+from django.db import migrations
+
+
+def convert_data_to_json(apps, schema_editor):
+    # Раньше в data сохранялся str() от словаря, приводим такие строки к JSON
+    Event = apps.get_model('events', 'Event')
+    for pk, data in Event.objects.values_list('pk', 'data').iterator():
+        try:
+            json.loads(data)
+            continue
+        except ValueError:
+            pass
+        try:
+            value = ast.literal_eval(data)
+        except (ValueError, SyntaxError):
+            value = data
+        Event.objects.filter(pk=pk).update(data=json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=str))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0004_event_parked_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(convert_data_to_json, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='event',
+            name='data',
+            field=core.fields.PayloadField(verbose_name='Данные'),
+        ),
+    ]
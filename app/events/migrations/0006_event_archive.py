@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.17 on 2026-10-18 04:52
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0005_event_data_payload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventArchive',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider_event_id', models.CharField(max_length=255, unique=True, verbose_name='ID события провайдера')),
+                ('event_type', models.CharField(max_length=64, verbose_name='тип события')),
+                ('status', models.CharField(choices=[('new', 'Новое'), ('processed', 'Обработано'), ('error', 'Ошибка'), ('parked', 'Ожидает оплаты заказа')], max_length=10, verbose_name='Статус обработки')),
+                ('order_id', models.CharField(max_length=32, verbose_name='# заказа')),
+                ('data', models.BinaryField(verbose_name='Данные (zlib)')),
+                ('date', models.DateTimeField(verbose_name='Дата')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата архивации')),
+            ],
+            options={
+                'verbose_name': 'Архивное событие',
+                'verbose_name_plural': 'Архивные события',
+            },
+        ),
+    ]
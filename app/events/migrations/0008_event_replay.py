@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.17 on 2026-10-18 04:53
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0007_event_status_date_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='replay_count',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Количество повторных отправок'),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='replayed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата последней повторной отправки'),
+        ),
+    ]
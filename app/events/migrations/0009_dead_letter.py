@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.17 on 2026-10-18 04:57
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0008_event_replay'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeadLetter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(max_length=64, verbose_name='тип события')),
+                ('order_id', models.CharField(default='', max_length=32, verbose_name='# заказа')),
+                ('error', models.TextField(verbose_name='Последняя ошибка')),
+                ('attempts', models.PositiveIntegerField(default=1, verbose_name='Количество попыток')),
+                ('failed_at', models.DateTimeField(verbose_name='Дата последней ошибки')),
+                ('redriven_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата повторной отправки')),
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='dead_letter', to='events.Event', verbose_name='Событие')),
+            ],
+            options={
+                'verbose_name': 'Мертвое письмо',
+                'verbose_name_plural': 'Мертвые письма',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='deadletter',
+            index=models.Index(fields=['redriven_at', 'failed_at'], name='dead_letter_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deadletter',
+            index=models.Index(fields=['event_type', 'failed_at'], name='dead_letter_type_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.17 on 2026-10-18 05:36
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0009_dead_letter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='retry_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата следующей попытки'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.17 on 2026-10-18 05:37
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0010_event_retry_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventarchive',
+            name='attempts',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Количество попыток'),
+        ),
+        migrations.AddField(
+            model_name='eventarchive',
+            name='error',
+            field=models.TextField(blank=True, default='', verbose_name='Последняя ошибка'),
+        ),
+        migrations.AddField(
+            model_name='eventarchive',
+            name='failed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата последней ошибки'),
+        ),
+    ]
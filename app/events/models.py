@@ -1,15 +1,41 @@
+from datetime import timedelta
+
 from django.db import models
+from django.utils import timezone
+
+from core.fields import PayloadField
+
+
+class EventQuerySet(models.QuerySet):
+    def claim(self, limit, statuses=None, older_than=None):
+        """
+        Очередь работы поверх таблицы событий: блокирует и возвращает до limit самых старых событий
+        в статусах statuses. Строки, заблокированные другими обработчиками, пропускаются (SKIP LOCKED),
+        поэтому несколько процессов разбирают очередь без ожидания друг друга.
+        Вызывать внутри transaction.atomic, блокировки держатся до конца транзакции.
+        """
+        statuses = statuses or [self.model.STATUS_NEW]
+        queryset = self.select_for_update(skip_locked=True).filter(status__in=statuses)
+        if older_than is not None:
+            queryset = queryset.filter(date__lt=older_than)
+        return list(queryset.order_by("date", "id")[:limit])
+
+    def schedule_attempt(self, countdown):
+        """Отмечает, что задача событий отложена или ждет повтора, и когда ждать следующую попытку."""
+        return self.update(retry_at=timezone.now() + timedelta(seconds=countdown))
 
 
 class Event(models.Model):
     STATUS_NEW = "new"
     STATUS_PROCESSED = "processed"
     STATUS_ERROR = "error"
+    STATUS_PARKED = "parked"
 
     STATUS_CHOICES = (
         (STATUS_NEW, "Новое"),
         (STATUS_PROCESSED, "Обработано"),
         (STATUS_ERROR, "Ошибка"),
+        (STATUS_PARKED, "Ожидает оплаты заказа"),
     )
 
     provider_event_id = models.CharField(
@@ -23,13 +49,90 @@ class Event(models.Model):
         verbose_name="Статус обработки",
     )
     order_id = models.CharField(max_length=32, verbose_name="# заказа")
-    data = models.TextField(verbose_name="Данные")
+    data = PayloadField(verbose_name="Данные")
     date = models.DateTimeField(auto_now_add=True, verbose_name="Дата")
+    replay_count = models.PositiveSmallIntegerField(default=0, verbose_name="Количество повторных отправок")
+    replayed_at = models.DateTimeField(null=True, blank=True, verbose_name="Дата последней повторной отправки")
+    retry_at = models.DateTimeField(null=True, blank=True, verbose_name="Дата следующей попытки")
+
+    objects = EventQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Событие"
         verbose_name_plural = "События"
-        ordering = ["-date"]
+        indexes = [
+            models.Index(fields=["order_id", "status"], name="events_order_status_idx"),
+            models.Index(fields=["status", "date"], name="events_status_date_idx"),
+        ]
 
     def __str__(self):
         return f"Event ID: {self.provider_event_id} ({self.get_status_display()})"
+
+
+class EventOutbox(models.Model):
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="outbox", verbose_name="Событие")
+    event_type = models.CharField(max_length=64, verbose_name="тип события")
+    order_id = models.CharField(max_length=32, default="", verbose_name="# заказа")
+    date = models.DateTimeField(auto_now_add=True, verbose_name="Дата")
+
+    class Meta:
+        verbose_name = "Событие к отправке в очередь"
+        verbose_name_plural = "События к отправке в очередь"
+
+    def __str__(self):
+        return f"Outbox #{self.id} for event {self.event_id}"
+
+
+class EventArchive(models.Model):
+    """
+    Холодное хранилище обработанных событий, data хранится сжатым JSON. Если событие побывало
+    в DeadLetter, последняя ошибка и число попыток переносятся вместе с ним.
+    """
+
+    provider_event_id = models.CharField(max_length=255, unique=True, verbose_name="ID события провайдера")
+    event_type = models.CharField(max_length=64, verbose_name="тип события")
+    status = models.CharField(max_length=10, choices=Event.STATUS_CHOICES, verbose_name="Статус обработки")
+    order_id = models.CharField(max_length=32, verbose_name="# заказа")
+    data = models.BinaryField(verbose_name="Данные (zlib)")
+    date = models.DateTimeField(verbose_name="Дата")
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата архивации")
+    error = models.TextField(blank=True, default="", verbose_name="Последняя ошибка")
+    attempts = models.PositiveIntegerField(null=True, blank=True, verbose_name="Количество попыток")
+    failed_at = models.DateTimeField(null=True, blank=True, verbose_name="Дата последней ошибки")
+
+    class Meta:
+        verbose_name = "Архивное событие"
+        verbose_name_plural = "Архивные события"
+
+    def __str__(self):
+        return f"Archived event ID: {self.provider_event_id}"
+
+
+class DeadLetterQuerySet(models.QuerySet):
+    def pending(self):
+        return self.filter(redriven_at__isnull=True)
+
+
+class DeadLetter(models.Model):
+    """Событие, которое не удалось обработать: исчерпаны повторы или ошибка не подлежит повтору."""
+
+    event = models.OneToOneField(Event, on_delete=models.CASCADE, related_name="dead_letter", verbose_name="Событие")
+    event_type = models.CharField(max_length=64, verbose_name="тип события")
+    order_id = models.CharField(max_length=32, default="", verbose_name="# заказа")
+    error = models.TextField(verbose_name="Последняя ошибка")
+    attempts = models.PositiveIntegerField(default=1, verbose_name="Количество попыток")
+    failed_at = models.DateTimeField(verbose_name="Дата последней ошибки")
+    redriven_at = models.DateTimeField(null=True, blank=True, verbose_name="Дата повторной отправки")
+
+    objects = DeadLetterQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Мертвое письмо"
+        verbose_name_plural = "Мертвые письма"
+        indexes = [
+            models.Index(fields=["redriven_at", "failed_at"], name="dead_letter_pending_idx"),
+            models.Index(fields=["event_type", "failed_at"], name="dead_letter_type_idx"),
+        ]
+
+    def __str__(self):
+        return f"Dead letter for event {self.event_id}: {self.error[:50]}"
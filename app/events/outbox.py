@@ -0,0 +1,80 @@
+import logging
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from events.models import EventOutbox
+from events.processors import get_processor_registry
+from events.routing import get_lane_queue
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxDispatcher:
+    """Вычитывает EventOutbox пачками и публикует задачи в Celery одним соединением с брокером."""
+
+    def __init__(self, batch_size=None):
+        self.batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+
+    def dispatch(self):
+        from events.tasks import process_event
+
+        with transaction.atomic():
+            rows = list(
+                EventOutbox.objects.select_for_update(skip_locked=True)
+                .order_by("id")
+                .values_list("id", "event_id", "event_type", "order_id")[: self.batch_size]
+            )
+            if not rows:
+                return 0
+
+            with process_event.app.producer_or_acquire() as producer:
+                if settings.EVENTS_BATCH_PROCESSING:
+                    self._publish_batches(rows, producer)
+                else:
+                    for _, event_id, event_type, order_id in rows:
+                        options = self._routing_options(self._get_queue(event_type, order_id))
+                        process_event.apply_async((event_id, event_type), producer=producer, **options)
+
+            EventOutbox.objects.filter(pk__in=[row[0] for row in rows]).delete()
+
+        logger.info(f"Dispatched {len(rows)} events from outbox")
+        return len(rows)
+
+    def _publish_batches(self, rows, producer):
+        from events.batch import EventBatchProcessor
+        from events.tasks import process_event, process_events_batch
+
+        lanes = {}
+        for _, event_id, event_type, order_id in rows:
+            queue = self._get_queue(event_type, order_id)
+            if event_type in EventBatchProcessor.handlers:
+                lanes.setdefault(queue, []).append(event_id)
+            else:
+                # Процессоры из реестра - отдельной задачей, чтобы действовали лимиты и повторы их типа
+                process_event.apply_async((event_id, event_type), producer=producer, **self._routing_options(queue))
+
+        for queue, event_ids in lanes.items():
+            options = self._routing_options(queue)
+            for start in range(0, len(event_ids), settings.EVENTS_BATCH_SIZE):
+                chunk = event_ids[start : start + settings.EVENTS_BATCH_SIZE]
+                process_events_batch.apply_async((chunk,), producer=producer, **options)
+
+    @staticmethod
+    def _get_queue(event_type, order_id):
+        # Своя очередь типа важнее полосы заказа: тяжелые типы не занимают воркеры полос
+        return get_processor_registry().get(event_type).queue or get_lane_queue(order_id)
+
+    @staticmethod
+    def _routing_options(queue):
+        return {"queue": queue} if queue else {}
+
+    def run(self, interval=None, iterations=None):
+        interval = settings.OUTBOX_POLL_INTERVAL if interval is None else interval
+        iteration = 0
+        while iterations is None or iteration < iterations:
+            iteration += 1
+            # Полная пачка значит, что в outbox еще есть события: забираем следующую без паузы
+            if self.dispatch() < self.batch_size:
+                time.sleep(interval)
@@ -0,0 +1,36 @@
+import logging
+
+from events.models import Event, EventOutbox
+
+logger = logging.getLogger(__name__)
+
+
+def park_event(event):
+    """Откладывает событие, которое нельзя обработать до прихода charge по тому же заказу."""
+    event.status = Event.STATUS_PARKED
+    event.save(update_fields=["status"])
+    logger.info(f"Event {event.provider_event_id} is parked until order {event.order_id} is paid")
+
+
+def release_parked_events(order_ids):
+    """
+    Возвращает отложенные события заказов в работу: переводит их в NEW и кладет в outbox в той же
+    транзакции, что и обработка charge. Вызывается только после успешной оплаты заказа.
+    """
+    parked = list(
+        Event.objects.filter(order_id__in=[str(order_id) for order_id in order_ids], status=Event.STATUS_PARKED)
+        .order_by("id")
+        .values_list("id", "event_type", "order_id")
+    )
+    if not parked:
+        return 0
+
+    Event.objects.filter(pk__in=[event_id for event_id, _, _ in parked]).update(status=Event.STATUS_NEW)
+    EventOutbox.objects.bulk_create(
+        [
+            EventOutbox(event_id=event_id, event_type=event_type, order_id=order_id)
+            for event_id, event_type, order_id in parked
+        ]
+    )
+    logger.info(f"Released {len(parked)} parked events for orders {', '.join(map(str, order_ids))}")
+    return len(parked)
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.http.request import RawPostDataException
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+from rest_framework.utils import json
+
+
+class VerifiedJSONParser(parsers.JSONParser):
+    """
+    Разбирает тело, которое уже прочитал и подписал HMACAuthentication: один json.loads по тем же
+    байтам из request.body, без повторного чтения потока и промежуточного декодирующего StreamReader.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        request = parser_context.get("request")
+        try:
+            body = request.body if request is not None else None
+        except RawPostDataException:
+            body = None
+        if body is None:
+            return super().parse(stream, media_type, parser_context)
+
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        try:
+            parse_constant = json.strict_constant if self.strict else None
+            return json.loads(body.decode(encoding), parse_constant=parse_constant)
+        except ValueError as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
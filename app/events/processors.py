@@ -0,0 +1,134 @@
+import logging
+import random
+from fnmatch import fnmatchcase
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from core.ratelimit import SharedConcurrencyLimit, SharedRateLimit, get_shared_cache
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "stepik.event_processors"
+
+
+def iter_entry_points(group):
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:  # Python 3.7
+        import pkg_resources
+
+        return list(pkg_resources.iter_entry_points(group))
+    found = entry_points()
+    return list(found.select(group=group) if hasattr(found, "select") else found.get(group, []))
+
+
+class ProcessorLimits:
+    """Лимиты одного типа событий, общие для всех воркеров: одновременных обработок и событий в секунду."""
+
+    def __init__(self, name, concurrency=None, rate_limit=None, cache=None):
+        self.concurrency = SharedConcurrencyLimit(f"events:{name}", concurrency, cache) if concurrency else None
+        self.rate = SharedRateLimit(f"events:{name}", rate_limit, cache) if rate_limit else None
+
+    def acquire(self):
+        """Возвращает None, если обработку можно начинать, иначе (задержка в секундах, причина)."""
+        if self.concurrency is not None and not self.concurrency.try_acquire():
+            return settings.BASE_DELAY + random.uniform(0, 1), "concurrency_limit"
+        if self.rate is not None:
+            wait = self.rate.try_acquire()
+            if wait:
+                self.release()
+                return wait + random.uniform(0, 1), "rate_limit"
+        return None
+
+    def release(self):
+        if self.concurrency is not None:
+            self.concurrency.release()
+
+
+class ProcessorSpec:
+    """
+    Процессор типа событий: класс импортируется при первом обращении, queue - отдельная очередь
+    Celery для типа, limits - общие лимиты на одновременную обработку и частоту.
+    """
+
+    def __init__(self, name, processor, queue=None, concurrency=None, rate_limit=None, cache=None):
+        self.name = name
+        self.queue = queue
+        self.limits = ProcessorLimits(name, concurrency, rate_limit, cache)
+        self._processor = processor
+        self._processor_class = None
+
+    @property
+    def processor_class(self):
+        if self._processor_class is None:
+            if isinstance(self._processor, str):
+                self._processor_class = import_string(self._processor)
+            else:
+                self._processor_class = self._processor.load()
+        return self._processor_class
+
+
+class ProcessorRegistry:
+    """
+    Процессоры по типам событий из EVENT_PROCESSORS и entry point группы stepik.event_processors
+    (имя - тип события или шаблон вида payout.*). Настройки дополняют и переопределяют entry points.
+    Тип без процессора получает EVENT_PROCESSOR_DEFAULT.
+    """
+
+    def __init__(self, processors, default, cache=None):
+        self.specs = {name: self._build(name, options, cache) for name, options in processors.items()}
+        self.default = self._build("default", default, cache)
+        self._patterns = [spec for name, spec in self.specs.items() if any(char in name for char in "*?[")]
+        self._resolved = {}
+
+    @classmethod
+    def from_settings(cls):
+        processors = {
+            entry_point.name: {"processor": entry_point} for entry_point in iter_entry_points(ENTRY_POINT_GROUP)
+        }
+        for name, options in settings.EVENT_PROCESSORS.items():
+            processors[name] = dict(processors.get(name, {}), **options)
+        return cls(processors, settings.EVENT_PROCESSOR_DEFAULT, get_shared_cache(settings.EVENT_PROCESSOR_CACHE_ALIAS))
+
+    @staticmethod
+    def _build(name, options, cache):
+        if not options.get("processor"):
+            raise ImproperlyConfigured(f"Event processor for {name!r} is not configured")
+        return ProcessorSpec(name, cache=cache, **options)
+
+    @property
+    def event_types(self):
+        """Типы событий, зарегистрированные без шаблонов."""
+        return [name for name, spec in self.specs.items() if spec not in self._patterns]
+
+    def get(self, event_type):
+        spec = self._resolved.get(event_type)
+        if spec is None:
+            spec = self.specs.get(event_type)
+            if spec is None:
+                spec = next((spec for spec in self._patterns if fnmatchcase(event_type, spec.name)), self.default)
+            # Неизвестные типы не запоминаем: их набор не ограничен
+            if spec is not self.default:
+                self._resolved[event_type] = spec
+        return spec
+
+
+_registry = None
+
+
+def get_processor_registry():
+    global _registry
+    if _registry is None:
+        _registry = ProcessorRegistry.from_settings()
+    return _registry
+
+
+@receiver(setting_changed)
+def reset_processor_registry(setting, **kwargs):
+    global _registry
+    if setting.startswith("EVENT_PROCESSOR"):
+        _registry = None
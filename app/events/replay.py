@@ -0,0 +1,86 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.ratelimit import TokenBucket
+from events.models import DeadLetter, Event, EventOutbox
+
+logger = logging.getLogger(__name__)
+
+
+class EventReplayer:
+    """
+    Повторно ставит события в очередь через outbox пачками с ограничением скорости (событий в секунду),
+    чтобы разбор накопившегося хвоста не перегрузил воркеры и БД.
+    """
+
+    def __init__(self, rate=None, batch_size=None, bucket=None):
+        self.batch_size = batch_size or settings.REPLAY_BATCH_SIZE
+        rate = rate or settings.REPLAY_RATE
+        self.bucket = bucket or TokenBucket(rate, capacity=max(rate, self.batch_size))
+
+    def replay(self, queryset):
+        replayed = 0
+        last_pk = 0
+        pending = EventOutbox.objects.values("event_id")
+        while True:
+            self.bucket.acquire(self.batch_size)
+            with transaction.atomic():
+                events = list(
+                    queryset.select_for_update(skip_locked=True)
+                    .filter(pk__gt=last_pk)
+                    .exclude(pk__in=pending)
+                    .order_by("pk")
+                    .values_list("pk", "event_type", "order_id")[: self.batch_size]
+                )
+                if not events:
+                    break
+                self._enqueue(events)
+
+            replayed += len(events)
+            last_pk = events[-1][0]
+            if len(events) < self.batch_size:
+                break
+
+        logger.info(f"Replayed {replayed} events")
+        return replayed
+
+    def _enqueue(self, events):
+        Event.objects.filter(pk__in=[pk for pk, _, _ in events]).update(
+            status=Event.STATUS_NEW, replay_count=F("replay_count") + 1, replayed_at=timezone.now()
+        )
+        EventOutbox.objects.bulk_create(
+            [EventOutbox(event_id=pk, event_type=event_type, order_id=order_id) for pk, event_type, order_id in events]
+        )
+
+
+class EventReaper:
+    """
+    Находит события, которые застряли в NEW или ERROR дольше stale_after секунд (например, потерялась
+    задача в брокере), и переотправляет их. Событие переотправляется не чаще раза в stale_after
+    и не больше max_replays раз. Отложенные и ждущие повтора задачи отмечают в retry_at время
+    следующей попытки, такое событие считается застрявшим только через stale_after после него. События из очереди мертвых писем переотправляются только командой
+    redrive_dead_letters.
+    """
+
+    def __init__(self, stale_after=None, max_replays=None, replayer=None):
+        self.stale_after = settings.REAPER_STALE_AFTER if stale_after is None else stale_after
+        self.max_replays = settings.REAPER_MAX_REPLAYS if max_replays is None else max_replays
+        self.replayer = replayer or EventReplayer()
+
+    def get_stale_events(self):
+        cutoff = timezone.now() - timedelta(seconds=self.stale_after)
+        return Event.objects.filter(
+            Q(replayed_at__isnull=True) | Q(replayed_at__lt=cutoff),
+            Q(retry_at__isnull=True) | Q(retry_at__lt=cutoff),
+            status__in=[Event.STATUS_NEW, Event.STATUS_ERROR],
+            date__lt=cutoff,
+            replay_count__lt=self.max_replays,
+        ).exclude(pk__in=DeadLetter.objects.pending().values("event_id"))
+
+    def reap(self):
+        return self.replayer.replay(self.get_stale_events())
@@ -0,0 +1,19 @@
+import zlib
+
+from django.conf import settings
+
+
+def get_lane(order_id):
+    """Номер полосы обработки для заказа: стабильный хэш, одинаковый во всех процессах."""
+    return zlib.crc32(str(order_id).encode("utf-8")) % settings.EVENT_LANES
+
+
+def get_lane_queue(order_id):
+    """
+    Очередь Celery для событий заказа. Каждую очередь слушает один воркер с concurrency=1,
+    поэтому события одного заказа обрабатываются последовательно и не ждут блокировок друг друга.
+    Если полосы выключены (EVENT_LANES = 0), возвращает None и задачи идут в очередь по умолчанию.
+    """
+    if not settings.EVENT_LANES:
+        return None
+    return f"{settings.EVENT_LANE_QUEUE_PREFIX}{get_lane(order_id)}"
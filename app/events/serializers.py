@@ -1,9 +1,16 @@
 from rest_framework import serializers
 
 
+class ParsedJSONField(serializers.JSONField):
+    """Значение уже разобрано парсером запроса, проверять его повторной сериализацией в JSON не нужно."""
+
+    def to_internal_value(self, data):
+        return data
+
+
 class EventSerializer(serializers.Serializer):
     event_id = serializers.CharField(max_length=255, required=True, label="ID События")
     event_type = serializers.CharField(max_length=50, required=True, label="Тип События")
     date = serializers.DateTimeField(label="Дата События")
     order_id = serializers.CharField(max_length=32, required=True, label="# заказа")
-    data = serializers.JSONField(required=True, label="Данные (Payload)")
+    data = ParsedJSONField(required=True, label="Данные (Payload)")
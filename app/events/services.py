@@ -2,33 +2,67 @@ import logging
 from abc import ABC, abstractmethod
 
 from django.db import IntegrityError, transaction
+from django.utils import timezone
 
-from events.models import Event
+from core.db import insert_ignore
+from events.dedup import get_seen_events
+from events.metrics import EVENT_PROCESSING_DELAY, EVENT_PROCESSING_LATENCY, EVENT_SAVE_LATENCY, LOCK_WAIT
+from events.models import Event, EventArchive, EventOutbox
+from events.parking import park_event, release_parked_events
+from events.processors import get_processor_registry
 from finances.services import FinanceServices
 from orders.models import Order
+from orders.state_machine import OrderStateMachine
+from orders.status import get_order_status_cache
 
 logger = logging.getLogger(__name__)
 
 
 class BaseEvent(ABC):
+    """
+    Событие и заказ читаются без блокировок: статусы меняются условными UPDATE
+    (OrderStateMachine и _set_event_status), побочные эффекты - только если переход применился.
+    downstream - хост внешнего сервиса (или его URL), который вызывает процессор: задача проверяет его предохранитель
+    до вызова. Порт и схема не учитываются, как и у предохранителя по URL ошибки.
+    """
+
+    downstream = None
+
     @staticmethod
     def get_event(event_id):
         try:
-            event = Event.objects.select_for_update().get(pk=event_id)
+            event = Event.objects.get(pk=event_id)
         except Event.DoesNotExist:
             logger.error(f"Event with id {event_id} does not exist")
         else:
+            EVENT_PROCESSING_DELAY.observe((timezone.now() - event.date).total_seconds(), event_type=event.event_type)
             return event
 
     @staticmethod
     def _get_order(order_id):
         try:
-            order = Order.objects.select_for_update().get(pk=order_id)
+            order = Order.objects.get(pk=order_id)
         except Order.DoesNotExist:
             logger.error(f"Order with id {order_id} does not exist")
         else:
             return order
 
+    @staticmethod
+    def _set_event_status(event, status):
+        with LOCK_WAIT.time(lock="event"):
+            applied = Event.objects.filter(pk=event.pk, status=event.status).update(status=status) == 1
+        if applied:
+            event.status = status
+            if status == Event.STATUS_PROCESSED:
+                # Обработанное событие меняет статус, суммы или последнее событие заказа
+                get_order_status_cache().invalidate([event.order_id])
+        return applied
+
+    @staticmethod
+    def _transition_order(transition, order):
+        with LOCK_WAIT.time(lock="order"):
+            return transition(order)
+
     def save(self, event):
         # event = Event.objects.create(**event)
         # return event
@@ -46,17 +80,15 @@ class ChargeEvent(BaseEvent):
         if event:
             order = self._get_order(event.order_id)
             if order:
-                if order.status == Order.STATUS_NEW:
-                    order.status = Order.STATUS_PAID
-                    order.save()
-                    event.status = Event.STATUS_PROCESSED
-                    event.save()
+                if order.status == Order.STATUS_NEW and self._transition_order(OrderStateMachine.pay, order):
+                    self._set_event_status(event, Event.STATUS_PROCESSED)
                     finance_service = FinanceServices()
                     # Amount берем из order чтобы упростить задачу. Будем считать,
                     # что amount не будет отличаться в заказе, событии и финансах.
                     # Хорошо бы конечно проверять amount
                     finance_service.add_charge(order.customer_id, order.id, order.amount)
                     logger.info(f"Order {order.id} is paid")
+                    release_parked_events([order.id])
                     return
                 else:
                     logger.error(
@@ -72,8 +104,7 @@ class DisputeOpenedEvent(BaseEvent):
     def process(self, event_id):
         event = self.get_event(event_id)
         if event:
-            event.status = Event.STATUS_PROCESSED
-            event.save()
+            self._set_event_status(event, Event.STATUS_PROCESSED)
             logger.info(f"Dispute opened for order {event.order_id}")
 
 
@@ -84,17 +115,23 @@ class RefundCreatedEvent(BaseEvent):
         if event:
             order = self._get_order(event.order_id)
             if order:
-                if order.status == Order.STATUS_PAID:
-                    event.status = Event.STATUS_PROCESSED
-                    event.save()
-                    # Считаем что если пришел refund то заказ отменяется.
-                    # Дальше надо запустить задачи по отмене заказа
-                    order.status = Order.STATUS_CANCELED
-                    order.save()
+                # Считаем что если пришел refund то заказ отменяется.
+                # Дальше надо запустить задачи по отмене заказа
+                if order.status == Order.STATUS_PAID and not FinanceServices.can_refund(order.id, order.amount):
+                    # Как и в пакетной обработке: заказ не отменяем, событие остается необработанным
+                    logger.error(
+                        f"Can't make refund. Receive event {event.provider_event_id} REFUND, "
+                        f"but refund for order {order.id} exceeds charged amount"
+                    )
+                elif order.status == Order.STATUS_PAID and self._transition_order(OrderStateMachine.cancel, order):
+                    self._set_event_status(event, Event.STATUS_PROCESSED)
                     finance_service = FinanceServices()
                     # Ддя упрощения считаем, что возвращаем всю сумму заказа
                     finance_service.make_refund(order.customer_id, order.id, order.amount)
                     logger.info(f"Order {order.id} is refunded")
+                elif order.status == Order.STATUS_NEW:
+                    # Refund пришел раньше charge: ждем оплату, ChargeEvent вернет событие в очередь
+                    self._park(event, order)
                 else:
                     logger.error(
                         f"Can't make refund. Receive event {event.provider_event_id} REFUND, "
@@ -103,20 +140,39 @@ class RefundCreatedEvent(BaseEvent):
             else:
                 logger.error(f"Event {event.provider_event_id} can't be processed. Order {event.order_id} not found")
 
+    @staticmethod
+    def _park(event, order):
+        park_event(event)
+        # Статус заказа прочитан без блокировки: charge, оплативший заказ до парковки, это событие
+        # уже не вернет. hold подтверждает NEW и держит строку заказа до коммита, так что следующий
+        # charge дождется парковки; если заказ уже оплачен, возвращаем событие в очередь сами.
+        if not OrderStateMachine.hold(order, Order.STATUS_NEW):
+            release_parked_events([order.pk])
+
+
+class UnhandledEvent(BaseEvent):
+    """Приемник для типов без процессора: событие закрывается одним UPDATE и позже уходит в архив."""
+
+    def process(self, event_id):
+        if Event.objects.filter(pk=event_id, status__in=[Event.STATUS_NEW, Event.STATUS_ERROR]).update(
+            status=Event.STATUS_PROCESSED
+        ):
+            logger.info(f"Event {event_id} has no processor and is skipped")
+
 
 class EventService:
-    event_processors = {
-        "charge.succeeded": ChargeEvent,
-        "dispute.opened": DisputeOpenedEvent,
-        "refund.created": RefundCreatedEvent,
-    }
+    STATUS_ACCEPTED = "accepted"
+    STATUS_DUPLICATE = "duplicate"
 
+    @EVENT_SAVE_LATENCY.time()
     @transaction.atomic
     def save_event(self, provider_event_id, event_type, order_id, data):
-        from events.tasks import process_event
+        if EventArchive.objects.filter(provider_event_id=provider_event_id).exists():
+            logger.error(f"Event with id {provider_event_id} already exists in archive")
+            return False
 
         try:
-            Event.objects.create(
+            event = Event.objects.create(
                 provider_event_id=provider_event_id,
                 event_type=event_type,
                 order_id=order_id,
@@ -124,9 +180,97 @@ class EventService:
             )
         except IntegrityError:
             logger.error(f"Event with id {provider_event_id} already exists")
+            return False
         else:
-            transaction.on_commit(lambda: process_event.delay(provider_event_id, event_type))
+            # Публикацией в очередь занимается OutboxDispatcher, запрос не ждет брокер
+            EventOutbox.objects.create(event=event, event_type=event_type, order_id=order_id)
+            return True
+
+    def receive_event(self, provider_event_id, event_type, order_id, data):
+        seen_events = get_seen_events()
+        if seen_events.contains(provider_event_id):
+            logger.info(f"Event with id {provider_event_id} already received")
+            return False
+
+        created = self.save_event(provider_event_id, event_type, order_id, data)
+        seen_events.add(provider_event_id)
+        return created
+
+    def receive_events(self, events):
+        seen_events = get_seen_events()
+        seen = seen_events.filter_seen([event["provider_event_id"] for event in events])
+
+        fresh_events = [event for event in events if event["provider_event_id"] not in seen]
+        fresh_statuses = iter(self.save_events(fresh_events))
+        seen_events.add_many(list({event["provider_event_id"] for event in fresh_events}))
+
+        return [
+            (
+                (event["provider_event_id"], self.STATUS_DUPLICATE)
+                if event["provider_event_id"] in seen
+                else next(fresh_statuses)
+            )
+            for event in events
+        ]
+
+    @transaction.atomic
+    def save_events(self, events):
+        archived = set(
+            EventArchive.objects.filter(
+                provider_event_id__in=[event["provider_event_id"] for event in events]
+            ).values_list("provider_event_id", flat=True)
+        )
+        unique_events = {}
+        for event in events:
+            if event["provider_event_id"] not in archived:
+                unique_events.setdefault(event["provider_event_id"], event)
+
+        created = insert_ignore(
+            Event,
+            [Event(**event) for event in unique_events.values()],
+            conflict_fields=["provider_event_id"],
+            returning=["id", "provider_event_id"],
+        )
+        EventOutbox.objects.bulk_create(
+            [
+                EventOutbox(
+                    event_id=event_id,
+                    event_type=unique_events[provider_event_id]["event_type"],
+                    order_id=unique_events[provider_event_id]["order_id"],
+                )
+                for event_id, provider_event_id in created
+            ]
+        )
+
+        statuses = []
+        not_reported = {provider_event_id for _, provider_event_id in created}
+        for event in events:
+            provider_event_id = event["provider_event_id"]
+            if provider_event_id in not_reported:
+                statuses.append((provider_event_id, self.STATUS_ACCEPTED))
+                not_reported.discard(provider_event_id)
+            else:
+                statuses.append((provider_event_id, self.STATUS_DUPLICATE))
+
+        duplicates = sum(1 for _, event_status in statuses if event_status == self.STATUS_DUPLICATE)
+        if duplicates:
+            logger.info(f"Batch of {len(events)} events contains {duplicates} duplicates")
+        return statuses
+
+    @staticmethod
+    def find_event(provider_event_id):
+        """Ищет событие в горячей таблице, затем в архиве."""
+        event = Event.objects.filter(provider_event_id=provider_event_id).first()
+        if event is None:
+            event = EventArchive.objects.filter(provider_event_id=provider_event_id).first()
+        return event
+
+    def process_event(self, event_id, event_type):
+        processor = get_processor_registry().get(event_type).processor_class()
+        with EVENT_PROCESSING_LATENCY.time(event_type=event_type):
+            processor.process(event_id)
+
+    def process_events(self, event_ids):
+        from events.batch import EventBatchProcessor
 
-    def process_event(self, provider_event_id, event_type):
-        processor = self.event_processors[event_type]()
-        processor.process(provider_event_id)
+        return EventBatchProcessor().process(event_ids)
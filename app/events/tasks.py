@@ -1,29 +1,128 @@
 import logging
-from urllib.error import HTTPError
+from urllib.error import HTTPError, URLError
 
 from celery import shared_task
 from django.conf import settings
 
-from core.utils import calculate_delay
+from core.retry import CircuitBreaker, get_retry_countdown, parse_retry_after
+from events.archive import EventArchiver
+from events.deadletter import record_dead_letter
+from events.metrics import TASK_ATTEMPTS, TASK_RETRIES
+from events.models import Event
+from events.outbox import OutboxDispatcher
+from events.processors import get_processor_registry
+from events.replay import EventReaper
 from events.services import EventService
 
 logger = logging.getLogger(__name__)
 
 
+def defer_task(task, event_id, event_type, countdown, reason):
+    """
+    Откладывает задачу, не тратя попыток: сообщение публикуется заново с тем же числом retries,
+    а ожидания считаются отдельно в kwargs deferrals. После MAX_DEFERRALS ожиданий событие
+    уходит в dead letters, а не пропадает.
+    """
+    kwargs = dict(task.request.kwargs or {})
+    deferrals = kwargs.get("deferrals", 0) + 1
+    if deferrals > settings.MAX_DEFERRALS:
+        record_dead_letter(event_id, f"Deferred {settings.MAX_DEFERRALS} times: {reason}", task.request.retries + 1)
+        TASK_ATTEMPTS.observe(task.request.retries + 1, event_type=event_type, result="dead_letter")
+        return
+    logger.info(f"Таска {task.request.id} отложена на {countdown:.2f} сек.: {reason}")
+    TASK_RETRIES.inc(event_type=event_type, reason=reason)
+    Event.objects.filter(pk=event_id).schedule_attempt(countdown)
+    kwargs["deferrals"] = deferrals
+    task.signature_from_request(kwargs=kwargs, countdown=countdown).apply_async()
+
+
+def retry_downstream_error(task, event_id, event_type, url, description, reason, retry_after=None):
+    """
+    Учитывает временную ошибку downstream в его предохранителе и перезапускает задачу, пока есть попытки.
+    Возвращает управление, только если попытки исчерпаны.
+    """
+    breaker = CircuitBreaker.for_url(url) if url else None
+    if breaker is not None:
+        breaker.record_failure(retry_after)
+
+    current_retry_count = task.request.retries + 1
+    if current_retry_count > settings.MAX_RETRIES:
+        return
+    countdown = get_retry_countdown(current_retry_count, retry_after, breaker)
+    logger.warning(
+        f"{description}. Таска {task.request.id} будет перезапущена через {countdown:.2f} сек. "
+        f"Попытка {current_retry_count} из {settings.MAX_RETRIES}."
+    )
+    TASK_RETRIES.inc(event_type=event_type, reason=reason)
+    Event.objects.filter(pk=event_id).schedule_attempt(countdown)
+    kwargs = dict(task.request.kwargs or {})
+    if breaker is not None:
+        kwargs["downstream"] = breaker.name
+    raise task.retry(countdown=countdown, kwargs=kwargs)
+
+
 @shared_task(bind=True, max_retries=settings.MAX_RETRIES)
-def process_event(self, provider_event_id, event_type):
+def process_event(self, event_id, event_type, downstream=None, deferrals=0):
+    # Предохранитель проверяем и на первой попытке: downstream объявляет процессор, повторы несут его в kwargs
+    downstream = downstream or get_processor_registry().get(event_type).processor_class.downstream
+    breaker = CircuitBreaker(downstream) if downstream else None
+    if breaker is not None and breaker.open_for():
+        countdown = get_retry_countdown(self.request.retries, breaker=breaker)
+        return defer_task(self, event_id, event_type, countdown, "circuit_open")
+
+    limits = get_processor_registry().get(event_type).limits
+    delayed = limits.acquire()
+    if delayed is not None:
+        # ожидание слота тоже не тратит попытки
+        countdown, reason = delayed
+        return defer_task(self, event_id, event_type, countdown, reason)
+
     try:
         service = EventService()
-        service.process_event(provider_event_id, event_type)
+        service.process_event(event_id, event_type)
     except HTTPError as exc:
-        status_code = exc.code
-        if status_code == 429 or 500 <= status_code < 600:
-            current_retry_count = self.request.retries + 1
+        if exc.code == 429 or 500 <= exc.code < 600:
+            retry_after = parse_retry_after(exc.hdrs.get("Retry-After")) if exc.hdrs else None
+            retry_downstream_error(
+                self, event_id, event_type, exc.filename, f"Ошибка HTTP {exc.code}", f"http_{exc.code}", retry_after
+            )
 
-            countdown = calculate_delay(current_retry_count)
+        record_dead_letter(event_id, f"HTTP {exc.code}: {exc.reason}", self.request.retries + 1)
+        TASK_ATTEMPTS.observe(self.request.retries + 1, event_type=event_type, result="dead_letter")
+    except URLError as exc:
+        # Таймаут, отказ в соединении и прочие сетевые сбои так же временны, как 5xx
+        retry_downstream_error(self, event_id, event_type, exc.filename, f"Сетевая ошибка ({exc.reason})", "network")
 
-            logger.warning(
-                f"Ошибка HTTP {status_code}. Таска {self.request.id} будет перезапущена через {countdown:.2f} сек. "
-                f"Попытка {current_retry_count} из {settings.MAX_RETRIES}."
-            )
-            raise self.retry(countdown=countdown)
+        record_dead_letter(event_id, f"Network error: {exc.reason}", self.request.retries + 1)
+        TASK_ATTEMPTS.observe(self.request.retries + 1, event_type=event_type, result="dead_letter")
+    except Exception as exc:
+        record_dead_letter(event_id, repr(exc), self.request.retries + 1)
+        TASK_ATTEMPTS.observe(self.request.retries + 1, event_type=event_type, result="dead_letter")
+        raise
+    else:
+        if breaker is not None:
+            breaker.record_success()
+        TASK_ATTEMPTS.observe(self.request.retries + 1, event_type=event_type, result="success")
+    finally:
+        limits.release()
+
+
+@shared_task
+def process_events_batch(event_ids):
+    service = EventService()
+    return len(service.process_events(event_ids))
+
+
+@shared_task
+def dispatch_outbox():
+    return OutboxDispatcher().dispatch()
+
+
+@shared_task
+def archive_events():
+    return EventArchiver().archive()
+
+
+@shared_task
+def reap_stale_events():
+    return EventReaper().reap()
@@ -1,17 +1,24 @@
 import json
 
 import pytest
-from django.conf import settings
 from rest_framework.test import APIRequestFactory
 
+from events.dedup import get_seen_events
 from events.models import Event
 
 
 @pytest.fixture(autouse=True)
-def setup_settings():
+def setup_settings(settings):
     settings.HMAC_SECRET_KEY = "test_secret_key_12345"
 
 
+@pytest.fixture(autouse=True)
+def clear_seen_events():
+    get_seen_events().clear()
+    yield
+    get_seen_events().clear()
+
+
 @pytest.fixture
 def factory():
     return APIRequestFactory()
@@ -29,6 +36,21 @@ def valid_payload():
     return json.dumps(data).encode("utf-8")
 
 
+@pytest.fixture
+def valid_batch_payload():
+    data = [
+        {
+            "event_id": f"batch-{i}",
+            "event_type": "charge.succeeded",
+            "order_id": f"provider-{i}",
+            "date": "2020-12-01 01:02:03",
+            "data": {"note": "some data"},
+        }
+        for i in range(3)
+    ]
+    return json.dumps(data).encode("utf-8")
+
+
 @pytest.fixture
 def create_event(db):
     def _create_event(provider_event_id="test-event-1", order_id="100", status=Event.STATUS_NEW):
@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from events.archive import EventArchiver, decompress_data
+from events.deadletter import record_dead_letter
+from events.models import DeadLetter, Event, EventArchive
+from events.services import EventService
+
+
+@pytest.fixture
+def create_old_event(create_event):
+    def _create_old_event(provider_event_id, status=Event.STATUS_PROCESSED, days=40):
+        event = create_event(provider_event_id=provider_event_id, status=status)
+        Event.objects.filter(pk=event.pk).update(
+            date=timezone.now() - timedelta(days=days), data={"event": provider_event_id}
+        )
+        return event
+
+    return _create_old_event
+
+
+@pytest.mark.django_db
+class TestEventArchiver:
+    def test_archive_moves_old_processed_events(self, create_old_event):
+        create_old_event("old-1")
+        create_old_event("old-2")
+        create_old_event("old-new", status=Event.STATUS_NEW)
+        create_old_event("recent", days=1)
+
+        archived = EventArchiver(days=30, batch_size=1).archive()
+
+        assert archived == 2
+        assert set(Event.objects.values_list("provider_event_id", flat=True)) == {"old-new", "recent"}
+        archive = EventArchive.objects.get(provider_event_id="old-1")
+        assert archive.status == Event.STATUS_PROCESSED
+        assert decompress_data(archive.data) == {"event": "old-1"}
+
+    def test_dead_letter_is_archived_with_event(self, create_old_event):
+        redriven = create_old_event("redriven")
+        create_old_event("clean")
+        record_dead_letter(redriven.pk, "HTTP 503: Unavailable", 11)
+        # После redrive событие обработано, и его DeadLetter удалится вместе с ним
+        Event.objects.filter(pk=redriven.pk).update(status=Event.STATUS_PROCESSED)
+
+        assert EventArchiver(days=30).archive() == 2
+
+        assert not DeadLetter.objects.exists()
+        archive = EventArchive.objects.get(provider_event_id="redriven")
+        assert (archive.error, archive.attempts) == ("HTTP 503: Unavailable", 11)
+        assert archive.failed_at is not None
+        clean = EventArchive.objects.get(provider_event_id="clean")
+        assert (clean.error, clean.attempts, clean.failed_at) == ("", None, None)
+
+    def test_find_event_looks_in_both_tiers(self, create_old_event):
+        create_old_event("old-1")
+        create_old_event("recent", days=1)
+        EventArchiver(days=30).archive()
+
+        assert isinstance(EventService.find_event("old-1"), EventArchive)
+        assert isinstance(EventService.find_event("recent"), Event)
+        assert EventService.find_event("missing") is None
+
+    def test_archived_event_is_duplicate_on_ingest(self, create_old_event):
+        create_old_event("old-1")
+        EventArchiver(days=30).archive()
+        event_data = {"event_type": "charge.succeeded", "order_id": "1", "data": {}}
+
+        assert EventService().save_event(provider_event_id="old-1", **event_data) is False
+        assert EventService().save_events([{"provider_event_id": "old-1", **event_data}]) == [
+            ("old-1", EventService.STATUS_DUPLICATE)
+        ]
+        assert not Event.objects.filter(provider_event_id="old-1").exists()
+
+
+def test_archive_task_is_scheduled(settings):
+    from events.tasks import archive_events
+
+    assert settings.CELERY_BEAT_SCHEDULE["archive-events"]["task"] == archive_events.name
@@ -0,0 +1,147 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+from django.conf import settings
+
+from events.asgi import AsyncIngestApplication
+from events.models import Event
+from events.tests.test_authentication import generate_hmac_signature
+
+
+async def request(app, body=b"", method="POST", path="/v1/webhooks/payment", chunk_size=None, **headers):
+    chunk_size = chunk_size or max(len(body), 1)
+    messages = [
+        {"type": "http.request", "body": body[i : i + chunk_size], "more_body": i + chunk_size < len(body)}
+        for i in range(0, max(len(body), 1), chunk_size)
+    ]
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "headers": [(b"content-length", str(len(body)).encode())]
+        + [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    }
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return sent[0]["status"], json.loads(sent[1]["body"].decode("utf-8"))
+
+
+def call_app(app, body=b"", **kwargs):
+    return asyncio.run(request(app, body, **kwargs))
+
+
+@pytest.fixture
+def app():
+    app = AsyncIngestApplication(executor=ThreadPoolExecutor(max_workers=4))
+    yield app
+    app.executor.shutdown()
+
+
+# Запись идет из потоков пула со своими соединениями, поэтому тесты с БД - транзакционные
+@pytest.mark.django_db(transaction=True)
+class TestAsyncIngestApplication:
+    def test_valid_signature(self, app, valid_payload):
+        signature = generate_hmac_signature(valid_payload, settings.HMAC_SECRET_KEY)
+
+        status, response = call_app(app, valid_payload, x_hmac_signature=signature)
+
+        assert status == 200
+        assert response == {"message": "Event received.", "event_id": "test-123"}
+        assert Event.objects.get(provider_event_id="test-123").event_type == "order_created"
+
+    def test_body_is_signed_by_chunks(self, app, valid_payload):
+        signature = generate_hmac_signature(valid_payload, settings.HMAC_SECRET_KEY)
+
+        status, _ = call_app(app, valid_payload, chunk_size=7, x_hmac_signature=signature)
+
+        assert status == 200
+
+    @pytest.mark.parametrize("signature", ["", "incorrect_signature"])
+    def test_invalid_signature(self, app, valid_payload, signature):
+        status, _ = call_app(app, valid_payload, x_hmac_signature=signature)
+
+        assert status == 401
+        assert Event.objects.count() == 0
+
+    def test_body_size_is_unlimited_without_setting(self, app, valid_payload, settings):
+        settings.DATA_UPLOAD_MAX_MEMORY_SIZE = None
+        signature = generate_hmac_signature(valid_payload, settings.HMAC_SECRET_KEY)
+
+        status, _ = call_app(app, valid_payload, chunk_size=7, x_hmac_signature=signature)
+
+        assert status == 200
+
+    def test_duplicate_is_saved_once(self, app, valid_payload):
+        signature = generate_hmac_signature(valid_payload, settings.HMAC_SECRET_KEY)
+
+        for _ in range(2):
+            status, _ = call_app(app, valid_payload, x_hmac_signature=signature)
+            assert status == 200
+
+        assert Event.objects.count() == 1
+
+
+class TestAsyncIngestRouting:
+    def test_too_large_body_without_content_length(self, app, valid_payload, settings):
+        settings.DATA_UPLOAD_MAX_MEMORY_SIZE = 10
+
+        async def receive():
+            return {"type": "http.request", "body": valid_payload, "more_body": False}
+
+        async def send(message):
+            sent.append(message)
+
+        sent = []
+        scope = {"type": "http", "method": "POST", "path": "/v1/webhooks/payment", "headers": []}
+        with patch.object(app.ingest, "start"):
+            asyncio.run(app(scope, receive, send))
+
+        assert sent[0]["status"] == 413
+
+    def test_wrong_method_and_path(self, app):
+        assert call_app(app, method="GET")[0] == 405
+        assert call_app(app, path="/v1/webhooks/other")[0] == 404
+
+    def test_requests_are_saved_concurrently(self, app, valid_payload):
+        # Все запросы должны одновременно дойти до записи: иначе барьер не дождется участников
+        barrier = threading.Barrier(4, timeout=5)
+        signature = generate_hmac_signature(valid_payload, settings.HMAC_SECRET_KEY)
+
+        async def burst():
+            return await asyncio.gather(*(request(app, valid_payload, x_hmac_signature=signature) for _ in range(4)))
+
+        def save(event):
+            barrier.wait()
+            return {"event_id": event["event_id"]}
+
+        with patch.object(app.ingest, "save", side_effect=save):
+            results = asyncio.run(burst())
+
+        assert [status for status, _ in results] == [200] * 4
+
+    def test_lifespan_shuts_down_executor(self, app):
+        messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        executor = app.executor
+        asyncio.run(app({"type": "lifespan"}, receive, send))
+
+        assert [message["type"] for message in sent] == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+        assert executor._shutdown
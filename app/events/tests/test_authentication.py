@@ -53,6 +53,51 @@ class TestHMACAuthentication:
 
         assert "verification failed" in str(exc_info.value)
 
+    def test_authentication_with_provider_key_id(self, factory, valid_payload, settings):
+        settings.HMAC_PROVIDER_KEYS = {"adyen": {"2024-01": "old_secret", "2024-06": "new_secret"}}
+        signature = generate_hmac_signature(valid_payload, "old_secret")
+        request = factory.post(
+            self._get_path(),
+            data=valid_payload,
+            content_type="application/json",
+            HTTP_X_HMAC_SIGNATURE=signature,
+            HTTP_X_HMAC_PROVIDER="adyen",
+            HTTP_X_HMAC_KEY_ID="2024-01",
+        )
+
+        assert self.auth.authenticate(request) == (None, None)
+
+    def test_failed_authentication_with_unknown_key_id(self, factory, valid_payload, settings):
+        settings.HMAC_PROVIDER_KEYS = {"adyen": {"2024-06": "new_secret"}}
+        request = factory.post(
+            self._get_path(),
+            data=valid_payload,
+            content_type="application/json",
+            HTTP_X_HMAC_SIGNATURE=generate_hmac_signature(valid_payload, "new_secret"),
+            HTTP_X_HMAC_PROVIDER="adyen",
+            HTTP_X_HMAC_KEY_ID="2024-01",
+        )
+
+        with pytest.raises(AuthenticationFailed) as exc_info:
+            self.auth.authenticate(request)
+
+        assert "Unknown HMAC key" in str(exc_info.value)
+
+    def test_key_id_is_required_while_provider_has_several_keys(self, factory, valid_payload, settings):
+        settings.HMAC_PROVIDER_KEYS = {"adyen": {"2024-01": "old_secret", "2024-06": "new_secret"}}
+        request = factory.post(
+            self._get_path(),
+            data=valid_payload,
+            content_type="application/json",
+            HTTP_X_HMAC_SIGNATURE=generate_hmac_signature(valid_payload, "old_secret"),
+            HTTP_X_HMAC_PROVIDER="adyen",
+        )
+
+        with pytest.raises(AuthenticationFailed) as exc_info:
+            self.auth.authenticate(request)
+
+        assert "Unknown HMAC key" in str(exc_info.value)
+
     def test_no_authentication_when_header_is_missing(self, factory):
         request = factory.post(self._get_path(), data={})
         result = self.auth.authenticate(request)
@@ -0,0 +1,119 @@
+from unittest.mock import patch
+
+import pytest
+
+from events.batch import EventBatchProcessor
+from events.models import Event, EventOutbox
+from finances.models import Operations
+from finances.services import FinanceServices
+from orders.models import Order
+
+
+@pytest.fixture
+def create_typed_event(create_event):
+    def _create_typed_event(provider_event_id, event_type, order_id):
+        event = create_event(provider_event_id=provider_event_id, order_id=order_id)
+        event.event_type = event_type
+        event.save()
+        return event
+
+    return _create_typed_event
+
+
+@pytest.mark.django_db
+class TestEventBatchProcessor:
+    def test_process_charge_and_refund_in_one_batch(self, create_order, create_typed_event):
+        paid_order = create_order(status=Order.STATUS_NEW)
+        refunded_order = create_order(status=Order.STATUS_NEW)
+        events = [
+            create_typed_event("charge-1", "charge.succeeded", paid_order.pk),
+            create_typed_event("charge-2", "charge.succeeded", refunded_order.pk),
+            create_typed_event("refund-2", "refund.created", refunded_order.pk),
+            create_typed_event("dispute-1", "dispute.opened", paid_order.pk),
+        ]
+
+        processed = EventBatchProcessor().process([event.pk for event in events])
+
+        paid_order.refresh_from_db()
+        refunded_order.refresh_from_db()
+        assert processed == [event.pk for event in events]
+        assert paid_order.status == Order.STATUS_PAID
+        assert refunded_order.status == Order.STATUS_CANCELED
+        assert set(Operations.objects.values_list("order_id", "type")) == {
+            (paid_order.pk, Operations.TYPE_CHARGE),
+            (refunded_order.pk, Operations.TYPE_CHARGE),
+            (refunded_order.pk, Operations.TYPE_REFUND),
+        }
+        assert set(Event.objects.values_list("status", flat=True)) == {Event.STATUS_PROCESSED}
+
+    def test_process_is_idempotent(self, create_order, create_typed_event):
+        order = create_order(status=Order.STATUS_NEW)
+        event = create_typed_event("charge-1", "charge.succeeded", order.pk)
+
+        EventBatchProcessor().process([event.pk])
+        assert EventBatchProcessor().process([event.pk]) == []
+
+        assert Operations.objects.count() == 1
+
+    @patch("finances.ledger.logger")
+    def test_process_skips_existing_operation(self, logger, customer, create_order, create_typed_event):
+        order = create_order(status=Order.STATUS_NEW)
+        FinanceServices.add_charge(customer.pk, order.pk, order.amount)
+        event = create_typed_event("charge-1", "charge.succeeded", order.pk)
+
+        EventBatchProcessor().process([event.pk])
+
+        order.refresh_from_db()
+        assert order.status == Order.STATUS_PAID
+        assert Operations.objects.count() == 1
+        logger.error.assert_called_once()
+
+    @patch("events.batch.logger")
+    def test_process_skips_unprocessable_events(self, logger, create_order, create_typed_event):
+        order = create_order(status=Order.STATUS_NEW)
+        events = [
+            create_typed_event("charge-x", "charge.succeeded", "ORD-404"),
+            create_typed_event("unknown-1", "payout.paid", order.pk),
+        ]
+
+        assert EventBatchProcessor().process([event.pk for event in events]) == []
+
+        order.refresh_from_db()
+        assert order.status == Order.STATUS_NEW
+        assert Event.objects.get(pk=events[0].pk).status == Event.STATUS_NEW
+        assert logger.error.call_count == 1
+        # Тип не из пачки не обрабатывается внутри нее, а возвращается в outbox отдельной задачей
+        assert Event.objects.get(pk=events[1].pk).status == Event.STATUS_NEW
+        assert list(EventOutbox.objects.values_list("event_id", "event_type")) == [(events[1].pk, "payout.paid")]
+
+    def test_plugin_failure_does_not_roll_back_batch(self, settings, create_order, create_typed_event):
+        settings.EVENT_PROCESSORS = dict(settings.EVENT_PROCESSORS, **{"payout.*": {"processor": "missing.Processor"}})
+        order = create_order(status=Order.STATUS_NEW)
+        charge = create_typed_event("charge-1", "charge.succeeded", order.pk)
+        payout = create_typed_event("payout-1", "payout.paid", order.pk)
+
+        assert EventBatchProcessor().process([charge.pk, payout.pk]) == [charge.pk]
+
+        order.refresh_from_db()
+        assert order.status == Order.STATUS_PAID
+
+    def test_refund_before_charge_is_parked_and_released(self, create_order, create_typed_event):
+        order = create_order(status=Order.STATUS_NEW)
+        refund = create_typed_event("refund-1", "refund.created", order.pk)
+
+        EventBatchProcessor().process([refund.pk])
+        refund.refresh_from_db()
+        assert refund.status == Event.STATUS_PARKED
+
+        charge = create_typed_event("charge-1", "charge.succeeded", order.pk)
+        EventBatchProcessor().process([charge.pk])
+
+        refund.refresh_from_db()
+        assert refund.status == Event.STATUS_NEW
+        assert list(EventOutbox.objects.values_list("event_id", flat=True)) == [refund.pk]
+
+        EventBatchProcessor().process([refund.pk])
+
+        order.refresh_from_db()
+        assert order.status == Order.STATUS_CANCELED
+        assert Operations.objects.filter(order=order.pk).count() == 2
@@ -0,0 +1,119 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+from urllib.error import HTTPError
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+
+from events.deadletter import record_dead_letter
+from events.models import DeadLetter, Event, EventOutbox
+from events.replay import EventReaper, EventReplayer
+from events.tasks import process_event
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+class TestRecordDeadLetter:
+    def test_record_and_update(self, create_event):
+        event = create_event(order_id="42")
+
+        record_dead_letter(event.pk, "HTTP 500: boom", 11)
+        record_dead_letter(event.pk, "HTTP 502: bad gateway", 3)
+
+        event.refresh_from_db()
+        dead_letter = DeadLetter.objects.get()
+        assert event.status == Event.STATUS_ERROR
+        assert (dead_letter.event_type, dead_letter.order_id) == (event.event_type, "42")
+        assert (dead_letter.error, dead_letter.attempts) == ("HTTP 502: bad gateway", 3)
+
+    @patch("events.deadletter.logger")
+    def test_missing_event(self, logger):
+        assert record_dead_letter(-1, "error", 1) is None
+        assert DeadLetter.objects.count() == 0
+
+
+@pytest.mark.django_db
+class TestProcessEventDeadLetters:
+    @patch("events.tasks.EventService.process_event")
+    def test_retries_exhausted(self, mock_event_service, settings, create_event):
+        event = create_event()
+        mock_event_service.side_effect = HTTPError("https://psp.example.com/", 503, "Unavailable", None, None)
+
+        process_event.push_request(retries=settings.MAX_RETRIES)
+        try:
+            process_event(event.pk, event.event_type)
+        finally:
+            process_event.pop_request()
+
+        dead_letter = DeadLetter.objects.get()
+        assert dead_letter.attempts == settings.MAX_RETRIES + 1
+        assert dead_letter.error == "HTTP 503: Unavailable"
+
+    @patch("events.tasks.process_event.retry")
+    @patch("events.tasks.EventService.process_event")
+    def test_non_retryable_http_error(self, mock_event_service, process_event_retry, create_event):
+        event = create_event()
+        mock_event_service.side_effect = HTTPError("https://psp.example.com/", 400, "Bad Request", None, None)
+
+        process_event(event.pk, event.event_type)
+
+        process_event_retry.assert_not_called()
+        assert DeadLetter.objects.get().error == "HTTP 400: Bad Request"
+
+    @patch("events.tasks.EventService.process_event")
+    def test_unexpected_error_is_recorded_and_raised(self, mock_event_service, create_event):
+        event = create_event()
+        mock_event_service.side_effect = ValueError("broken payload")
+
+        with pytest.raises(ValueError):
+            process_event(event.pk, event.event_type)
+
+        assert DeadLetter.objects.get().error == "ValueError('broken payload')"
+
+
+@pytest.mark.django_db
+class TestRedriveDeadLetters:
+    def test_redrive_selected(self, create_event):
+        charge = create_event(provider_event_id="charge")
+        refund = create_event(provider_event_id="refund")
+        Event.objects.filter(pk=charge.pk).update(event_type="charge.succeeded")
+        Event.objects.filter(pk=refund.pk).update(event_type="refund.created")
+        record_dead_letter(charge.pk, "HTTP 500", 11)
+        record_dead_letter(refund.pk, "HTTP 500", 11)
+        out = StringIO()
+
+        call_command("redrive_dead_letters", "--event-type", "charge.succeeded", "--rate", "1000", stdout=out)
+
+        assert "Redriven 1 events" in out.getvalue()
+        assert list(EventOutbox.objects.values_list("event_id", flat=True)) == [charge.pk]
+        assert Event.objects.get(pk=charge.pk).status == Event.STATUS_NEW
+        assert list(DeadLetter.objects.pending().values_list("event_id", flat=True)) == [refund.pk]
+
+    def test_list(self, create_event):
+        event = create_event()
+        record_dead_letter(event.pk, "HTTP 500: boom", 11)
+        out = StringIO()
+
+        call_command("redrive_dead_letters", "--list", stdout=out)
+
+        assert "HTTP 500: boom" in out.getvalue()
+        assert "1 dead letters" in out.getvalue()
+        assert EventOutbox.objects.count() == 0
+
+    def test_reaper_skips_dead_letters(self, create_event):
+        event = create_event()
+        record_dead_letter(event.pk, "HTTP 500", 11)
+        Event.objects.filter(pk=event.pk).update(date=timezone.now() - timedelta(hours=1))
+
+        reaper = EventReaper(stale_after=60, replayer=EventReplayer(rate=1000))
+
+        assert reaper.reap() == 0
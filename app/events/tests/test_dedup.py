@@ -0,0 +1,67 @@
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import caches
+
+from events.dedup import LocalSeenEvents, SeenEventsCache, get_seen_events
+
+
+class TestLocalSeenEvents:
+    def test_add_and_contains(self):
+        local = LocalSeenEvents(max_size=10, ttl=60)
+        local.add("evt-1")
+
+        assert local.contains("evt-1")
+        assert not local.contains("evt-2")
+
+    def test_evicts_least_recently_used(self):
+        local = LocalSeenEvents(max_size=2, ttl=60)
+        local.add("evt-1")
+        local.add("evt-2")
+        local.contains("evt-1")
+        local.add("evt-3")
+
+        assert local.contains("evt-1")
+        assert not local.contains("evt-2")
+        assert local.contains("evt-3")
+
+    @patch("events.dedup.time")
+    def test_expires_after_ttl(self, mock_time):
+        mock_time.monotonic.return_value = 100
+        local = LocalSeenEvents(max_size=10, ttl=60)
+        local.add("evt-1")
+
+        mock_time.monotonic.return_value = 161
+        assert not local.contains("evt-1")
+
+
+class TestSeenEventsCache:
+    @pytest.fixture
+    def shared_cache(self):
+        cache = caches["default"]
+        cache.clear()
+        yield cache
+        cache.clear()
+
+    def test_shared_tier_is_checked_when_local_misses(self, shared_cache):
+        writer = SeenEventsCache(local_size=10, ttl=60, shared_cache=shared_cache)
+        reader = SeenEventsCache(local_size=10, ttl=60, shared_cache=shared_cache)
+
+        writer.add_many(["evt-1", "evt-2"])
+
+        assert reader.filter_seen(["evt-1", "evt-2", "evt-3"]) == {"evt-1", "evt-2"}
+        assert reader.local.contains("evt-1")
+
+    def test_works_without_shared_tier(self):
+        seen_events = SeenEventsCache(local_size=10, ttl=60)
+        seen_events.add("evt-1")
+
+        assert seen_events.contains("evt-1")
+        assert not seen_events.contains("evt-2")
+
+    def test_singleton_is_rebuilt_on_settings_change(self, settings):
+        seen_events = get_seen_events()
+        settings.SEEN_EVENTS_LOCAL_SIZE = 5
+
+        assert get_seen_events() is not seen_events
+        assert get_seen_events().local.max_size == 5
@@ -0,0 +1,105 @@
+import io
+import json
+from unittest.mock import MagicMock, patch
+from wsgiref.util import setup_testing_defaults
+
+import pytest
+from django.conf import settings
+
+from events.ingest import IngestApplication
+from events.models import Event
+from events.tests.test_authentication import generate_hmac_signature
+
+
+def call_app(app, body=b"", method="POST", path="/v1/webhooks/payment", **headers):
+    environ = {
+        "REQUEST_METHOD": method,
+        "PATH_INFO": path,
+        "CONTENT_LENGTH": str(len(body)),
+        "CONTENT_TYPE": "application/json",
+        "wsgi.input": io.BytesIO(body),
+    }
+    environ.update({f"HTTP_{name.upper()}": value for name, value in headers.items()})
+    setup_testing_defaults(environ)
+
+    start_response = MagicMock()
+    response = b"".join(app(environ, start_response))
+    status = int(start_response.call_args[0][0].split()[0])
+    return status, json.loads(response.decode("utf-8"))
+
+
+@pytest.mark.django_db
+class TestIngestApplication:
+    app = IngestApplication()
+
+    def test_valid_signature(self, valid_payload):
+        signature = generate_hmac_signature(valid_payload, settings.HMAC_SECRET_KEY)
+
+        status, response = call_app(self.app, valid_payload, x_hmac_signature=signature)
+
+        assert status == 200
+        assert response == {"message": "Event received.", "event_id": "test-123"}
+        assert Event.objects.get(provider_event_id="test-123").event_type == "order_created"
+
+    def test_body_is_signed_by_chunks(self, valid_payload):
+        signature = generate_hmac_signature(valid_payload, settings.HMAC_SECRET_KEY)
+
+        with patch.object(self.app.ingest, "READ_CHUNK_SIZE", 7):
+            status, _ = call_app(self.app, valid_payload, x_hmac_signature=signature)
+
+        assert status == 200
+
+    @pytest.mark.parametrize("signature", ["", "incorrect_signature"])
+    def test_invalid_signature(self, valid_payload, signature):
+        status, _ = call_app(self.app, valid_payload, x_hmac_signature=signature)
+
+        assert status == 401
+        assert Event.objects.count() == 0
+
+    def test_invalid_schema(self):
+        body = json.dumps({"event_id": "test-123", "event_type": "charge.succeeded", "data": {}}).encode("utf-8")
+        signature = generate_hmac_signature(body, settings.HMAC_SECRET_KEY)
+
+        status, response = call_app(self.app, body, x_hmac_signature=signature)
+
+        assert status == 400
+        assert "order_id" in response["detail"]
+
+    def test_duplicate_is_saved_once(self, valid_payload):
+        signature = generate_hmac_signature(valid_payload, settings.HMAC_SECRET_KEY)
+
+        for _ in range(2):
+            status, _ = call_app(self.app, valid_payload, x_hmac_signature=signature)
+            assert status == 200
+
+        assert Event.objects.count() == 1
+
+    def test_too_large_body(self, valid_payload, settings):
+        settings.DATA_UPLOAD_MAX_MEMORY_SIZE = 10
+
+        status, _ = call_app(self.app, valid_payload, x_hmac_signature="signature")
+
+        assert status == 413
+
+    def test_method_not_allowed(self):
+        status, _ = call_app(self.app, method="GET")
+
+        assert status == 405
+
+    def test_other_paths_go_to_fallback(self):
+        def fallback(environ, start_response):
+            start_response("200 OK", [])
+            return [b'{"fallback": true}']
+
+        status, response = call_app(IngestApplication(fallback=fallback), path="/admin/", method="GET")
+
+        assert status == 200
+        assert response == {"fallback": True}
+
+    def test_body_size_is_unlimited_without_setting(self, valid_payload, settings):
+        settings.DATA_UPLOAD_MAX_MEMORY_SIZE = None
+        signature = generate_hmac_signature(valid_payload, settings.HMAC_SECRET_KEY)
+
+        status, _ = call_app(self.app, valid_payload, x_hmac_signature=signature)
+
+        assert status == 200
@@ -0,0 +1,49 @@
+from events.keys import SecretRegistry, get_secret_registry
+
+
+class TestSecretRegistry:
+    registry = SecretRegistry(
+        {
+            "stripe": {"2024-01": "old_secret", "2024-06": "new_secret"},
+            "adyen": {"main": "adyen_secret"},
+        },
+        default_provider="stripe",
+    )
+
+    def test_get_key_by_provider_and_key_id(self):
+        key = self.registry.get_key("stripe", "2024-06")
+
+        assert key.provider == "stripe"
+        assert key.secret == b"new_secret"
+
+    def test_get_single_key_without_key_id(self):
+        assert self.registry.get_key("adyen").secret == b"adyen_secret"
+
+    def test_key_id_is_required_during_rotation(self):
+        assert self.registry.get_key() is None
+        assert self.registry.get_key("stripe") is None
+
+    def test_unknown_key(self):
+        assert self.registry.get_key("stripe", "missing") is None
+        assert self.registry.get_key("unknown") is None
+
+    def test_empty_registry_is_falsy(self):
+        assert not SecretRegistry({}, default_provider="default")
+
+
+class TestGetSecretRegistry:
+    def test_registry_is_cached_until_settings_change(self, settings):
+        registry = get_secret_registry()
+        assert get_secret_registry() is registry
+
+        settings.HMAC_PROVIDER_KEYS = {"adyen": {"main": "adyen_secret"}}
+
+        reloaded = get_secret_registry()
+        assert reloaded is not registry
+        assert reloaded.get_key("adyen").secret == b"adyen_secret"
+
+    def test_legacy_secret_is_default_provider_key(self, settings):
+        settings.HMAC_SECRET_KEY = "legacy_secret"
+        settings.HMAC_PROVIDER_KEYS = {}
+
+        assert get_secret_registry().get_key().secret == b"legacy_secret"
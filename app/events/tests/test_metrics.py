@@ -0,0 +1,49 @@
+import pytest
+from django.conf import settings
+
+from core.metrics import REGISTRY
+from events.metrics import (
+    EVENT_PROCESSING_DELAY,
+    EVENT_PROCESSING_LATENCY,
+    EVENT_SAVE_LATENCY,
+    LOCK_WAIT,
+    TASK_ATTEMPTS,
+    WEBHOOK_LATENCY,
+)
+from events.tasks import process_event
+from events.tests.test_authentication import generate_hmac_signature
+from events.views import EventCreateAPIView
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    REGISTRY.clear()
+    yield
+    REGISTRY.clear()
+
+
+@pytest.mark.django_db
+class TestEventMetrics:
+    def test_webhook_and_save_latency(self, factory, valid_payload):
+        request = factory.post(
+            "/v1/webhooks/events/create/",
+            valid_payload,
+            content_type="application/json",
+            HTTP_X_HMAC_SIGNATURE=generate_hmac_signature(valid_payload, settings.HMAC_SECRET_KEY),
+        )
+
+        response = EventCreateAPIView.as_view()(request)
+
+        assert response.status_code == 200
+        assert WEBHOOK_LATENCY.get_count(endpoint="create") == 1
+        assert EVENT_SAVE_LATENCY.get_count() == 1
+
+    def test_processing_metrics(self, create_event):
+        event = create_event()
+
+        process_event(event.pk, "dispute.opened")
+
+        assert EVENT_PROCESSING_LATENCY.get_count(event_type="dispute.opened") == 1
+        assert EVENT_PROCESSING_DELAY.get_count(event_type=event.event_type) == 1
+        assert LOCK_WAIT.get_count(lock="event") == 1
+        assert TASK_ATTEMPTS.get_count(event_type="dispute.opened", result="success") == 1
@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+import pytest
+from django.db import transaction
+from django.utils import timezone
+
+from events.models import Event
+
+
+@pytest.mark.django_db
+class TestEventClaim:
+    @pytest.fixture
+    def events(self, create_event):
+        now = timezone.now()
+        events = {}
+        for name, status, minutes in [
+            ("new-old", Event.STATUS_NEW, 30),
+            ("new-older", Event.STATUS_NEW, 60),
+            ("new-fresh", Event.STATUS_NEW, 0),
+            ("error-old", Event.STATUS_ERROR, 45),
+            ("processed-old", Event.STATUS_PROCESSED, 90),
+        ]:
+            event = create_event(provider_event_id=name, status=status)
+            Event.objects.filter(pk=event.pk).update(date=now - timedelta(minutes=minutes))
+            events[name] = event
+        return events
+
+    def test_claim_returns_oldest_new_events(self, events):
+        with transaction.atomic():
+            claimed = Event.objects.claim(2)
+
+        assert [event.provider_event_id for event in claimed] == ["new-older", "new-old"]
+
+    def test_claim_filters_by_statuses_and_age(self, events):
+        with transaction.atomic():
+            claimed = Event.objects.claim(
+                10,
+                statuses=[Event.STATUS_NEW, Event.STATUS_ERROR],
+                older_than=timezone.now() - timedelta(minutes=10),
+            )
+
+        assert [event.provider_event_id for event in claimed] == ["new-older", "error-old", "new-old"]
+
+    def test_default_queryset_is_unordered(self):
+        assert not Event.objects.all().query.order_by
+        assert not Event._meta.ordering
@@ -0,0 +1,125 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from events.models import EventOutbox
+from events.outbox import OutboxDispatcher
+from events.routing import get_lane_queue
+from events.services import EventService
+
+
+@pytest.mark.django_db
+class TestOutboxDispatcher:
+    @staticmethod
+    def _save_events(count):
+        EventService().save_events(
+            [
+                {
+                    "provider_event_id": f"prov_id_{i}",
+                    "event_type": "charge.succeeded",
+                    "order_id": str(i),
+                    "data": "{}",
+                }
+                for i in range(count)
+            ]
+        )
+
+    def test_dispatch_publishes_batch_and_drains_outbox(self):
+        self._save_events(3)
+        event_ids = list(EventOutbox.objects.order_by("id").values_list("event_id", flat=True))
+
+        mock_process_event = MagicMock()
+        with patch("events.tasks.process_event", mock_process_event):
+            dispatched = OutboxDispatcher(batch_size=2).dispatch()
+
+            assert dispatched == 2
+            published = [call[0][0] for call in mock_process_event.apply_async.call_args_list]
+            assert published == [(event_ids[0], "charge.succeeded"), (event_ids[1], "charge.succeeded")]
+            assert mock_process_event.app.producer_or_acquire.call_count == 1
+            assert EventOutbox.objects.count() == 1
+
+            assert OutboxDispatcher(batch_size=2).dispatch() == 1
+            assert OutboxDispatcher(batch_size=2).dispatch() == 0
+            assert EventOutbox.objects.count() == 0
+
+    def test_dispatch_publishes_batches_in_batch_mode(self, settings):
+        settings.EVENTS_BATCH_PROCESSING = True
+        settings.EVENTS_BATCH_SIZE = 2
+        self._save_events(3)
+        event_ids = list(EventOutbox.objects.order_by("id").values_list("event_id", flat=True))
+
+        mock_process_events_batch = MagicMock()
+        with patch("events.tasks.process_event"), patch("events.tasks.process_events_batch", mock_process_events_batch):
+            assert OutboxDispatcher().dispatch() == 3
+
+        published = [call[0][0] for call in mock_process_events_batch.apply_async.call_args_list]
+        assert published == [(event_ids[:2],), (event_ids[2:],)]
+
+    def test_dispatch_publishes_plugin_types_as_single_tasks(self, settings):
+        settings.EVENTS_BATCH_PROCESSING = True
+        settings.EVENT_PROCESSORS = dict(
+            settings.EVENT_PROCESSORS,
+            **{"payout.*": {"processor": "events.services.UnhandledEvent", "queue": "events.payouts"}},
+        )
+        self._save_events(1)
+        EventService().save_events(
+            [{"provider_event_id": "payout-1", "event_type": "payout.paid", "order_id": "1", "data": "{}"}]
+        )
+        charge_id, payout_id = EventOutbox.objects.order_by("id").values_list("event_id", flat=True)
+
+        mock_process_event = MagicMock()
+        mock_process_events_batch = MagicMock()
+        with patch("events.tasks.process_event", mock_process_event), patch(
+            "events.tasks.process_events_batch", mock_process_events_batch
+        ):
+            assert OutboxDispatcher().dispatch() == 2
+
+        assert [call[0][0] for call in mock_process_events_batch.apply_async.call_args_list] == [([charge_id],)]
+        mock_process_event.apply_async.assert_called_once()
+        assert mock_process_event.apply_async.call_args[0][0] == (payout_id, "payout.paid")
+        assert mock_process_event.apply_async.call_args[1]["queue"] == "events.payouts"
+
+    def test_dispatch_routes_events_to_order_lanes(self, settings):
+        settings.EVENT_LANES = 4
+        self._save_events(3)
+
+        mock_process_event = MagicMock()
+        with patch("events.tasks.process_event", mock_process_event):
+            OutboxDispatcher().dispatch()
+
+        queues = [call[1]["queue"] for call in mock_process_event.apply_async.call_args_list]
+        assert queues == [get_lane_queue(str(i)) for i in range(3)]
+
+    def test_dispatch_routes_event_type_to_its_queue(self, settings):
+        settings.EVENT_LANES = 4
+        settings.EVENT_PROCESSORS = dict(
+            settings.EVENT_PROCESSORS,
+            **{"charge.succeeded": {"processor": "events.services.ChargeEvent", "queue": "events.charges"}},
+        )
+        self._save_events(2)
+
+        mock_process_event = MagicMock()
+        with patch("events.tasks.process_event", mock_process_event):
+            OutboxDispatcher().dispatch()
+
+        queues = [call[1]["queue"] for call in mock_process_event.apply_async.call_args_list]
+        assert queues == ["events.charges", "events.charges"]
+
+    def test_dispatch_keeps_rows_if_publish_fails(self):
+        self._save_events(2)
+
+        mock_process_event = MagicMock()
+        mock_process_event.apply_async.side_effect = ConnectionError("broker is down")
+        with patch("events.tasks.process_event", mock_process_event):
+            with pytest.raises(ConnectionError):
+                OutboxDispatcher().dispatch()
+
+        assert EventOutbox.objects.count() == 2
+
+    @patch("events.outbox.time")
+    def test_run_sleeps_only_when_outbox_is_drained(self, mock_time):
+        dispatcher = OutboxDispatcher(batch_size=10)
+        with patch.object(dispatcher, "dispatch", side_effect=[10, 3]):
+            dispatcher.run(interval=1, iterations=2)
+
+        mock_time.sleep.assert_called_once_with(1)
@@ -0,0 +1,29 @@
+import io
+
+import pytest
+from rest_framework.exceptions import ParseError
+from rest_framework.request import Request
+
+from events.parsers import VerifiedJSONParser
+
+
+class TestVerifiedJSONParser:
+    def test_parse_uses_buffered_body(self, factory, valid_payload):
+        request = Request(factory.post("/", data=valid_payload, content_type="application/json"))
+        request.body
+
+        data = VerifiedJSONParser().parse(io.BytesIO(b"ignored"), parser_context={"request": request})
+
+        assert data["event_id"] == "test-123"
+        assert data["data"] == {"note": "some data"}
+
+    def test_parse_falls_back_to_stream_without_request(self, valid_payload):
+        data = VerifiedJSONParser().parse(io.BytesIO(valid_payload))
+
+        assert data["event_id"] == "test-123"
+
+    def test_parse_invalid_json(self, factory):
+        request = Request(factory.post("/", data=b"{not json", content_type="application/json"))
+
+        with pytest.raises(ParseError):
+            VerifiedJSONParser().parse(None, parser_context={"request": request})
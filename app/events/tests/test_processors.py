@@ -0,0 +1,102 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+
+from events.models import Event
+from events.processors import ProcessorLimits, ProcessorRegistry, get_processor_registry
+from events.services import ChargeEvent, EventService, UnhandledEvent
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+class TestProcessorRegistry:
+    def test_lookup_exact_pattern_and_default(self):
+        registry = ProcessorRegistry(
+            {
+                "charge.succeeded": {"processor": "events.services.ChargeEvent"},
+                "payout.*": {"processor": "events.services.UnhandledEvent", "queue": "events.payouts"},
+            },
+            {"processor": "events.services.UnhandledEvent"},
+        )
+
+        assert registry.get("charge.succeeded").processor_class is ChargeEvent
+        assert registry.get("payout.paid").queue == "events.payouts"
+        assert registry.get("refund.updated") is registry.default
+        assert registry.event_types == ["charge.succeeded"]
+
+    def test_processor_is_imported_lazily(self):
+        registry = ProcessorRegistry(
+            {"charge.captured": {"processor": "events.not_a_module.ChargeCaptured"}},
+            {"processor": "events.services.UnhandledEvent"},
+        )
+        spec = registry.get("charge.captured")
+
+        with pytest.raises(ImportError):
+            spec.processor_class
+
+    def test_missing_processor(self):
+        with pytest.raises(ImproperlyConfigured):
+            ProcessorRegistry({"charge.captured": {"queue": "events.charges"}}, {"processor": "x.Y"})
+
+    def test_entry_points_are_merged_with_settings(self, settings):
+        entry_point = MagicMock()
+        entry_point.name = "payout.*"
+        entry_point.load.return_value = UnhandledEvent
+        settings.EVENT_PROCESSORS = {"payout.*": {"queue": "events.payouts"}}
+
+        with patch("events.processors.iter_entry_points", return_value=[entry_point]):
+            registry = ProcessorRegistry.from_settings()
+
+        spec = registry.get("payout.paid")
+        entry_point.load.assert_not_called()
+        assert spec.queue == "events.payouts"
+        assert spec.processor_class is UnhandledEvent
+
+    def test_registry_is_reset_on_settings_change(self, settings):
+        registry = get_processor_registry()
+        settings.EVENT_PROCESSORS = {}
+
+        assert get_processor_registry() is not registry
+        assert get_processor_registry().get("charge.succeeded") is get_processor_registry().default
+
+
+class TestProcessorLimits:
+    def test_concurrency_limit(self):
+        limits = ProcessorLimits("payout", concurrency=2, cache=cache)
+
+        assert limits.acquire() is None
+        assert limits.acquire() is None
+        countdown, reason = limits.acquire()
+        assert reason == "concurrency_limit"
+        assert countdown > 0
+
+        limits.release()
+        assert limits.acquire() is None
+
+    def test_rate_limit_releases_concurrency_slot(self):
+        limits = ProcessorLimits("payout", concurrency=1, rate_limit=1, cache=cache)
+
+        assert limits.acquire() is None
+        limits.release()
+        _, reason = limits.acquire()
+
+        assert reason == "rate_limit"
+        assert limits.concurrency.try_acquire() is True
+
+
+@pytest.mark.django_db
+class TestUnhandledEvent:
+    def test_unknown_type_is_closed_by_default_sink(self, create_event):
+        event = create_event()
+        Event.objects.filter(pk=event.pk).update(event_type="refund.updated")
+
+        EventService().process_event(event.pk, "refund.updated")
+
+        assert Event.objects.get(pk=event.pk).status == Event.STATUS_PROCESSED
@@ -0,0 +1,121 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from events.models import Event, EventOutbox
+from events.replay import EventReaper, EventReplayer
+
+
+class FakeBucket:
+    def __init__(self):
+        self.acquired = []
+
+    def acquire(self, tokens=1):
+        self.acquired.append(tokens)
+
+
+@pytest.fixture
+def create_stale_event(create_event):
+    def _create_stale_event(provider_event_id, status=Event.STATUS_NEW, minutes=60, **kwargs):
+        event = create_event(provider_event_id=provider_event_id, status=status, **kwargs)
+        Event.objects.filter(pk=event.pk).update(date=timezone.now() - timedelta(minutes=minutes))
+        return event
+
+    return _create_stale_event
+
+
+@pytest.mark.django_db
+class TestEventReplayer:
+    def test_replay_enqueues_in_rate_limited_batches(self, create_stale_event):
+        events = [create_stale_event(f"event-{i}", status=Event.STATUS_ERROR) for i in range(5)]
+        bucket = FakeBucket()
+
+        replayed = EventReplayer(batch_size=2, bucket=bucket).replay(Event.objects.all())
+
+        assert replayed == 5
+        assert bucket.acquired == [2, 2, 2]
+        assert sorted(EventOutbox.objects.values_list("event_id", flat=True)) == [event.pk for event in events]
+        assert set(Event.objects.values_list("status", "replay_count")) == {(Event.STATUS_NEW, 1)}
+
+    def test_replay_skips_events_already_in_outbox(self, create_stale_event):
+        event = create_stale_event("event-1")
+        EventOutbox.objects.create(event=event, event_type=event.event_type)
+
+        assert EventReplayer(bucket=FakeBucket()).replay(Event.objects.all()) == 0
+        assert EventOutbox.objects.count() == 1
+
+
+@pytest.mark.django_db
+class TestEventReaper:
+    def test_reap_only_stale_events(self, create_stale_event):
+        stale = create_stale_event("stale")
+        errored = create_stale_event("errored", status=Event.STATUS_ERROR)
+        create_stale_event("fresh", minutes=1)
+        create_stale_event("processed", status=Event.STATUS_PROCESSED)
+        create_stale_event("parked", status=Event.STATUS_PARKED)
+
+        reaper = EventReaper(stale_after=15 * 60, replayer=EventReplayer(bucket=FakeBucket()))
+
+        assert reaper.reap() == 2
+        assert sorted(EventOutbox.objects.values_list("event_id", flat=True)) == [stale.pk, errored.pk]
+
+    def test_reap_respects_replay_interval_and_limit(self, create_stale_event):
+        event = create_stale_event("stale")
+        reaper = EventReaper(stale_after=15 * 60, max_replays=2, replayer=EventReplayer(bucket=FakeBucket()))
+
+        assert reaper.reap() == 1
+        EventOutbox.objects.all().delete()
+        assert reaper.reap() == 0
+
+        Event.objects.filter(pk=event.pk).update(replayed_at=timezone.now() - timedelta(hours=1))
+        assert reaper.reap() == 1
+        EventOutbox.objects.all().delete()
+
+        Event.objects.filter(pk=event.pk).update(replayed_at=timezone.now() - timedelta(hours=1))
+        assert reaper.reap() == 0
+
+    def test_reap_skips_events_waiting_for_retry(self, create_stale_event):
+        deferred = create_stale_event("deferred")
+        lost = create_stale_event("lost")
+        Event.objects.filter(pk=deferred.pk).schedule_attempt(30)
+        # Повтор должен был случиться давно, но так и не пришел
+        Event.objects.filter(pk=lost.pk).update(retry_at=timezone.now() - timedelta(hours=1))
+
+        reaper = EventReaper(stale_after=15 * 60, replayer=EventReplayer(bucket=FakeBucket()))
+
+        assert reaper.reap() == 1
+        assert list(EventOutbox.objects.values_list("event_id", flat=True)) == [lost.pk]
+
+
+@pytest.mark.django_db
+class TestReplayEventsCommand:
+    def test_replay_with_filters(self, create_stale_event):
+        target = create_stale_event("target", status=Event.STATUS_ERROR, order_id="1")
+        create_stale_event("other-order", status=Event.STATUS_ERROR, order_id="2")
+        create_stale_event("processed", status=Event.STATUS_PROCESSED, order_id="1")
+        out = StringIO()
+
+        call_command("replay_events", "--order-id", "1", "--rate", "1000", stdout=out)
+
+        assert "Replayed 1 events" in out.getvalue()
+        assert list(EventOutbox.objects.values_list("event_id", flat=True)) == [target.pk]
+
+    def test_dry_run(self, create_stale_event):
+        create_stale_event("target")
+        out = StringIO()
+
+        call_command("replay_events", "--dry-run", stdout=out)
+
+        assert "1 events would be replayed" in out.getvalue()
+        assert EventOutbox.objects.count() == 0
+
+
+def test_reaper_task_is_scheduled(settings):
+    from events.tasks import reap_stale_events
+
+    entry = settings.CELERY_BEAT_SCHEDULE["reap-stale-events"]
+    assert entry["task"] == reap_stale_events.name
+    assert entry["schedule"] < settings.REAPER_STALE_AFTER
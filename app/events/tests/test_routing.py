@@ -0,0 +1,25 @@
+import pytest
+
+from events.routing import get_lane, get_lane_queue
+
+
+class TestRouting:
+    def test_lane_is_stable_and_bounded(self, settings):
+        settings.EVENT_LANES = 8
+
+        lanes = {get_lane(order_id) for order_id in range(1000)}
+
+        assert lanes == set(range(8))
+        assert get_lane("42") == get_lane(42)
+
+    @pytest.mark.parametrize("lanes", [0, None])
+    def test_lanes_disabled(self, settings, lanes):
+        settings.EVENT_LANES = lanes
+
+        assert get_lane_queue("42") is None
+
+    def test_lane_queue_name(self, settings):
+        settings.EVENT_LANES = 4
+        settings.EVENT_LANE_QUEUE_PREFIX = "events.lane."
+
+        assert get_lane_queue("42") == f"events.lane.{get_lane('42')}"
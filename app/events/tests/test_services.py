@@ -1,10 +1,13 @@
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 
 import pytest
+from django.db import transaction
 
-from events.models import Event
+from events.dedup import get_seen_events
+from events.models import Event, EventOutbox
 from events.services import BaseEvent, ChargeEvent, DisputeOpenedEvent, EventService, RefundCreatedEvent
 from finances.models import Operations
+from finances.services import FinanceServices
 from orders.models import Order
 
 
@@ -56,6 +59,15 @@ class TestChargeEvent:
         assert event.status == Event.STATUS_PROCESSED
         assert operations == 1
 
+    def test_process_twice_charges_once(self, create_order, create_event):
+        order = create_order(status=Order.STATUS_NEW)
+        event = create_event(order_id=order.id, status=Event.STATUS_NEW)
+
+        ChargeEvent().process(event.pk)
+        ChargeEvent().process(event.pk)
+
+        assert Operations.objects.filter(order=order.id, type=Operations.TYPE_CHARGE).count() == 1
+
     @patch("events.services.logger")
     @pytest.mark.parametrize(
         "initial_status",
@@ -126,6 +138,7 @@ class TestDisputeOpenedEvent:
 class TestRefundEvent:
     def test_process_success(self, create_order, create_event):
         order = create_order(status=Order.STATUS_PAID)
+        FinanceServices.add_charge(order.customer_id, order.id, order.amount)
         event = create_event(order_id=order.id, status=Event.STATUS_NEW)
 
         refund_event = RefundCreatedEvent()
@@ -143,7 +156,7 @@ class TestRefundEvent:
     @patch("events.services.logger")
     @pytest.mark.parametrize(
         "initial_status",
-        [Order.STATUS_NEW, Order.STATUS_CANCELED, Order.STATUS_SHIPPED],
+        [Order.STATUS_CANCELED, Order.STATUS_SHIPPED],
     )
     def test_process_fail_wrong_order_status(self, logger, create_order, create_event, initial_status):
         order = create_order(status=initial_status)
@@ -159,6 +172,56 @@ class TestRefundEvent:
         assert event.status == Event.STATUS_NEW
         logger.error.assert_called_once()
 
+    @patch("events.services.logger")
+    def test_refund_over_charged_amount_is_rejected(self, logger, create_order, create_event):
+        order = create_order(status=Order.STATUS_PAID)
+        event = create_event(order_id=order.id, status=Event.STATUS_NEW)
+
+        RefundCreatedEvent().process(event.pk)
+
+        order.refresh_from_db()
+        event.refresh_from_db()
+        assert order.status == Order.STATUS_PAID
+        assert event.status == Event.STATUS_NEW
+        assert not Operations.objects.filter(order=order.id).exists()
+        logger.error.assert_called_once()
+
+    def test_refund_before_charge_is_parked_and_released(self, create_order, create_event):
+        order = create_order(status=Order.STATUS_NEW)
+        refund = create_event(provider_event_id="refund-1", order_id=order.id)
+        charge = create_event(provider_event_id="charge-1", order_id=order.id)
+
+        RefundCreatedEvent().process(refund.pk)
+
+        refund.refresh_from_db()
+        assert refund.status == Event.STATUS_PARKED
+        assert Operations.objects.filter(order=order.id).count() == 0
+
+        ChargeEvent().process(charge.pk)
+
+        refund.refresh_from_db()
+        assert refund.status == Event.STATUS_NEW
+        assert list(EventOutbox.objects.values_list("event_id", flat=True)) == [refund.pk]
+
+        RefundCreatedEvent().process(refund.pk)
+
+        order.refresh_from_db()
+        refund.refresh_from_db()
+        assert refund.status == Event.STATUS_PROCESSED
+        assert order.status == Order.STATUS_CANCELED
+        assert Operations.objects.filter(order=order.id, type=Operations.TYPE_REFUND).count() == 1
+
+    @patch("events.services.OrderStateMachine.hold", return_value=False)
+    def test_refund_parked_after_concurrent_charge_is_released(self, mock_hold, create_order, create_event):
+        order = create_order(status=Order.STATUS_NEW)
+        refund = create_event(provider_event_id="refund-1", order_id=order.id)
+
+        RefundCreatedEvent().process(refund.pk)
+
+        refund.refresh_from_db()
+        assert refund.status == Event.STATUS_NEW
+        assert list(EventOutbox.objects.values_list("event_id", flat=True)) == [refund.pk]
+
     @patch("events.services.logger")
     def test_process_event_not_found(self, logger):
         non_existent_event_id = -9999
@@ -184,9 +247,8 @@ class TestRefundEvent:
 
 @pytest.mark.django_db
 class TestEventService:
-    @patch("events.services.transaction")
     @patch("events.services.logger")
-    def test_save_event_success(self, logger, mock_transaction):
+    def test_save_event_success(self, logger):
         event_service = EventService()
         event_data = {
             "provider_event_id": "prov_id_456",
@@ -194,27 +256,22 @@ class TestEventService:
             "order_id": "ORD-123",
             "data": '{"key": "value"}',
         }
-        mock_process_event = MagicMock()
-        with patch("events.tasks.process_event", mock_process_event, create=True):
-            event_service.save_event(**event_data)
 
-            assert Event.objects.count() == 1
-            created_event = Event.objects.get()
-            assert created_event.provider_event_id == event_data["provider_event_id"]
-            assert created_event.event_type == event_data["event_type"]
+        assert event_service.save_event(**event_data) is True
 
-            mock_transaction.on_commit.assert_called_once()
-
-            on_commit_func = mock_transaction.on_commit.call_args[0][0]
-            on_commit_func()
+        assert Event.objects.count() == 1
+        created_event = Event.objects.get()
+        assert created_event.provider_event_id == event_data["provider_event_id"]
+        assert created_event.event_type == event_data["event_type"]
 
-            mock_process_event.delay.assert_called_once_with(event_data["provider_event_id"], event_data["event_type"])
+        outbox = EventOutbox.objects.get()
+        assert outbox.event_id == created_event.pk
+        assert outbox.event_type == event_data["event_type"]
 
-            logger.error.assert_not_called()
+        logger.error.assert_not_called()
 
-    @patch("events.services.transaction")
     @patch("events.services.logger")
-    def test_save_event_integrity_error(self, logger, mock_transaction):
+    def test_save_event_integrity_error(self, logger):
         event_service = EventService()
         event_data = {
             "provider_event_id": "prov_id_456",
@@ -226,10 +283,63 @@ class TestEventService:
         Event.objects.create(**event_data)
         assert Event.objects.count() == 1
 
-        mock_process_event = MagicMock()
-        with patch("events.tasks.process_event", mock_process_event, create=True):
-            event_service.save_event(**event_data)
+        with transaction.atomic():
+            assert event_service.save_event(**event_data) is False
+
+        assert Event.objects.count() == 1
+        logger.error.assert_called_once_with(f"Event with id {event_data['provider_event_id']} already exists")
+        assert EventOutbox.objects.count() == 0
+
+    def test_save_events_bulk_dedup(self):
+        Event.objects.create(provider_event_id="prov_id_2", event_type="charge.succeeded", order_id="2", data="{}")
+        events = [
+            {"provider_event_id": f"prov_id_{i}", "event_type": "charge.succeeded", "order_id": str(i), "data": "{}"}
+            for i in range(1, 4)
+        ]
+        events.append(events[0])
+
+        statuses = EventService().save_events(events)
+
+        assert statuses == [
+            ("prov_id_1", EventService.STATUS_ACCEPTED),
+            ("prov_id_2", EventService.STATUS_DUPLICATE),
+            ("prov_id_3", EventService.STATUS_ACCEPTED),
+            ("prov_id_1", EventService.STATUS_DUPLICATE),
+        ]
+        assert Event.objects.count() == 3
+        assert sorted(EventOutbox.objects.values_list("event__provider_event_id", flat=True)) == [
+            "prov_id_1",
+            "prov_id_3",
+        ]
+
+    @patch("events.services.EventService.save_event", return_value=True)
+    def test_receive_event_skips_db_for_seen_event(self, mock_save_event):
+        event_service = EventService()
+        event_data = {
+            "provider_event_id": "prov_id_456",
+            "event_type": "charge.succeeded",
+            "order_id": "ORD-123",
+            "data": '{"key": "value"}',
+        }
 
-            assert Event.objects.count() == 1
-            logger.error.assert_called_once_with(f"Event with id {event_data['provider_event_id']} already exists")
-            mock_transaction.on_commit.assert_not_called()
+        assert event_service.receive_event(**event_data) is True
+        assert event_service.receive_event(**event_data) is False
+        mock_save_event.assert_called_once_with(*event_data.values())
+
+    @patch("events.services.EventService.save_events")
+    def test_receive_events_skips_db_for_seen_events(self, mock_save_events):
+        mock_save_events.return_value = [("prov_id_2", EventService.STATUS_ACCEPTED)]
+        get_seen_events().add("prov_id_1")
+        events = [
+            {"provider_event_id": f"prov_id_{i}", "event_type": "charge.succeeded", "order_id": str(i), "data": "{}"}
+            for i in range(1, 3)
+        ]
+
+        statuses = EventService().receive_events(events)
+
+        assert statuses == [
+            ("prov_id_1", EventService.STATUS_DUPLICATE),
+            ("prov_id_2", EventService.STATUS_ACCEPTED),
+        ]
+        mock_save_events.assert_called_once_with(events[1:])
+        assert get_seen_events().contains("prov_id_2")
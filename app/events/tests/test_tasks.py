@@ -1,11 +1,36 @@
+from datetime import timedelta
 from unittest.mock import patch
-from urllib.error import HTTPError
+from urllib.error import HTTPError, URLError
 
 import pytest
+from django.core.cache import cache
+from django.utils import timezone
 
+from core.retry import CircuitBreaker
+from events.metrics import TASK_RETRIES
+from events.models import DeadLetter
+from events.processors import get_processor_registry
+from events.services import ChargeEvent
 from events.tasks import process_event
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def eager():
+    # Повторные публикации выполняются сразу в том же процессе, с настоящим счетчиком retries
+    conf = process_event.app.conf
+    previous = conf.task_always_eager
+    conf.task_always_eager = True
+    yield
+    conf.task_always_eager = previous
+
+
 @pytest.mark.django_db
 class TestProcessEvent:
     @patch("events.tasks.process_event.retry")
@@ -21,7 +46,7 @@ class TestProcessEvent:
         assert process_event_retry.call_count == 0
         mock_logger.warning.assert_not_called()
 
-    @patch("events.tasks.calculate_delay", return_value=8.5)
+    @patch("core.retry.calculate_delay", return_value=8.5)
     @patch("events.tasks.EventService.process_event")
     @patch("events.tasks.logger")
     @pytest.mark.parametrize("status_code", [429, 500, 503, 599])
@@ -31,9 +56,138 @@ class TestProcessEvent:
         mock_event_service.side_effect = exc
 
         with pytest.raises(Exception, match="Task can be retried"):
-            process_event("event_id_retry", "charge")
+            process_event(124, "charge")
 
         assert process_event.request.retries == 0
         mock_delay.assert_called_once_with(1)
         mock_logger.warning.assert_called_once()
         assert f"Ошибка HTTP {status_code}. Таска" in mock_logger.warning.call_args[0][0]
+
+    @patch("events.tasks.process_event.retry")
+    @patch("events.tasks.EventService.process_event")
+    def test_process_event_honors_retry_after(self, mock_event_service, process_event_retry):
+        mock_event_service.side_effect = HTTPError(
+            "https://psp.example.com/charges", 429, "Too Many Requests", {"Retry-After": "120"}, None
+        )
+        process_event_retry.side_effect = Exception("retry")
+
+        with pytest.raises(Exception, match="retry"):
+            process_event(124, "charge")
+
+        retry_kwargs = process_event_retry.call_args[1]
+        assert retry_kwargs["countdown"] >= 120
+        assert retry_kwargs["kwargs"] == {"downstream": "psp.example.com"}
+        assert CircuitBreaker("psp.example.com").open_for() > 0
+
+    @patch("events.tasks.EventService.process_event")
+    def test_open_circuit_defers_without_spending_attempts(self, mock_event_service, eager, settings, create_event):
+        settings.MAX_DEFERRALS = 3
+        event = create_event()
+        CircuitBreaker("psp.example.com").open(60)
+        deferred = TASK_RETRIES.get(event_type="charge", reason="circuit_open")
+
+        # Последняя попытка: если бы ожидание тратило попытки, задача упала бы с MaxRetriesExceededError
+        result = process_event.apply(
+            (event.pk, "charge"), {"downstream": "psp.example.com"}, retries=settings.MAX_RETRIES
+        )
+
+        assert result.successful()
+        mock_event_service.assert_not_called()
+        assert TASK_RETRIES.get(event_type="charge", reason="circuit_open") == deferred + 3
+        dead_letter = DeadLetter.objects.get(event=event)
+        assert dead_letter.attempts == settings.MAX_RETRIES + 1
+        assert "circuit_open" in dead_letter.error
+
+    @patch("events.tasks.get_retry_countdown", return_value=1.0)
+    @patch("events.tasks.EventService.process_event")
+    def test_open_circuit_defers_until_it_closes(self, mock_event_service, mock_countdown, eager):
+        with patch("events.tasks.CircuitBreaker.open_for", side_effect=[30.0, 0.0]):
+            process_event.apply((123, "charge"), {"downstream": "psp.example.com"})
+
+        mock_event_service.assert_called_once_with(123, "charge")
+
+    @patch("events.tasks.EventService.process_event")
+    def test_first_attempt_checks_processor_downstream(self, mock_event_service, eager, settings, create_event):
+        settings.MAX_DEFERRALS = 0
+        event = create_event()
+        CircuitBreaker("psp.example.com").open(60)
+
+        with patch.object(ChargeEvent, "downstream", "psp.example.com"):
+            process_event.apply((event.pk, "charge.succeeded"))
+
+        mock_event_service.assert_not_called()
+        assert DeadLetter.objects.filter(event=event).exists()
+
+    @patch("events.tasks.process_event.retry")
+    @patch("events.tasks.EventService.process_event")
+    def test_network_error_is_retried_and_counted_by_breaker(self, mock_event_service, process_event_retry):
+        mock_event_service.side_effect = URLError(TimeoutError("timed out"), "https://psp.example.com/charges")
+        process_event_retry.side_effect = Exception("retry")
+
+        with pytest.raises(Exception, match="retry"):
+            process_event(124, "charge")
+
+        assert process_event_retry.call_args[1]["kwargs"] == {"downstream": "psp.example.com"}
+        breaker = CircuitBreaker("psp.example.com")
+        assert breaker.cache.get(breaker._failures_key) == 1
+
+    @patch("events.tasks.EventService.process_event")
+    def test_network_error_goes_to_dead_letter_when_attempts_are_exhausted(
+        self, mock_event_service, eager, settings, create_event
+    ):
+        event = create_event()
+        mock_event_service.side_effect = URLError(ConnectionRefusedError(), "https://psp.example.com/charges")
+
+        process_event.apply((event.pk, "charge"), retries=settings.MAX_RETRIES)
+
+        assert DeadLetter.objects.get(event=event).error.startswith("Network error")
+
+    @patch("events.tasks.EventService.process_event")
+    def test_success_closes_circuit(self, mock_event_service):
+        breaker = CircuitBreaker("psp.example.com", failure_threshold=5)
+        breaker.record_failure()
+
+        process_event(123, "charge", downstream="psp.example.com")
+
+        mock_event_service.assert_called_once_with(123, "charge")
+        assert breaker.cache.get(breaker._failures_key) is None
+
+    @patch("events.tasks.get_retry_countdown", return_value=30.0)
+    @patch("events.tasks.process_event.retry")
+    @patch("events.tasks.EventService.process_event")
+    def test_retry_marks_next_attempt(self, mock_event_service, process_event_retry, mock_countdown, create_event):
+        event = create_event()
+        mock_event_service.side_effect = HTTPError("https://psp.example.com", 503, "Unavailable", None, None)
+        process_event_retry.side_effect = Exception("retry")
+
+        with pytest.raises(Exception, match="retry"):
+            process_event(event.pk, "charge")
+
+        # Reaper не тронет событие, пока ждет повтора
+        event.refresh_from_db()
+        assert event.retry_at > timezone.now() + timedelta(seconds=20)
+
+    @patch("events.tasks.EventService.process_event")
+    def test_concurrency_limit_holds_task(self, mock_event_service, eager, settings, create_event):
+        settings.EVENT_PROCESSORS = {"payout.*": {"processor": "events.services.UnhandledEvent", "concurrency": 1}}
+        settings.MAX_DEFERRALS = 3
+        event = create_event()
+        limits = get_processor_registry().get("payout.paid").limits
+        assert limits.acquire() is None
+        deferred = TASK_RETRIES.get(event_type="payout.paid", reason="concurrency_limit")
+
+        # Ожидание слота не тратит попытки даже на последней из них
+        result = process_event.apply((event.pk, "payout.paid"), retries=settings.MAX_RETRIES)
+
+        assert result.successful()
+        mock_event_service.assert_not_called()
+        assert TASK_RETRIES.get(event_type="payout.paid", reason="concurrency_limit") == deferred + 3
+        dead_letter = DeadLetter.objects.get(event=event)
+        assert dead_letter.attempts == settings.MAX_RETRIES + 1
+        assert "concurrency_limit" in dead_letter.error
+
+        limits.release()
+        process_event.apply((event.pk, "payout.paid"), retries=settings.MAX_RETRIES)
+        mock_event_service.assert_called_once_with(event.pk, "payout.paid")
+        # слот освобожден и после обработки
+        assert limits.acquire() is None
@@ -3,11 +3,13 @@ import json
 from unittest.mock import patch
 
 import pytest
+from django.conf import settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.exceptions import AuthenticationFailed
 
 from events.models import Event
+from events.tests.test_authentication import generate_hmac_signature
 
 
 @pytest.mark.django_db
@@ -42,6 +44,19 @@ class TestEventCreateAPIView:
         event = Event.objects.get(provider_event_id=decoded_data["event_id"])
         assert event.status == Event.STATUS_NEW
 
+    def test_create_event_with_real_signature(self, client, valid_payload):
+        signature = generate_hmac_signature(valid_payload, settings.HMAC_SECRET_KEY)
+
+        response = client.post(
+            self._get_path(),
+            data=valid_payload,
+            content_type="application/json",
+            HTTP_X_HMAC_SIGNATURE=signature,
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert Event.objects.filter(provider_event_id="test-123").exists()
+
     def test_create_event_fails_if_hmac_is_incorrect(self, client, valid_payload):
         incorrect_signature = "incorrect_signature"
         initial_count = Event.objects.count()
@@ -61,6 +76,22 @@ class TestEventCreateAPIView:
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
         assert Event.objects.count() == initial_count
 
+    def test_create_event_duplicate_is_acknowledged(self, client, valid_payload):
+        with patch(
+            "app.events.views.HMACAuthentication.authenticate",
+            return_value=(None, None),
+        ), patch("app.events.views.EventService.save_event", return_value=True) as save_event_mock:
+            for _ in range(2):
+                response = client.post(
+                    self._get_path(),
+                    data=valid_payload,
+                    content_type="application/json",
+                    HTTP_X_HMAC_SIGNATURE="some_signature",
+                )
+                assert response.status_code == status.HTTP_200_OK
+
+        save_event_mock.assert_called_once()
+
     def test_create_event_fails_if_data_is_invalid(self, client, valid_payload):
         signature = "some_signature"
 
@@ -85,3 +116,78 @@ class TestEventCreateAPIView:
         assert "event_id" in response.json()
 
         assert Event.objects.count() == initial_count
+
+
+@pytest.mark.django_db
+class TestEventBatchCreateAPIView:
+    @staticmethod
+    def _get_path():
+        return reverse("events:event-batch-create")
+
+    def _post(self, client, payload):
+        with patch(
+            "app.events.views.HMACAuthentication.authenticate",
+            return_value=(None, None),
+        ):
+            return client.post(
+                self._get_path(),
+                data=payload,
+                content_type="application/json",
+                HTTP_X_HMAC_SIGNATURE="some_signature",
+            )
+
+    def test_create_batch_success(self, client, valid_batch_payload):
+        response = self._post(client, valid_batch_payload)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert Event.objects.count() == 3
+        assert response.json()["events"] == [{"event_id": f"batch-{i}", "status": "accepted"} for i in range(3)]
+
+    def test_create_batch_reports_duplicates(self, client, valid_batch_payload, create_event):
+        create_event(provider_event_id="batch-1")
+        events = json.loads(valid_batch_payload.decode("utf-8"))
+        events.append(events[0])
+
+        response = self._post(client, json.dumps(events).encode("utf-8"))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert Event.objects.count() == 3
+        assert [event["status"] for event in response.json()["events"]] == [
+            "accepted",
+            "duplicate",
+            "accepted",
+            "duplicate",
+        ]
+
+    def test_create_batch_fails_if_any_event_is_invalid(self, client, valid_batch_payload):
+        events = json.loads(valid_batch_payload.decode("utf-8"))
+        del events[1]["event_id"]
+
+        response = self._post(client, json.dumps(events).encode("utf-8"))
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert Event.objects.count() == 0
+
+    def test_create_batch_fails_if_batch_is_too_large(self, client, settings, valid_batch_payload):
+        settings.WEBHOOK_BATCH_MAX_SIZE = 2
+
+        response = self._post(client, valid_batch_payload)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert Event.objects.count() == 0
+
+    def test_batch_size_is_checked_before_validation(self, client, settings):
+        settings.WEBHOOK_BATCH_MAX_SIZE = 2
+
+        with patch("app.events.views.EventSerializer") as serializer:
+            response = self._post(client, json.dumps([{}, {}, {}]).encode("utf-8"))
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "Batch size must not exceed 2 events." in response.json()["non_field_errors"]
+        serializer.assert_not_called()
+
+    def test_create_batch_requires_list(self, client, valid_payload):
+        response = self._post(client, valid_payload)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert Event.objects.count() == 0
@@ -1,10 +1,11 @@
 from django.conf.urls import url
 from rest_framework.routers import DefaultRouter
 
-from app.events.views import EventCreateAPIView
+from app.events.views import EventBatchCreateAPIView, EventCreateAPIView
 
 router = DefaultRouter()
 
 urlpatterns = [
     url("events/create/", EventCreateAPIView.as_view(), name="event-create"),
+    url("events/batch/", EventBatchCreateAPIView.as_view(), name="event-batch-create"),
 ]
@@ -1,23 +1,39 @@
-from rest_framework import generics, status
+from django.conf import settings
+from rest_framework import generics, parsers, serializers, status
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
+from events.metrics import WEBHOOK_LATENCY
+
 from .authentication import HMACAuthentication
+from .parsers import VerifiedJSONParser
 from .serializers import EventSerializer
 from .services import EventService
 
 
-class EventCreateAPIView(generics.CreateAPIView):
+class WebhookMetricsMixin:
+    """Пишет полное время запроса, включая HMAC и разбор тела, в webhook_request_duration_seconds."""
+
+    metrics_endpoint = None
+
+    def dispatch(self, request, *args, **kwargs):
+        with WEBHOOK_LATENCY.time(endpoint=self.metrics_endpoint):
+            return super().dispatch(request, *args, **kwargs)
+
+
+class EventCreateAPIView(WebhookMetricsMixin, generics.CreateAPIView):
     authentication_classes = [HMACAuthentication]
+    parser_classes = [VerifiedJSONParser, parsers.FormParser, parsers.MultiPartParser]
     serializer_class = EventSerializer
     permission_classes = [AllowAny]
+    metrics_endpoint = "create"
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
         service = EventService()
-        service.save_event(
+        service.receive_event(
             provider_event_id=serializer.validated_data["event_id"],
             event_type=serializer.validated_data["event_type"],
             order_id=serializer.validated_data["order_id"],
@@ -34,3 +50,46 @@ class EventCreateAPIView(generics.CreateAPIView):
             status=status.HTTP_200_OK,
             headers=headers,
         )
+
+
+class EventBatchCreateAPIView(WebhookMetricsMixin, generics.CreateAPIView):
+    authentication_classes = [HMACAuthentication]
+    parser_classes = [VerifiedJSONParser, parsers.FormParser, parsers.MultiPartParser]
+    serializer_class = EventSerializer
+    permission_classes = [AllowAny]
+    metrics_endpoint = "batch"
+
+    def create(self, request, *args, **kwargs):
+        # Размер проверяем до валидации: иначе слишком большая пачка валидировалась бы целиком
+        if not isinstance(request.data, list):
+            raise serializers.ValidationError(
+                {"non_field_errors": [f'Expected a list of items but got type "{type(request.data).__name__}".']}
+            )
+        if len(request.data) > settings.WEBHOOK_BATCH_MAX_SIZE:
+            raise serializers.ValidationError(
+                {"non_field_errors": [f"Batch size must not exceed {settings.WEBHOOK_BATCH_MAX_SIZE} events."]}
+            )
+
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+
+        service = EventService()
+        statuses = service.receive_events(
+            [
+                {
+                    "provider_event_id": event["event_id"],
+                    "event_type": event["event_type"],
+                    "order_id": event["order_id"],
+                    "data": event["data"],
+                }
+                for event in serializer.validated_data
+            ]
+        )
+
+        return Response(
+            {
+                "message": "Events received.",
+                "events": [{"event_id": event_id, "status": event_status} for event_id, event_status in statuses],
+            },
+            status=status.HTTP_200_OK,
+        )
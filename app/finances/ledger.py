@@ -0,0 +1,164 @@
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum
+
+from core.db import insert_ignore
+from finances.models import CustomerBalance, Operations, OrderBalance
+
+logger = logging.getLogger(__name__)
+
+# В какую колонку баланса попадает сумма операции
+BALANCE_FIELDS = {Operations.TYPE_CHARGE: "charged", Operations.TYPE_REFUND: "refunded"}
+
+
+def to_decimal(amount):
+    return amount if isinstance(amount, Decimal) else Decimal(str(amount))
+
+
+def refund_amount(amount):
+    """Возврат хранится отрицательной суммой."""
+    return amount if amount < 0 else -amount
+
+
+def get_order_balance(order_id):
+    """Остаток по заказу (списано + возвращено), один запрос по первичному ключу."""
+    balance = OrderBalance.objects.filter(pk=order_id).values_list("charged", "refunded").first()
+    return sum(balance, Decimal(0)) if balance else Decimal(0)
+
+
+def apply_balances(operations):
+    """
+    Добавляет суммы операций к балансам покупателей и заказов: недостающие строки создаются
+    вставкой с пропуском конфликтов, затем по одному UPDATE ... SET x = x + delta на строку.
+    """
+    customer_deltas = defaultdict(lambda: defaultdict(Decimal))
+    order_deltas = defaultdict(lambda: defaultdict(Decimal))
+    for customer_id, order_id, operation_type, amount in operations:
+        field = BALANCE_FIELDS[operation_type]
+        customer_deltas[customer_id][field] += to_decimal(amount)
+        order_deltas[order_id][field] += to_decimal(amount)
+
+    for model, key, deltas in (
+        (CustomerBalance, "customer", customer_deltas),
+        (OrderBalance, "order", order_deltas),
+    ):
+        if not deltas:
+            continue
+        insert_ignore(model, [model(**{f"{key}_id": pk}) for pk in deltas], conflict_fields=[key], returning=[key])
+        # Фиксированный порядок обновлений, чтобы параллельные пачки не ловили взаимную блокировку
+        for pk in sorted(deltas):
+            model.objects.filter(pk=pk).update(**{field: F(field) + delta for field, delta in deltas[pk].items()})
+
+
+def record_operation(operation):
+    """
+    Идемпотентно записывает одну операцию: INSERT ... ON CONFLICT (order, type) DO NOTHING без
+    savepoint, дубликат не ломает внешнюю транзакцию. Возвращает True, если строка создана,
+    и только тогда обновляет балансы.
+    """
+    created = insert_ignore(Operations, [operation], conflict_fields=["order", "type"], returning=["id"])
+    if not created:
+        return False
+    operation.pk = created[0][0]
+    apply_balances([(operation.customer_id, operation.order_id, operation.type, operation.amount)])
+    return True
+
+
+class LedgerWriter:
+    """
+    Копит финансовые операции и записывает их пачкой: одна вставка с пропуском дубликатов
+    по (order, type) и обновление балансов только для реально вставленных операций.
+    """
+
+    def __init__(self):
+        self.operations = []
+        self._pending_orders = defaultdict(Decimal)
+        self._keys = set()
+
+    def charge(self, customer_id, order_id, amount):
+        return self.add(customer_id, order_id, Operations.TYPE_CHARGE, amount)
+
+    def refund(self, customer_id, order_id, amount):
+        """Добавляет возврат, если он не больше остатка по заказу с учетом еще не записанных операций."""
+        amount = refund_amount(to_decimal(amount))
+        if self.get_order_balance(order_id) + amount < 0:
+            logger.error(f"Refund {-amount} for order {order_id} exceeds charged amount")
+            return False
+        return self.add(customer_id, order_id, Operations.TYPE_REFUND, amount)
+
+    def add(self, customer_id, order_id, operation_type, amount):
+        if (order_id, operation_type) in self._keys:
+            return False
+        self._keys.add((order_id, operation_type))
+        self.operations.append(
+            Operations(customer_id=customer_id, order_id=order_id, type=operation_type, amount=amount)
+        )
+        self._pending_orders[order_id] += to_decimal(amount)
+        return True
+
+    def get_order_balance(self, order_id):
+        return get_order_balance(order_id) + self._pending_orders.get(order_id, Decimal(0))
+
+    @transaction.atomic
+    def flush(self):
+        """Записывает накопленные операции, возвращает [(id, order_id, type)] вставленных."""
+        operations, self.operations = self.operations, []
+        self._pending_orders.clear()
+        self._keys.clear()
+
+        created = insert_ignore(
+            Operations, operations, conflict_fields=["order", "type"], returning=["id", "order_id", "type"]
+        )
+        by_key = {(operation.order_id, operation.type): operation for operation in operations}
+        apply_balances(
+            [
+                (
+                    by_key[(order_id, operation_type)].customer_id,
+                    order_id,
+                    operation_type,
+                    by_key[(order_id, operation_type)].amount,
+                )
+                for _, order_id, operation_type in created
+            ]
+        )
+
+        skipped = len(operations) - len(created)
+        if skipped:
+            logger.error(f"{skipped} of {len(operations)} operations already exist")
+        return created
+
+
+def compute_balances(key):
+    """Балансы, пересчитанные по журналу операций: {pk: {"charged": ..., "refunded": ...}}."""
+    balances = defaultdict(lambda: {"charged": Decimal(0), "refunded": Decimal(0)})
+    rows = Operations.objects.values_list(key, "type").annotate(total=Sum("amount")).order_by()
+    for pk, operation_type, total in rows.iterator():
+        balances[pk][BALANCE_FIELDS[operation_type]] = total
+    return balances
+
+
+def verify_balances(fix=False):
+    """
+    Сверяет балансы с журналом операций. Возвращает расхождения (модель, pk, поле, в таблице, по журналу);
+    с fix=True перезаписывает расходящиеся строки значениями из журнала.
+    """
+    drift = []
+    for model, key in ((CustomerBalance, "customer_id"), (OrderBalance, "order_id")):
+        expected = compute_balances(key)
+        stored = {
+            pk: {"charged": charged, "refunded": refunded}
+            for pk, charged, refunded in model.objects.values_list("pk", "charged", "refunded").iterator()
+        }
+        for pk in sorted(set(expected) | set(stored)):
+            zero = {"charged": Decimal(0), "refunded": Decimal(0)}
+            actual, wanted = stored.get(pk, zero), expected.get(pk, zero)
+            mismatched = [field for field in ("charged", "refunded") if actual[field] != wanted[field]]
+            for field in mismatched:
+                drift.append((model.__name__, pk, field, actual[field], wanted[field]))
+            if fix and mismatched:
+                with transaction.atomic():
+                    model.objects.update_or_create(pk=pk, defaults=wanted)
+    return drift
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from finances.ledger import verify_balances
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает балансы покупателей и заказов по журналу операций и сообщает о расхождениях"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="Перезаписать расходящиеся балансы")
+
+    def handle(self, *args, **options):
+        drift = verify_balances(fix=options["fix"])
+        for model, pk, field, stored, expected in drift:
+            self.stdout.write(f"{model} #{pk} {field}: stored {stored}, ledger {expected}")
+
+        if not drift:
+            self.stdout.write("Balances match the ledger")
+        elif options["fix"]:
+            self.stdout.write(f"Fixed {len(drift)} mismatches")
+        else:
+            raise CommandError(f"{len(drift)} balance mismatches found")
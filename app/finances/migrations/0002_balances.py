@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.17 on 2026-10-18 05:05
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+import django.db.models.deletion
+
+
+def fill_balances(apps, schema_editor):
+    Operations = apps.get_model("finances", "Operations")
+    CustomerBalance = apps.get_model("finances", "CustomerBalance")
+    OrderBalance = apps.get_model("finances", "OrderBalance")
+    fields = {"charge": "charged", "refund": "refunded"}
+
+    for model, key in ((CustomerBalance, "customer_id"), (OrderBalance, "order_id")):
+        balances = {}
+        for pk, operation_type, total in Operations.objects.values_list(key, "type").annotate(total=Sum("amount")).order_by():
+            balances.setdefault(pk, model(**{key: pk}))
+            setattr(balances[pk], fields[operation_type], total)
+        model.objects.bulk_create(balances.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('orders', '0001_initial'),
+        ('finances', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerBalance',
+            fields=[
+                ('customer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='finances_balance', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Покупатель')),
+                ('charged', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Списано')),
+                ('refunded', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Возвращено')),
+            ],
+            options={
+                'verbose_name': 'Баланс покупателя',
+                'verbose_name_plural': 'Балансы покупателей',
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderBalance',
+            fields=[
+                ('order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='balance', serialize=False, to='orders.Order', verbose_name='Заказ')),
+                ('charged', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Списано')),
+                ('refunded', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Возвращено')),
+            ],
+            options={
+                'verbose_name': 'Баланс заказа',
+                'verbose_name_plural': 'Балансы заказов',
+            },
+        ),
+        migrations.RunPython(fill_balances, migrations.RunPython.noop),
+    ]
@@ -28,3 +28,49 @@ class Operations(models.Model):
 
     def __str__(self):
         return f"Операция #{self.id} тип {self.type} ({self.date.strftime('%d-%m-%Y')})"
+
+
+class CustomerBalance(models.Model):
+    """Итоги по операциям покупателя, обновляются в той же транзакции, что и запись операций."""
+
+    customer = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="finances_balance",
+        verbose_name="Покупатель",
+    )
+    charged = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Списано")
+    refunded = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Возвращено")
+
+    class Meta:
+        verbose_name = "Баланс покупателя"
+        verbose_name_plural = "Балансы покупателей"
+
+    @property
+    def balance(self):
+        return self.charged + self.refunded
+
+    def __str__(self):
+        return f"Баланс покупателя #{self.customer_id}: {self.balance}"
+
+
+class OrderBalance(models.Model):
+    """Итоги по операциям заказа: по ним за один запрос проверяется, что возврат не больше оплаты."""
+
+    order = models.OneToOneField(
+        "orders.Order", on_delete=models.CASCADE, primary_key=True, related_name="balance", verbose_name="Заказ"
+    )
+    charged = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name="Списано")
+    refunded = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name="Возвращено")
+
+    class Meta:
+        verbose_name = "Баланс заказа"
+        verbose_name_plural = "Балансы заказов"
+
+    @property
+    def balance(self):
+        return self.charged + self.refunded
+
+    def __str__(self):
+        return f"Баланс заказа #{self.order_id}: {self.balance}"
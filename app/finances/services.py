@@ -1,7 +1,6 @@
 import logging
 
-from django.db import IntegrityError
-
+from finances.ledger import get_order_balance, record_operation, refund_amount, to_decimal
 from finances.models import Operations
 
 logger = logging.getLogger(__name__)
@@ -10,27 +9,39 @@ logger = logging.getLogger(__name__)
 class FinanceServices:
     @staticmethod
     def add_charge(customer_id, order_id, amount):
-        try:
-            return Operations.objects.create(
-                customer_id=customer_id,
-                order_id=order_id,
-                amount=amount,
-                type=Operations.TYPE_CHARGE,
-            )
-        except IntegrityError:
+        operation = Operations(
+            customer_id=customer_id,
+            order_id=order_id,
+            amount=amount,
+            type=Operations.TYPE_CHARGE,
+        )
+        if not record_operation(operation):
             logger.error(f"Charge operation for customer {customer_id} and order {order_id} already exists")
+            return None
+        return operation
+
+    @staticmethod
+    def can_refund(order_id, amount):
+        """Возврат не больше остатка по заказу."""
+        return get_order_balance(order_id) + refund_amount(to_decimal(amount)) >= 0
 
     def make_refund(self, customer_id, order_id, amount):
-        try:
-            return Operations.objects.create(
-                customer_id=customer_id,
-                order_id=order_id,
-                amount=self._process_refund_amount(amount),
-                type=Operations.TYPE_REFUND,
-            )
-        except IntegrityError:
+        amount = self._process_refund_amount(to_decimal(amount))
+        if not self.can_refund(order_id, amount):
+            logger.error(f"Refund {-amount} for order {order_id} exceeds charged amount")
+            return None
+
+        operation = Operations(
+            customer_id=customer_id,
+            order_id=order_id,
+            amount=amount,
+            type=Operations.TYPE_REFUND,
+        )
+        if not record_operation(operation):
             logger.error(f"Refund operation for customer {customer_id} and order {order_id} already exists")
+            return None
+        return operation
 
     @staticmethod
     def _process_refund_amount(amount):
-        return amount if amount < 0 else -amount
+        return refund_amount(amount)
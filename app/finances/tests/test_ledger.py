@@ -0,0 +1,74 @@
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from finances.ledger import LedgerWriter, get_order_balance, verify_balances
+from finances.models import CustomerBalance, Operations, OrderBalance
+
+
+@pytest.mark.django_db
+class TestLedgerWriter:
+    def test_flush_writes_operations_and_balances(self, customer, create_order):
+        first = create_order(amount=100, customer_obj=customer)
+        second = create_order(amount=40, customer_obj=customer)
+        ledger = LedgerWriter()
+
+        ledger.charge(customer.pk, first.pk, first.amount)
+        ledger.charge(customer.pk, second.pk, second.amount)
+        assert ledger.refund(customer.pk, second.pk, second.amount) is True
+        created = ledger.flush()
+
+        assert len(created) == 3
+        assert Operations.objects.count() == 3
+        balance = CustomerBalance.objects.get(customer=customer)
+        assert (balance.charged, balance.refunded) == (140, -40)
+        assert get_order_balance(second.pk) == 0
+
+    @patch("finances.ledger.logger")
+    def test_duplicates_do_not_change_balances(self, logger, customer, create_order):
+        order = create_order(amount=100, customer_obj=customer)
+        for _ in range(2):
+            ledger = LedgerWriter()
+            ledger.charge(customer.pk, order.pk, order.amount)
+            ledger.charge(customer.pk, order.pk, order.amount)
+            ledger.flush()
+
+        assert Operations.objects.count() == 1
+        assert OrderBalance.objects.get(order=order).charged == 100
+        logger.error.assert_called_once()
+
+    @patch("finances.ledger.logger")
+    def test_refund_over_balance_is_rejected(self, logger, customer, create_order):
+        order = create_order(amount=100, customer_obj=customer)
+        ledger = LedgerWriter()
+
+        assert ledger.refund(customer.pk, order.pk, 100) is False
+        assert ledger.operations == []
+
+
+@pytest.mark.django_db
+class TestVerifyBalances:
+    def test_reports_and_fixes_drift(self, customer, create_order):
+        order = create_order(amount=100, customer_obj=customer)
+        ledger = LedgerWriter()
+        ledger.charge(customer.pk, order.pk, order.amount)
+        ledger.flush()
+        assert verify_balances() == []
+
+        OrderBalance.objects.filter(pk=order.pk).update(charged=50)
+        CustomerBalance.objects.all().delete()
+
+        assert set(verify_balances()) == {
+            ("CustomerBalance", customer.pk, "charged", 0, 100),
+            ("OrderBalance", order.pk, "charged", 50, 100),
+        }
+        with pytest.raises(CommandError, match="2 balance mismatches"):
+            call_command("verify_balances", stdout=StringIO())
+
+        out = StringIO()
+        call_command("verify_balances", "--fix", stdout=out)
+
+        assert "Fixed 2 mismatches" in out.getvalue()
+        assert verify_balances() == []
@@ -1,9 +1,11 @@
 from unittest.mock import patch
 
 import pytest
-from django.db import transaction
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
 
-from finances.models import Operations
+from finances.ledger import get_order_balance
+from finances.models import CustomerBalance, Operations, OrderBalance
 from finances.services import FinanceServices
 
 
@@ -49,10 +51,11 @@ class TestOperationsService:
         order = create_order(amount=amount, customer_obj=customer)
 
         finance_service = FinanceServices()
+        finance_service.add_charge(customer.pk, order.pk, amount)
         operation = finance_service.make_refund(customer.pk, order.pk, amount)
 
         assert operation is not None
-        assert Operations.objects.count() == 1
+        assert Operations.objects.count() == 2
         assert operation.type == Operations.TYPE_REFUND
         assert operation.amount == -amount
         assert operation.customer_id == customer.pk
@@ -63,13 +66,14 @@ class TestOperationsService:
         order = create_order(amount=amount, customer_obj=customer)
 
         finance_service = FinanceServices()
+        finance_service.add_charge(customer.pk, order.pk, amount * 2)
         finance_service.make_refund(customer.pk, order.pk, amount)
 
         with transaction.atomic():
             operation = finance_service.make_refund(customer.pk, order.pk, amount)
 
         assert operation is None
-        assert Operations.objects.count() == 1
+        assert Operations.objects.count() == 2
 
         logger.error.assert_called_once()
         assert (
@@ -81,3 +85,43 @@ class TestOperationsService:
     def test_process_refund_amount(self, amount, result):
         finance_service = FinanceServices()
         assert finance_service._process_refund_amount(amount) == result
+
+    @patch("finances.services.logger")
+    def test_make_refund_over_charged_amount(self, logger, customer, create_order):
+        order = create_order(amount=100, customer_obj=customer)
+        finance_service = FinanceServices()
+        finance_service.add_charge(customer.pk, order.pk, 50)
+
+        assert finance_service.make_refund(customer.pk, order.pk, 100) is None
+
+        assert not Operations.objects.filter(type=Operations.TYPE_REFUND).exists()
+        assert "exceeds charged amount" in logger.error.call_args[0][0]
+
+    def test_balances_are_updated(self, customer, create_order):
+        first = create_order(amount=100, customer_obj=customer)
+        second = create_order(amount=30, customer_obj=customer)
+        finance_service = FinanceServices()
+
+        finance_service.add_charge(customer.pk, first.pk, first.amount)
+        finance_service.add_charge(customer.pk, second.pk, second.amount)
+        finance_service.make_refund(customer.pk, second.pk, second.amount)
+        finance_service.add_charge(customer.pk, first.pk, first.amount)
+
+        balance = CustomerBalance.objects.get(customer=customer)
+        assert (balance.charged, balance.refunded, balance.balance) == (130, -30, 100)
+        assert OrderBalance.objects.get(order=second).balance == 0
+        assert get_order_balance(first.pk) == 100
+
+    @patch("finances.services.logger")
+    def test_duplicate_does_not_break_outer_transaction(self, logger, customer, create_order):
+        order = create_order(amount=10, customer_obj=customer)
+        finance_service = FinanceServices()
+
+        with transaction.atomic():
+            assert finance_service.add_charge(customer.pk, order.pk, 10) is not None
+            with CaptureQueriesContext(connection) as queries:
+                assert finance_service.add_charge(customer.pk, order.pk, 10) is None
+            assert Operations.objects.count() == 1
+
+        assert len(queries) == 1
+        assert "SAVEPOINT" not in queries[0]["sql"]
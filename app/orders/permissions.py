@@ -0,0 +1,8 @@
+from rest_framework.permissions import BasePermission
+
+
+class IsOrderOwnerOrStaff(BasePermission):
+    """Данные заказа видят его покупатель и сотрудники (в том числе сервисные учетные записи)."""
+
+    def has_object_permission(self, request, view, obj):
+        return request.user.is_staff or obj["customer_id"] == request.user.pk
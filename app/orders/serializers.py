@@ -0,0 +1,15 @@
+from rest_framework import serializers
+
+
+class LastEventSerializer(serializers.Serializer):
+    event_id = serializers.CharField()
+    event_type = serializers.CharField()
+    date = serializers.CharField()
+
+
+class OrderPaymentStatusSerializer(serializers.Serializer):
+    order_id = serializers.IntegerField()
+    status = serializers.CharField()
+    charged = serializers.CharField()
+    refunded = serializers.CharField()
+    last_event = LastEventSerializer(allow_null=True)
@@ -0,0 +1,54 @@
+from orders.models import Order
+
+
+class InvalidTransition(ValueError):
+    pass
+
+
+class OrderStateMachine:
+    """
+    Переходы статусов заказа. Каждый переход - один условный UPDATE ... WHERE status = <ожидаемый>,
+    без select_for_update: переход применяется ровно один раз, даже если одно событие обрабатывают
+    параллельно, а побочные эффекты выполняются только когда переход применился.
+    """
+
+    TRANSITIONS = {
+        Order.STATUS_NEW: (Order.STATUS_PAID, Order.STATUS_CANCELED),
+        Order.STATUS_PAID: (Order.STATUS_CANCELED, Order.STATUS_SHIPPED),
+        Order.STATUS_SHIPPED: (),
+        Order.STATUS_CANCELED: (),
+    }
+
+    @classmethod
+    def can_transition(cls, source, target):
+        return target in cls.TRANSITIONS.get(source, ())
+
+    @classmethod
+    def transition(cls, order, source, target):
+        """Переводит заказ из source в target. Возвращает False, если заказ уже не в статусе source."""
+        if not cls.can_transition(source, target):
+            raise InvalidTransition(f"Order can't change status from {source} to {target}")
+        applied = Order.objects.filter(pk=order.pk, status=source).update(status=target) == 1
+        if applied:
+            order.status = target
+        return applied
+
+    @classmethod
+    def hold(cls, order, status):
+        """
+        Проверяет, что заказ все еще в статусе status, и блокирует его строку до конца транзакции
+        холостым UPDATE. Нужен, когда решение принято по статусу, прочитанному без блокировки.
+        """
+        return Order.objects.filter(pk=order.pk, status=status).update(status=status) == 1
+
+    @classmethod
+    def pay(cls, order):
+        return cls.transition(order, Order.STATUS_NEW, Order.STATUS_PAID)
+
+    @classmethod
+    def cancel(cls, order):
+        return cls.transition(order, Order.STATUS_PAID, Order.STATUS_CANCELED)
+
+    @classmethod
+    def ship(cls, order):
+        return cls.transition(order, Order.STATUS_PAID, Order.STATUS_SHIPPED)
@@ -0,0 +1,114 @@
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from core.ratelimit import get_shared_cache
+from events.models import Event, EventArchive
+from orders.models import Order
+
+
+def _format_amount(amount):
+    # Баланса еще нет, если по заказу не было операций
+    return str(abs(amount)) if amount is not None else "0.00"
+
+
+class OrderPaymentStatusCache:
+    """
+    Платежный статус заказа для опрашивающих клиентов: статус, списано, возвращено, последнее
+    обработанное событие. Читается из кэша, в БД идем только на промахе. Запись лежит под версией
+    заказа, процессоры событий увеличивают версию после коммита: читатель, который на промахе успел
+    загрузить старую строку, кладет ее под старую версию, и ее уже никто не прочитает.
+    TTL ограничивает устаревание, если увеличение версии потерялось.
+    """
+
+    KEY_PREFIX = "order-payment-status:"
+    VERSION_KEY_PREFIX = "order-payment-status-version:"
+
+    def __init__(self, cache, ttl):
+        self.cache = cache
+        self.ttl = ttl
+
+    @classmethod
+    def from_settings(cls):
+        return cls(get_shared_cache(settings.ORDER_STATUS_CACHE_ALIAS), settings.ORDER_STATUS_CACHE_TTL)
+
+    def _get_version(self, order_id):
+        key = self.VERSION_KEY_PREFIX + str(order_id)
+        # Начальная версия от времени: если ключ версии вытеснят, новая будет больше всех прежних
+        self.cache.add(key, int(time.time() * 1000), None)
+        return self.cache.get(key)
+
+    def _bump_version(self, order_id):
+        key = self.VERSION_KEY_PREFIX + str(order_id)
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.set(key, int(time.time() * 1000), None)
+
+    def get(self, order_id):
+        key = f"{self.KEY_PREFIX}{order_id}:{self._get_version(order_id)}"
+        status = self.cache.get(key)
+        if status is None:
+            status = self.load(order_id)
+            if status is not None:
+                self.cache.set(key, status, self.ttl)
+        return status
+
+    @staticmethod
+    def load(order_id):
+        order = (
+            Order.objects.filter(pk=order_id)
+            .values("id", "customer_id", "status", "balance__charged", "balance__refunded")
+            .first()
+        )
+        if order is None:
+            return None
+
+        last_event = (
+            Event.objects.filter(order_id=str(order_id), status=Event.STATUS_PROCESSED)
+            .order_by("-date", "-id")
+            .values("provider_event_id", "event_type", "date")
+            .first()
+        )
+        if last_event is None:
+            last_event = (
+                EventArchive.objects.filter(order_id=str(order_id), status=Event.STATUS_PROCESSED)
+                .order_by("-date", "-id")
+                .values("provider_event_id", "event_type", "date")
+                .first()
+            )
+
+        return {
+            "order_id": order["id"],
+            # Для проверки доступа, клиентам не отдается
+            "customer_id": order["customer_id"],
+            "status": order["status"],
+            "charged": _format_amount(order["balance__charged"]),
+            # Возвраты в журнале отрицательные, клиентам отдаем сумму возврата
+            "refunded": _format_amount(order["balance__refunded"]),
+            "last_event": (
+                {
+                    "event_id": last_event["provider_event_id"],
+                    "event_type": last_event["event_type"],
+                    "date": last_event["date"].isoformat(),
+                }
+                if last_event
+                else None
+            ),
+        }
+
+    def invalidate(self, order_ids):
+        """Увеличивает версии заказов после коммита текущей транзакции, чтобы не закэшировать незакоммиченное."""
+        order_ids = list(order_ids)
+
+        def bump_versions():
+            for order_id in order_ids:
+                self._bump_version(order_id)
+
+        if order_ids:
+            transaction.on_commit(bump_versions)
+
+
+def get_order_status_cache():
+    return OrderPaymentStatusCache.from_settings()
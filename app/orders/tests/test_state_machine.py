@@ -0,0 +1,50 @@
+import pytest
+
+from orders.models import Order
+from orders.state_machine import InvalidTransition, OrderStateMachine
+
+
+@pytest.mark.django_db
+class TestOrderStateMachine:
+    def test_pay_applies_once(self, create_order):
+        order = create_order(status=Order.STATUS_NEW)
+        stale = Order.objects.get(pk=order.pk)
+
+        assert OrderStateMachine.pay(order) is True
+        assert OrderStateMachine.pay(stale) is False
+
+        order.refresh_from_db()
+        assert order.status == Order.STATUS_PAID
+        assert stale.status == Order.STATUS_NEW
+
+    @pytest.mark.parametrize(
+        "initial_status, applied",
+        [(Order.STATUS_PAID, True), (Order.STATUS_NEW, False), (Order.STATUS_SHIPPED, False)],
+    )
+    def test_cancel(self, create_order, initial_status, applied):
+        order = create_order(status=initial_status)
+
+        assert OrderStateMachine.cancel(order) is applied
+
+        order.refresh_from_db()
+        assert order.status == (Order.STATUS_CANCELED if applied else initial_status)
+
+    def test_transition_only_touches_status(self, create_order):
+        order = create_order(status=Order.STATUS_NEW, amount=10)
+        Order.objects.filter(pk=order.pk).update(amount=20)
+
+        OrderStateMachine.pay(order)
+
+        assert Order.objects.get(pk=order.pk).amount == 20
+
+    def test_invalid_transition(self, create_order):
+        order = create_order(status=Order.STATUS_CANCELED)
+
+        with pytest.raises(InvalidTransition):
+            OrderStateMachine.transition(order, Order.STATUS_CANCELED, Order.STATUS_PAID)
+
+    def test_hold(self, create_order):
+        order = create_order(status=Order.STATUS_NEW)
+
+        assert OrderStateMachine.hold(order, Order.STATUS_NEW) is True
+        assert OrderStateMachine.hold(order, Order.STATUS_PAID) is False
@@ -0,0 +1,190 @@
+from unittest.mock import patch
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from events.models import Event
+from events.services import ChargeEvent
+from finances.services import FinanceServices
+from orders.models import Order
+from orders.status import OrderPaymentStatusCache, get_order_status_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_order_status_cache(settings):
+    caches[settings.ORDER_STATUS_CACHE_ALIAS].clear()
+    yield
+    caches[settings.ORDER_STATUS_CACHE_ALIAS].clear()
+
+
+@pytest.fixture
+def run_on_commit():
+    # В тестах транзакция не коммитится, колбэки on_commit выполняем сразу
+    with patch("orders.status.transaction.on_commit", side_effect=lambda callback: callback()):
+        yield
+
+
+def create_event(order, provider_event_id, event_type, status=Event.STATUS_PROCESSED):
+    return Event.objects.create(
+        provider_event_id=provider_event_id,
+        event_type=event_type,
+        order_id=str(order.pk),
+        data={},
+        status=status,
+    )
+
+
+@pytest.mark.django_db
+class TestOrderPaymentStatusCache:
+    @patch("core.ratelimit._warned_aliases", new_callable=set)
+    @patch("core.ratelimit.logger")
+    def test_warns_about_process_local_cache(self, mock_logger, warned, settings):
+        get_order_status_cache()
+
+        mock_logger.warning.assert_called_once()
+        assert repr(settings.ORDER_STATUS_CACHE_ALIAS) in mock_logger.warning.call_args[0][0]
+
+    def test_load_order_without_operations(self, create_order):
+        order = create_order(amount=10)
+
+        assert OrderPaymentStatusCache.load(order.pk) == {
+            "order_id": order.pk,
+            "customer_id": order.customer_id,
+            "status": Order.STATUS_NEW,
+            "charged": "0.00",
+            "refunded": "0.00",
+            "last_event": None,
+        }
+
+    def test_load_amounts_and_last_event(self, customer, create_order):
+        order = create_order(amount=10, customer_obj=customer)
+        FinanceServices().add_charge(customer.pk, order.pk, 10)
+        FinanceServices().make_refund(customer.pk, order.pk, 10)
+        create_event(order, "charge-1", "charge.succeeded")
+        refund = create_event(order, "refund-1", "refund.created")
+        create_event(order, "refund-2", "refund.created", status=Event.STATUS_PARKED)
+
+        status = OrderPaymentStatusCache.load(order.pk)
+
+        assert status["charged"] == "10.00"
+        assert status["refunded"] == "10.00"
+        assert status["last_event"] == {
+            "event_id": "refund-1",
+            "event_type": "refund.created",
+            "date": refund.date.isoformat(),
+        }
+
+    def test_load_missing_order(self):
+        assert OrderPaymentStatusCache.load(404) is None
+
+    def test_get_is_served_from_cache(self, create_order, django_assert_num_queries):
+        order = create_order()
+        cache = get_order_status_cache()
+        cache.get(order.pk)
+
+        Order.objects.filter(pk=order.pk).update(status=Order.STATUS_PAID)
+
+        with django_assert_num_queries(0):
+            assert cache.get(order.pk)["status"] == Order.STATUS_NEW
+
+    def test_processed_charge_invalidates_cache(self, create_order, run_on_commit):
+        order = create_order()
+        cache = get_order_status_cache()
+        assert cache.get(order.pk)["status"] == Order.STATUS_NEW
+
+        event = create_event(order, "charge-1", "charge.succeeded", status=Event.STATUS_NEW)
+        ChargeEvent().process(event.pk)
+
+        status = cache.get(order.pk)
+        assert status["status"] == Order.STATUS_PAID
+        assert status["last_event"]["event_id"] == "charge-1"
+
+    def test_invalidate_waits_for_commit(self, create_order):
+        order = create_order()
+        cache = get_order_status_cache()
+        cache.get(order.pk)
+
+        Order.objects.filter(pk=order.pk).update(status=Order.STATUS_PAID)
+
+        with patch("orders.status.transaction.on_commit") as on_commit:
+            cache.invalidate([order.pk])
+
+        assert cache.get(order.pk)["status"] == Order.STATUS_NEW
+        on_commit.call_args[0][0]()
+        assert cache.get(order.pk)["status"] == Order.STATUS_PAID
+
+    def test_stale_fill_after_commit_is_not_served(self, create_order):
+        order = create_order()
+        cache = get_order_status_cache()
+        stale = OrderPaymentStatusCache.load(order.pk)
+        Order.objects.filter(pk=order.pk).update(status=Order.STATUS_PAID)
+
+        def load_during_commit(order_id):
+            # Читатель прочитал строку до коммита процессора, а положить в кэш успел после
+            with patch("orders.status.transaction.on_commit", side_effect=lambda callback: callback()):
+                cache.invalidate([order_id])
+            return stale
+
+        with patch.object(OrderPaymentStatusCache, "load", side_effect=load_during_commit):
+            assert cache.get(order.pk)["status"] == Order.STATUS_NEW
+
+        assert cache.get(order.pk)["status"] == Order.STATUS_PAID
+
+
+@pytest.mark.django_db
+class TestOrderPaymentStatusAPIView:
+    @staticmethod
+    def _get_path(order_id):
+        return reverse("orders:order-payment-status", kwargs={"order_id": order_id})
+
+    def test_requires_authentication(self, create_order):
+        order = create_order()
+
+        response = APIClient().get(self._get_path(order.pk))
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_returns_status(self, customer, create_order, django_assert_num_queries):
+        order = create_order(customer_obj=customer)
+        client = APIClient()
+        client.force_authenticate(customer)
+
+        response = client.get(self._get_path(order.pk))
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["status"] == Order.STATUS_NEW
+
+        with django_assert_num_queries(0):
+            assert client.get(self._get_path(order.pk)).data == response.data
+
+    def test_foreign_order_is_forbidden(self, customer, create_order):
+        order = create_order(customer_obj=customer)
+        other = User.objects.create_user(username="other_customer", password="testpassword")
+        client = APIClient()
+        client.force_authenticate(other)
+
+        response = client.get(self._get_path(order.pk))
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_staff_can_read_any_order(self, customer, create_order):
+        order = create_order(customer_obj=customer)
+        staff = User.objects.create_user(username="support", password="testpassword", is_staff=True)
+        client = APIClient()
+        client.force_authenticate(staff)
+
+        response = client.get(self._get_path(order.pk))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert "customer_id" not in response.data
+
+    def test_missing_order(self, customer):
+        client = APIClient()
+        client.force_authenticate(customer)
+
+        response = client.get(self._get_path(404))
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
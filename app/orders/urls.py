@@ -0,0 +1,7 @@
+from django.conf.urls import url
+
+from orders.views import OrderPaymentStatusAPIView
+
+urlpatterns = [
+    url(r"^(?P<order_id>\d+)/payment-status/$", OrderPaymentStatusAPIView.as_view(), name="order-payment-status"),
+]
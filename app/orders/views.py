@@ -0,0 +1,21 @@
+from django.http import Http404
+from rest_framework import generics
+from rest_framework.permissions import IsAuthenticated
+
+from orders.permissions import IsOrderOwnerOrStaff
+from orders.serializers import OrderPaymentStatusSerializer
+from orders.status import get_order_status_cache
+
+
+class OrderPaymentStatusAPIView(generics.RetrieveAPIView):
+    """Платежный статус заказа для внешних систем, читается из кэша, в БД - только на промахе."""
+
+    serializer_class = OrderPaymentStatusSerializer
+    permission_classes = [IsAuthenticated, IsOrderOwnerOrStaff]
+
+    def get_object(self):
+        status = get_order_status_cache().get(self.kwargs["order_id"])
+        if status is None:
+            raise Http404
+        self.check_object_permissions(self.request, status)
+        return status